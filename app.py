@@ -5,27 +5,50 @@ import sys
 from aiogram import Bot, Dispatcher, Router
 from aiogram.enums import ParseMode
 from aiogram.client.default import DefaultBotProperties
-from handlers.users.main import start_router
+from handlers.users.main import (
+    start_router,
+    membership_router,
+    callbacks_router,
+    inline_router,
+    group_router,
+    digest_router,
+)
 from handlers.users.admin.admin_spams import router as admin_spams_router
+from handlers.users.main.membership import sync_membership_job
 from handlers.users.main.converter import router as converter_router
 from handlers.users.admin.admin import router as admin_router
-from middlewares.checksub import CheckSubscriptionMiddleware
+from middlewares.checksub import subscription_gate
+from middlewares.executor import update_executor
+from middlewares.group import group_noise
+from middlewares.throttling import throttling
 from dotenv import load_dotenv
 from data.config import load_config
 from utils.database.db_init import init_db
+from utils.premium import PREMIUM_SYNC_INTERVAL, premium_service
+from utils.database.db import DataBase
+from utils.misc.subscription import (
+    MEMBERSHIP_SYNC_INTERVAL,
+    membership_cache,
+    membership_index,
+)
+from utils.exports import shutdown_executor as shutdown_export_executor
+from utils.webhook import run_webhook
+from utils.misc.storage import create_storage
+from utils.misc.overload import overload
 
 load_dotenv()
 
 # API va utillar
 from utils.currency_api import (
-    CurrencyApi,
-    currency_update_task,
-    daily_notification_task,
+    FOLLOW_INTERVAL,
+    currency_api,
+    follow_rates_job,
+    update_rates_job,
 )
-
-
-# Currency API instance
-currency_api = CurrencyApi()
+from utils.leader import leader
+from utils.scheduler import Cron, Interval, scheduler
+from utils.digest import digest_service
+from utils.shared_rates import SharedRates
 
 # Logger sozlamalari
 logger = logging.getLogger(__name__)
@@ -40,9 +63,9 @@ logging.basicConfig(
 
 
 async def setup_currency_service():
-    """Valyuta API ni sozlash"""
+    """Valyuta API ni sozlash (e'lon qilingan nusxadan, bo'lmasa CBU'dan)"""
     try:
-        if await currency_api.update_rates():
+        if await currency_api.refresh():
             logger.info("Valyuta kurslari muvaffaqiyatli yuklandi")
             rates_info = "\n".join(
                 [f"{k}: {v:,.2f} UZS" for k, v in currency_api.rates.items()]
@@ -61,25 +84,81 @@ async def init_services(bot: Bot):
     """Barcha servislarni ishga tushirish"""
     logger.info("Servislar ishga tushmoqda...")
 
-    # Database ni ishga tushirish
+    # Database ni ishga tushirish (migratsiyalar)
     try:
-        await init_db()
+        if not await init_db():
+            logger.error("Database migratsiyalarini qo'llab bo'lmadi")
+            return False
         logger.info("Database muvaffaqiyatli ishga tushdi")
     except Exception as e:
         logger.error(f"Database xatosi: {e}")
         return False
 
+    # chat_member hodisalaridan yig'ilgan a'zolik indeksi
+    try:
+        membership_index.load(await DataBase().get_channel_memberships())
+    except Exception as e:
+        logger.error(f"A'zolik indeksini yuklashda xatolik: {e}")
+        return False
+
+    # Bir xostdagi jarayonlar uchun umumiy kurslar segmenti
+    shm_name = load_config().rates.shm_name
+    if shm_name:
+        shared = SharedRates(shm_name)
+        if shared.open():
+            currency_api.attach_shared(shared)
+
     # Valyuta servisini ishga tushirish
     if not await setup_currency_service():
         return False
 
+    # Premium keshi va muddat sweeper'i
     try:
-        # Background tasklar
-        asyncio.create_task(currency_update_task())
-        logger.info("Valyuta yangilash task ishga tushdi")
+        await premium_service.start()
+        logger.info("Premium servis ishga tushdi")
+    except Exception as e:
+        logger.error(f"Premium servisini ishga tushirishda xatolik: {e}")
+        return False
 
-        asyncio.create_task(daily_notification_task(bot))
-        logger.info("Kunlik xabar task ishga tushdi")
+    try:
+        # Background ishlar bitta scheduler'da: CBU so'rovi va kunlik xabar
+        # faqat liderda, qolgan jarayonlar lider e'lon qilgan kurslarni o'qiydi
+        scheduler.add_job(
+            "currency_update",
+            update_rates_job,
+            Interval(currency_api.update_interval),
+            leader=True,
+            timeout=60,
+        )
+        # Har daqiqada: shu daqiqaga vaqt qo'ygan foydalanuvchilarga xabar
+        scheduler.add_job(
+            "daily_digest",
+            lambda: digest_service.send_due(bot),
+            Cron(),
+            leader=True,
+        )
+        scheduler.add_job(
+            "rates_follow", follow_rates_job, Interval(FOLLOW_INTERVAL), leader=False
+        )
+        # Har bir jarayonda: boshqa jarayonlar yozgan a'zolik va premium
+        # o'zgarishlari
+        scheduler.add_job(
+            "membership_sync",
+            sync_membership_job,
+            Interval(MEMBERSHIP_SYNC_INTERVAL),
+        )
+        scheduler.add_job(
+            "premium_sync", premium_service.sync, Interval(PREMIUM_SYNC_INTERVAL)
+        )
+        leader.on_change(
+            lambda is_leader: setattr(currency_api, "is_leader", is_leader)
+        )
+        leader.on_change(digest_service.set_role)
+        leader.on_change(premium_service.set_role)
+        leader.on_change(scheduler.set_role)
+        scheduler.start()
+        await leader.start()
+        logger.info("Background ishlar scheduler va lider tanlovi orqali ishga tushdi")
 
         return True
     except Exception as e:
@@ -89,30 +168,33 @@ async def init_services(bot: Bot):
 
 def setup_handlers(dp: Dispatcher):
     """Barcha handlerlarni ulash va middleware'ni qo'shish"""
-    # Middleware'ni barcha routerlarga qo'shish
-    middleware = CheckSubscriptionMiddleware()
-
-    # Admin router uchun middleware
-    admin_router.message.middleware(middleware)
-    admin_router.callback_query.middleware(middleware)
-
-    # Start router uchun middleware
-    start_router.message.middleware(middleware)
-    start_router.callback_query.middleware(middleware)
-
-    # Admin spams router uchun middleware
-    admin_spams_router.message.middleware(middleware)
-    admin_spams_router.callback_query.middleware(middleware)
-
-    # Converter router uchun middleware
-    converter_router.message.middleware(middleware)
-    converter_router.callback_query.middleware(middleware)
+    # Guruhdagi oddiy xabarlar FSM holatini o'qishdan va navbatga qo'yishdan
+    # oldin tashlanadi, keyin aiogram'ning FSM middleware'i
+    dp.update.outer_middleware(group_noise)
+    dp.update.outer_middleware(dp.fsm)
+    # Birinchi: update'lar chat bo'yicha tartibda, ustuvorlik navbatlari bilan
+    # executor worker'larida bajariladi (quyidagi hamma narsa worker ichida)
+    dp.update.outer_middleware(update_executor)
+    # Token bucket cheklovi obuna tekshiruvidan oldin: cheklangan update
+    # baza va Telegram API'ga yetib bormaydi
+    dp.update.outer_middleware(throttling)
+    # Obuna tekshiruvi butun dispatcher uchun bir marta (har bir update'ga)
+    dp.update.outer_middleware(subscription_gate)
 
     # Routerlarni Dispatcher'ga ulash
+    # Callback jadvali birinchi: ko'p callback'lar bitta lug'at qidiruvi bilan hal bo'ladi
+    dp.include_router(callbacks_router)
+    # Guruh xabarlari boshqa routerlarga (va FSM holatiga) yetib bormaydi
+    dp.include_router(group_router)
     dp.include_router(admin_router)
     dp.include_router(start_router)
+    dp.include_router(digest_router)
     dp.include_router(admin_spams_router)
     dp.include_router(converter_router)
+    # Kanal a'zoligi hodisalari (obuna tekshiruvisiz)
+    dp.include_router(membership_router)
+    # Inline rejim: @bot 100 usd
+    dp.include_router(inline_router)
 
     logger.info("Barcha handlerlar va middleware'lar ulandi")
 
@@ -120,13 +202,14 @@ def setup_handlers(dp: Dispatcher):
 async def main():
     # Configni yuklash
     config = load_config()
-    await init_db()
 
     # Bot va Dispatcher yaratish
     bot = Bot(
         token=config.bot.token, default=DefaultBotProperties(parse_mode=ParseMode.HTML)
     )
-    dp = Dispatcher()
+    # FSM holati: Redis (USE_REDIS=true) yoki TTL'li xotira. FSM middleware'i
+    # setup_handlers'da guruh filtridan keyin ulanadi
+    dp = Dispatcher(storage=create_storage(config), disable_fsm=True)
 
     # Handlerlar va middleware'larni ulash
     setup_handlers(dp)
@@ -137,16 +220,44 @@ async def main():
         await bot.session.close()
         return
 
-    # Botni ishga tushirish
+    # Botni ishga tushirish (BOT_MODE=polling yoki webhook)
     try:
-        logger.info("Bot ishga tushdi")
-        await dp.start_polling(bot)
+        await update_executor.executor.start()
+        # Event loop kechikishi va navbat bo'yicha degraded rejim nazorati
+        overload.start(update_executor.executor)
+        if config.webhook.enabled:
+            logger.info("Bot webhook rejimida ishga tushdi")
+            await run_webhook(dp, bot, config.webhook, update_executor.executor)
+        else:
+            # Webhook o'rnatilgan bo'lsa getUpdates ishlamaydi
+            await bot.delete_webhook(drop_pending_updates=False)
+            logger.info("Bot ishga tushdi")
+            # Update'lar executor navbatiga qo'yiladi; navbat to'lsa polling kutadi
+            await dp.start_polling(bot, handle_as_tasks=False)
     except Exception as e:
         logger.error(f"Bot ishga tushishida xatolik: {e}")
     finally:
         # Bot to'xtaganda barcha resurslarni yopish
+        await overload.stop()
+        await update_executor.executor.stop()
+        await scheduler.stop()
+        await leader.stop()
+        logger.info(f"Scheduler: {scheduler.stats()}")
+        logger.info(f"Kunlik xabarlar: {digest_service.stats()}")
+        logger.info(f"Update executor: {update_executor.executor.stats()}")
+        logger.info(f"Yuklama nazorati: {overload.stats()}")
+        logger.info(f"A'zolik keshi: {membership_cache.stats()}")
+        logger.info(f"Obuna tekshiruvi: {subscription_gate.stats()}")
+        logger.info(f"Cheklov: {throttling.stats()}")
+        logger.info(f"Guruh filtri: {group_noise.stats()}")
         await bot.session.close()
+        await dp.storage.close()
         await currency_api._close_session()
+        if currency_api.shared is not None:
+            logger.info(f"Umumiy kurslar: {currency_api.shared.stats()}")
+            currency_api.shared.close()
+        await premium_service.stop()
+        shutdown_export_executor()
         logger.info("Bot va barcha resurslar to'xtatildi")
 
 
@@ -0,0 +1,123 @@
+"""Callback routing: magic filter zanjiri va prefiks jadvalini solishtirish.
+
+Ikkala holatda ham aiogram Router'lari orqali ``propagate_event`` chaqiriladi,
+handler'lar bo'sh. Eski holat app.setup_handlers'dagi routerlar tartibini
+va F.data filtrlarini takrorlaydi (avval admin, start, converter).
+
+    python -m benchmarks.callback_routing --events 200000
+"""
+
+import argparse
+import asyncio
+import random
+import time
+
+from aiogram import F, Router
+from aiogram.types import CallbackQuery, User
+
+from handlers.users.main.callbacks import CallbackTable
+from keyboards.inline.callback_data import (
+    Calculate,
+    DeleteChannel,
+    ResetConversion,
+    SelectCurrency,
+    ToggleCurrency,
+)
+
+CURRENCIES = ["UZS", "RUB", "EUR", "GBP", "USD"]
+ADMIN_ID = 1
+
+
+async def _noop(*args, **kwargs):
+    return True
+
+
+def legacy_router() -> Router:
+    admin, start, converter = Router(), Router(), Router()
+    admin.callback_query.register(_noop, F.data.startswith("delete_channel:"))
+    start.callback_query.register(_noop, F.data == "check_subscription")
+    start.callback_query.register(_noop, F.data == "back_to_main")
+    start.callback_query.register(_noop, F.data == "reset")
+    converter.callback_query.register(_noop, F.data.startswith("select_"))
+    converter.callback_query.register(_noop, F.data.startswith("toggle_"))
+    converter.callback_query.register(_noop, F.data == "calculate")
+    converter.callback_query.register(_noop, F.data == "reset")
+    root = Router()
+    root.include_routers(admin, start, converter)
+    return root
+
+
+def table_router() -> Router:
+    table = CallbackTable(admin_ids=[ADMIN_ID])
+
+    async def handler(callback, callback_data):
+        return True
+
+    table.register(SelectCurrency)(handler)
+    table.register(ToggleCurrency)(handler)
+    table.register(Calculate)(handler)
+    table.register(ResetConversion)(handler)
+    table.register(DeleteChannel, admin_only=True)(handler)
+    callbacks, start = Router(), Router()
+    callbacks.callback_query.register(table.dispatch)
+    start.callback_query.register(_noop, F.data == "check_subscription")
+    root = Router()
+    root.include_routers(callbacks, start)
+    return root
+
+
+def workload(count: int):
+    """Haqiqiy foydalanishga yaqin aralashma: asosan toggle/select"""
+    user = User(id=ADMIN_ID, is_bot=False, first_name="bench")
+    legacy, table = [], []
+    rng = random.Random(1)
+    for i in range(count):
+        kind = rng.choices(
+            ["toggle", "select", "calculate", "reset", "delete", "check"],
+            weights=[45, 20, 15, 15, 3, 2],
+        )[0]
+        code = rng.choice(CURRENCIES)
+        old, new = {
+            "toggle": (f"toggle_{code}", ToggleCurrency(code=code).pack()),
+            "select": (f"select_{code}", SelectCurrency(code=code).pack()),
+            "calculate": ("calculate", Calculate().pack()),
+            "reset": ("reset", ResetConversion().pack()),
+            "delete": (f"delete_channel:{i % 7}", DeleteChannel(id=i % 7).pack()),
+            "check": ("check_subscription", "check_subscription"),
+        }[kind]
+        for target, data in ((legacy, old), (table, new)):
+            target.append(
+                CallbackQuery(id=str(i), from_user=user, chat_instance="b", data=data)
+            )
+    return legacy, table
+
+
+async def run(router: Router, events) -> float:
+    start = time.perf_counter()
+    for event in events:
+        await router.propagate_event("callback_query", event)
+    return time.perf_counter() - start
+
+
+async def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--events", type=int, default=200_000)
+    args = parser.parse_args()
+
+    legacy_events, table_events = workload(args.events)
+    print(f"{'mode':<8} {'events':>10} {'time, s':>9} {'us/event':>9}")
+    for name, router, events in (
+        ("legacy", legacy_router(), legacy_events),
+        ("table", table_router(), table_events),
+    ):
+        # Birinchi chaqiruvlarda aiogram/pydantic modellarini qurib oladi
+        await run(router, events[:1000])
+        elapsed = await run(router, events)
+        print(
+            f"{name:<8} {len(events):>10,} {elapsed:>9.2f} "
+            f"{elapsed / len(events) * 1e6:>9.2f}"
+        )
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
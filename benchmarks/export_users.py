@@ -0,0 +1,117 @@
+"""Foydalanuvchilar Excel eksporti: eski (pandas) va oqimli usulni solishtirish.
+
+Bazasiz, sintetik qatorlar bilan ishlaydi. Har bir holat alohida jarayonda
+bajariladi, shuning uchun maksimal RSS bir-biriga aralashmaydi.
+
+    python -m benchmarks.export_users --rows 100000 1000000
+"""
+
+import argparse
+import io
+import multiprocessing
+import resource
+import time
+from datetime import datetime, timedelta
+
+
+def synthetic_rows(count: int):
+    base = datetime(2024, 12, 1)
+    for i in range(count):
+        created = base + timedelta(seconds=i)
+        yield (
+            i + 1,
+            5_000_000_000 + i,
+            f"user_{i}",
+            f"Foydalanuvchi {i}",
+            f"99890{i % 10_000_000:07d}",
+            created,
+            created + timedelta(hours=1),
+            True,
+            i % 17 == 0,
+        )
+
+
+def legacy_export(count: int) -> int:
+    """admin.get_users_excel'ning oldingi algoritmi (dict -> DataFrame -> openpyxl)"""
+    import pandas as pd
+    from openpyxl.styles import Font, PatternFill
+
+    users_data = []
+    for row in synthetic_rows(count):
+        users_data.append(
+            {
+                "ID": row[0],
+                "Telegram ID": row[1],
+                "Username": row[2],
+                "To'liq ismi": row[3],
+                "Telefon raqami": row[4],
+                "Ro'yxatdan o'tgan vaqti": row[5],
+                "Oxirgi faolligi": row[6],
+                "Holati": "Faol" if row[7] else "Faol emas",
+                "Premium": "Ha" if row[8] else "Yo'q",
+            }
+        )
+    df = pd.DataFrame(users_data)
+    buffer = io.BytesIO()
+    with pd.ExcelWriter(buffer, engine="openpyxl") as writer:
+        df.to_excel(writer, sheet_name="Foydalanuvchilar", index=False)
+        worksheet = writer.sheets["Foydalanuvchilar"]
+        for idx, col in enumerate(df.columns):
+            max_length = max(df[col].astype(str).apply(len).max(), len(str(col))) + 2
+            worksheet.column_dimensions[
+                worksheet.cell(1, idx + 1).column_letter
+            ].width = max_length
+        for cell in worksheet[1]:
+            cell.font = Font(bold=True)
+            cell.fill = PatternFill(
+                start_color="CCE5FF", end_color="CCE5FF", fill_type="solid"
+            )
+    return len(buffer.getvalue())
+
+
+def streaming_export(count: int) -> int:
+    from utils.exports import write_users_xlsx
+
+    content, _ = write_users_xlsx(synthetic_rows(count))
+    return len(content)
+
+
+def _run(name: str, count: int, queue):
+    func = {"legacy": legacy_export, "streaming": streaming_export}[name]
+    start = time.perf_counter()
+    size = func(count)
+    elapsed = time.perf_counter() - start
+    peak_mb = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+    queue.put((elapsed, peak_mb, size))
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--rows", type=int, nargs="+", default=[100_000, 1_000_000])
+    parser.add_argument(
+        "--modes",
+        nargs="+",
+        default=["legacy", "streaming"],
+        choices=["legacy", "streaming"],
+    )
+    args = parser.parse_args()
+
+    ctx = multiprocessing.get_context("spawn")
+    print(
+        f"{'mode':<10} {'rows':>10} {'time, s':>9} {'peak RSS, MB':>13} {'file, MB':>9}"
+    )
+    for count in args.rows:
+        for mode in args.modes:
+            queue = ctx.Queue()
+            proc = ctx.Process(target=_run, args=(mode, count, queue))
+            proc.start()
+            elapsed, peak_mb, size = queue.get()
+            proc.join()
+            print(
+                f"{mode:<10} {count:>10,} {elapsed:>9.2f} {peak_mb:>13.1f} "
+                f"{size / 1024 / 1024:>9.1f}"
+            )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,95 @@
+"""Tezkor konvertatsiya tahlilchisining o'tkazuvchanligi.
+
+Korpus foydalanuvchilar yozadigan odatiy xabarlardan tuzilgan: mos
+keladiganlar ham, oddiy suhbat ham (ular ham tahlilchidan o'tadi).
+
+    python -m benchmarks.quick_parse --rounds 20000
+"""
+
+import argparse
+import time
+
+from utils.quick_convert import looks_like_price, parse_quick_query
+
+CORPUS = [
+    "100 usd",
+    "100$",
+    "$ 250",
+    "250 eur to uzs gbp",
+    "1.5k rub",
+    "1,5k rub",
+    "10 ming so'm",
+    "1 000 000 so'm",
+    "2 mln сум",
+    "5000 рублей",
+    "50 евро",
+    "100 dollar",
+    "500$ necha so'm?",
+    "1200 usd -> eur",
+    "300 gbp in usd",
+    "75.50 eur",
+    "salom",
+    "Assalomu alaykum",
+    "kurs qancha?",
+    "/start",
+    "rahmat bot zo'r ishlayapti",
+    "100",
+    "usd",
+    "qachon yangilanadi",
+    "12345",
+    "dollar kursi bugun qancha",
+    "100 usd 200",
+    "ok",
+]
+
+
+# Guruh suhbatidan namunalar: aksariyati narxga aloqasiz
+GROUP_CORPUS = [
+    "salom hammaga",
+    "ertaga soat 5 da uchrashamiz",
+    "kim boradi?",
+    "2-uy 14-xonadon",
+    "😂😂😂",
+    "ha, men ham",
+    "bugun 3 ta dars bor",
+    "rasmni tashlab yuboring",
+    "500$ necha so'm?",
+    "100 evro qancha bo'ladi",
+]
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--rounds", type=int, default=20_000)
+    args = parser.parse_args()
+
+    matched = sum(parse_quick_query(text) is not None for text in CORPUS)
+    total = len(CORPUS) * args.rounds
+
+    start = time.perf_counter()
+    for _ in range(args.rounds):
+        for text in CORPUS:
+            parse_quick_query(text)
+    elapsed = time.perf_counter() - start
+
+    print(f"corpus: {len(CORPUS)} messages, {matched} conversions")
+    print(
+        f"{total:,} parses in {elapsed:.2f} s: "
+        f"{total / elapsed:,.0f} msg/s, {elapsed / total * 1e6:.2f} us/msg"
+    )
+
+    passed = sum(looks_like_price(text) for text in GROUP_CORPUS)
+    total = len(GROUP_CORPUS) * args.rounds
+    start = time.perf_counter()
+    for _ in range(args.rounds):
+        for text in GROUP_CORPUS:
+            looks_like_price(text)
+    elapsed = time.perf_counter() - start
+    print(
+        f"group prefilter: {passed}/{len(GROUP_CORPUS)} pass, "
+        f"{elapsed / total * 1e6:.2f} us/msg"
+    )
+
+
+if __name__ == "__main__":
+    main()
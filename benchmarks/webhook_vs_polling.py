@@ -0,0 +1,239 @@
+"""Webhook va long polling: sekundiga qayta ishlangan update'lar soni.
+
+Soxta Telegram Bot API serveri alohida jarayonda ishga tushiriladi (bot
+bilan bitta CPU uchun raqobatlashmasligi uchun). Polling holatida bot
+getUpdates orqali update'larni oladi, webhook holatida soxta yuboruvchi
+ularni ``--connections`` ta parallel ulanish bilan WebhookServer'ga POST
+qiladi (Telegram'dagi max_connections kabi). Har bir update handler'da
+``message.answer`` bilan javob oladi, sendMessage ``--latency`` ms kutadi.
+
+    python -m benchmarks.webhook_vs_polling --updates 20000 --workers 32 128
+"""
+
+import argparse
+import asyncio
+import itertools
+import multiprocessing
+import time
+
+from aiohttp import ClientSession, web
+from aiogram import Bot, Dispatcher
+from aiogram.client.session.aiohttp import AiohttpSession
+from aiogram.client.telegram import TelegramAPIServer
+
+from data.config import WebhookConfig
+from middlewares.executor import UpdateExecutorMiddleware
+from utils.executor import UpdateExecutor
+from utils.webhook import SECRET_HEADER, WebhookServer
+
+TOKEN = "123456:bench"
+SECRET = "bench-secret"
+API_PORT = 18081
+WEBHOOK_PORT = 18080
+BOT_USER = {"id": 123456, "is_bot": True, "first_name": "bench", "username": "bench"}
+
+
+def make_update(update_id: int) -> dict:
+    user_id = 1000 + update_id % 500
+    return {
+        "update_id": update_id,
+        "message": {
+            "message_id": update_id,
+            "date": 0,
+            "chat": {"id": user_id, "type": "private"},
+            "from": {"id": user_id, "is_bot": False, "first_name": "u"},
+            "text": "100 usd",
+        },
+    }
+
+
+class FakeTelegram:
+    """getUpdates, sendMessage va webhook metodlariga javob beruvchi soxta API"""
+
+    def __init__(self, updates: list, latency: float, connections: int):
+        self.updates = updates
+        self.latency = latency
+        self.connections = connections
+        self.sent = 0
+        self._message_ids = itertools.count(1)
+        self._push_task = None
+
+    async def push(self, request: web.Request) -> web.Response:
+        """Webhook holati: update'larni yuborishni boshlash"""
+        self._push_task = asyncio.create_task(_send_all(self.updates, self.connections))
+        return web.json_response({"ok": True})
+
+    async def sent_count(self, request: web.Request) -> web.Response:
+        return web.json_response({"sent": self.sent})
+
+    async def handle(self, request: web.Request) -> web.Response:
+        method = request.match_info["method"].lower()
+        data = await request.post()
+        if method == "getme":
+            return web.json_response({"ok": True, "result": BOT_USER})
+        if method == "getupdates":
+            offset = int(data.get("offset") or 0)
+            limit = int(data.get("limit") or 100)
+            batch = self.updates[offset : offset + limit]
+            if not batch:
+                await asyncio.sleep(0.05)
+            return web.json_response({"ok": True, "result": batch})
+        if method == "sendmessage":
+            await asyncio.sleep(self.latency)
+            self.sent += 1
+            chat_id = int(data["chat_id"])
+            return web.json_response(
+                {
+                    "ok": True,
+                    "result": {
+                        "message_id": next(self._message_ids),
+                        "date": 0,
+                        "chat": {"id": chat_id, "type": "private"},
+                        "from": BOT_USER,
+                        "text": data.get("text", ""),
+                    },
+                }
+            )
+        return web.json_response({"ok": True, "result": True})
+
+
+def build_dispatcher(
+    total: int, done: asyncio.Event, executor: UpdateExecutor
+) -> Dispatcher:
+    dp = Dispatcher()
+    middleware = UpdateExecutorMiddleware()
+    middleware.executor = executor
+    dp.update.outer_middleware(middleware)
+    handled = 0
+
+    @dp.message()
+    async def answer(message):
+        nonlocal handled
+        await message.answer("ok")
+        handled += 1
+        if handled == total:
+            done.set()
+
+    return dp
+
+
+async def _send_all(updates: list, connections: int):
+    url = f"http://127.0.0.1:{WEBHOOK_PORT}/webhook"
+    queue = iter(updates)
+    async with ClientSession() as session:
+
+        async def sender():
+            for update in queue:
+                while True:
+                    async with session.post(
+                        url, json=update, headers={SECRET_HEADER: SECRET}
+                    ) as resp:
+                        if resp.status == 200:
+                            break
+                    # 503: navbat to'la, Telegram kabi biroz kutib qayta yuborish
+                    await asyncio.sleep(0.1)
+
+        await asyncio.gather(*(sender() for _ in range(connections)))
+
+
+def serve_fake_telegram(total: int, latency: float, connections: int, ready):
+    """Soxta Telegram API va yuboruvchi (alohida jarayonda)"""
+
+    async def serve():
+        # getUpdates offset'i update_id bilan mos bo'lishi uchun 0 dan boshlanadi
+        fake = FakeTelegram(
+            [make_update(i) for i in range(total)], latency, connections
+        )
+        app = web.Application()
+        app.router.add_post("/bot{token}/{method}", fake.handle)
+        app.router.add_post("/bench/push", fake.push)
+        app.router.add_get("/bench/sent", fake.sent_count)
+        runner = web.AppRunner(app, access_log=None)
+        await runner.setup()
+        await web.TCPSite(runner, "127.0.0.1", API_PORT).start()
+        ready.set()
+        await asyncio.Event().wait()
+
+    asyncio.run(serve())
+
+
+async def run_mode(mode: str, total: int, workers: int, args) -> float:
+    ctx = multiprocessing.get_context("spawn")
+    ready = ctx.Event()
+    proc = ctx.Process(
+        target=serve_fake_telegram,
+        args=(total, args.latency / 1000, args.connections, ready),
+        daemon=True,
+    )
+    proc.start()
+    ready.wait()
+
+    api_base = f"http://127.0.0.1:{API_PORT}"
+    session = AiohttpSession(api=TelegramAPIServer.from_base(api_base), limit=1000)
+    bot = Bot(token=TOKEN, session=session)
+    done = asyncio.Event()
+    # Polling holatida executor ishga tushirilmaydi: aiogram'ning odatiy
+    # "har bir update - alohida task" rejimi bilan solishtiriladi
+    executor = UpdateExecutor(workers=workers or 1, max_pending=args.queue_size)
+    dp = build_dispatcher(total, done, executor)
+
+    try:
+        if mode == "polling":
+            start = time.perf_counter()
+            task = asyncio.create_task(
+                dp.start_polling(bot, handle_signals=False, close_bot_session=False)
+            )
+            await done.wait()
+            elapsed = time.perf_counter() - start
+            await dp.stop_polling()
+            await task
+        else:
+            config = WebhookConfig(
+                mode="webhook", secret=SECRET, host="127.0.0.1", port=WEBHOOK_PORT
+            )
+            await executor.start()
+            server = WebhookServer(dp, bot, config, executor)
+            await server.start(set_webhook=False)
+            async with ClientSession() as client:
+                start = time.perf_counter()
+                await client.post(f"{api_base}/bench/push")
+                await done.wait()
+                elapsed = time.perf_counter() - start
+            await server.stop()
+            await executor.stop()
+
+        async with ClientSession() as client:
+            async with client.get(f"{api_base}/bench/sent") as resp:
+                sent = (await resp.json())["sent"]
+        assert sent == total, (sent, total)
+    finally:
+        await session.close()
+        proc.terminate()
+        proc.join()
+    return elapsed
+
+
+async def main_async(args):
+    print(f"{'mode':<20} {'updates':>8} {'time, s':>8} {'updates/s':>10}")
+    cases = [("polling", 0)] + [("webhook", w) for w in args.workers]
+    for mode, workers in cases:
+        elapsed = await run_mode(mode, args.updates, workers, args)
+        label = mode if mode == "polling" else f"webhook ({workers} w)"
+        print(
+            f"{label:<20} {args.updates:>8,} {elapsed:>8.2f} "
+            f"{args.updates / elapsed:>10,.0f}"
+        )
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--updates", type=int, default=10_000)
+    parser.add_argument("--workers", type=int, nargs="+", default=[8, 32, 128])
+    parser.add_argument("--connections", type=int, default=40)
+    parser.add_argument("--queue-size", type=int, default=1000)
+    parser.add_argument("--latency", type=float, default=20.0, help="sendMessage, ms")
+    asyncio.run(main_async(parser.parse_args()))
+
+
+if __name__ == "__main__":
+    main()
@@ -1,5 +1,5 @@
 # data.config
-from dataclasses import dataclass
+from dataclasses import dataclass, field
 import os
 from dotenv import load_dotenv
 
@@ -24,10 +24,66 @@ class TgBot:
     use_redis: bool = False
 
 
+@dataclass
+class WebhookConfig:
+    # "polling" yoki "webhook"
+    mode: str = "polling"
+    # Telegram yuboradigan tashqi manzil, masalan https://bot.example.com
+    base_url: str = ""
+    path: str = "/webhook"
+    secret: str = ""
+    host: str = "0.0.0.0"
+    port: int = 8080
+    # Telegram bir vaqtda ochadigan ulanishlar soni (1..100)
+    max_connections: int = 40
+
+    @property
+    def enabled(self) -> bool:
+        return self.mode == "webhook"
+
+    @property
+    def url(self) -> str:
+        return self.base_url.rstrip("/") + self.path
+
+
+@dataclass
+class ExecutorConfig:
+    # Update'larni parallel bajaradigan worker'lar soni
+    workers: int = 32
+    # Kutilayotgan update'lar chegarasi: oshsa polling to'xtab turadi,
+    # webhook esa 503 qaytaradi
+    max_pending: int = 1000
+    # Bitta chatda navbatda turgan update'lar chegarasi (oshgani tashlanadi)
+    max_per_chat: int = 50
+    # Admin ishlari (eksport, xabar yuborish) uchun worker'lar
+    admin_concurrency: int = 2
+
+
+@dataclass
+class FsmConfig:
+    # USE_REDIS=true bo'lganda ishlatiladi
+    redis_url: str = "redis://localhost:6379/0"
+    # Tashlab ketilgan suhbat holati shuncha soniyadan keyin o'chadi
+    state_ttl: int = 3600
+    # Faqat xotiradagi storage uchun
+    max_entries: int = 100_000
+
+
+@dataclass
+class RatesConfig:
+    # Bir xostdagi jarayonlar kurslarni shu shared memory segmentidan
+    # o'qiydi; bo'sh bo'lsa o'chirilgan
+    shm_name: str = "valyuta_rates"
+
+
 @dataclass
 class Config:
     bot: TgBot
     db: DbConfig
+    webhook: WebhookConfig = field(default_factory=WebhookConfig)
+    executor: ExecutorConfig = field(default_factory=ExecutorConfig)
+    fsm: FsmConfig = field(default_factory=FsmConfig)
+    rates: RatesConfig = field(default_factory=RatesConfig)
 
 
 def load_config() -> Config:
@@ -63,4 +119,25 @@ def load_config() -> Config:
             port=int(db_port),
             sqlalchemy_database_url=sqlalchemy_database_url,  # Include this in the DbConfig
         ),
+        webhook=WebhookConfig(
+            mode=os.getenv("BOT_MODE", "polling").lower(),
+            base_url=os.getenv("WEBHOOK_URL", ""),
+            path=os.getenv("WEBHOOK_PATH", "/webhook"),
+            secret=os.getenv("WEBHOOK_SECRET", ""),
+            host=os.getenv("WEBAPP_HOST", "0.0.0.0"),
+            port=int(os.getenv("WEBAPP_PORT", "8080")),
+            max_connections=int(os.getenv("WEBHOOK_MAX_CONNECTIONS", "40")),
+        ),
+        executor=ExecutorConfig(
+            workers=int(os.getenv("EXECUTOR_WORKERS", "32")),
+            max_pending=int(os.getenv("EXECUTOR_MAX_PENDING", "1000")),
+            max_per_chat=int(os.getenv("EXECUTOR_MAX_PER_CHAT", "50")),
+            admin_concurrency=int(os.getenv("EXECUTOR_ADMIN_CONCURRENCY", "2")),
+        ),
+        fsm=FsmConfig(
+            redis_url=os.getenv("REDIS_URL", "redis://localhost:6379/0"),
+            state_ttl=int(os.getenv("FSM_STATE_TTL", "3600")),
+            max_entries=int(os.getenv("FSM_MAX_ENTRIES", "100000")),
+        ),
+        rates=RatesConfig(shm_name=os.getenv("RATES_SHM_NAME", "valyuta_rates")),
     )
@@ -0,0 +1,35 @@
+# filters/quick_convert.py
+from typing import Union
+from aiogram.filters import BaseFilter
+from aiogram.types import Message
+from utils.quick_convert import looks_like_price, parse_quick_query
+
+
+class QuickConvertFilter(BaseFilter):
+    """ "100 usd" kabi xabarlarni tanib, tahlil natijasini handler'ga uzatadi.
+
+    Matn bir marta tahlil qilinadi: natija ``query`` argumenti sifatida beriladi.
+    """
+
+    async def __call__(self, message: Message) -> Union[bool, dict]:
+        query = parse_quick_query(message.text)
+        if query is None:
+            return False
+        return {"query": query}
+
+
+class GroupPriceFilter(BaseFilter):
+    """Guruhdagi "500$ necha so'm?" kabi xabarlar.
+
+    Guruh xabarlarining aksariyati konvertatsiyaga aloqasiz, shuning uchun
+    avval ``looks_like_price`` (kompilyatsiya qilingan regex) tekshiriladi,
+    tahlil faqat undan o'tgan xabarlar uchun bajariladi.
+    """
+
+    async def __call__(self, message: Message) -> Union[bool, dict]:
+        if not looks_like_price(message.text):
+            return False
+        query = parse_quick_query(message.text)
+        if query is None:
+            return False
+        return {"query": query}
@@ -23,7 +23,8 @@ async def errors_handler(update: Update, exception: Exception) -> bool:
 
     if isinstance(exception, TelegramBadRequest):
         if "message is not modified" in str(exception):
-            logging.exception("Message is not modified")
+            # Zararsiz holat: traceback kerak emas
+            logging.debug("Message is not modified")
             return True
         if "message can't be deleted" in str(exception):
             logging.exception("Message cant be deleted")
@@ -1,12 +1,12 @@
 # handlers/users/admin/admin.py
-import os
+import logging
 from datetime import datetime
 from aiogram.filters import Command
-from aiogram.types import FSInputFile
+from aiogram.types import BufferedInputFile
 from keyboards.default.admin_kb import admin_keyboard, channels_button
 from utils.database.db import DataBase
-import pandas as pd
-from openpyxl.styles import Font, PatternFill
+from utils.premium import premium_service
+from utils.exports import export_users
 from aiogram.fsm.context import FSMContext
 from aiogram.fsm.state import State, StatesGroup
 from data.config import load_config
@@ -14,8 +14,13 @@ from aiogram import Router, F
 from aiogram.types import Message, CallbackQuery
 from filters.admin import AdminFilter
 from keyboards.inline.channel_actions import get_delete_channel_keyboard
+from keyboards.inline.callback_data import DeleteChannel
+from handlers.users.main.callbacks import callbacks
+from utils.misc.render_cache import render_cache
 
 
+logger = logging.getLogger(__name__)
+
 admins: list[int] = load_config().bot.admin_ids
 
 router = Router()
@@ -101,10 +106,10 @@ async def delete_channel(message: Message):
     )
 
 
-@router.callback_query(F.data.startswith("delete_channel:"))
-async def process_delete_channel(callback: CallbackQuery):
+@callbacks.register(DeleteChannel, admin_only=True, aliases=("delete_channel",))
+async def process_delete_channel(callback: CallbackQuery, callback_data: DeleteChannel):
     """Tanlangan kanalni bazadan o‘chirish."""
-    subscription_id = int(callback.data.split(":")[1])
+    subscription_id = callback_data.id
 
     try:
         await db.delete_subscription(subscription_id)  # ✅ Asinxron bazadan o‘chirish
@@ -115,32 +120,35 @@ async def process_delete_channel(callback: CallbackQuery):
     # Yangilangan ro‘yxatni qayta chiqarish
     new_keyboard = await get_delete_channel_keyboard()
     if new_keyboard:
-        await callback.message.edit_text(
-            "🗑 O'chirmoqchi bo'lgan kanalingizni tanlang:", reply_markup=new_keyboard
+        await render_cache.edit_text(
+            callback.message,
+            "🗑 O'chirmoqchi bo'lgan kanalingizni tanlang:",
+            reply_markup=new_keyboard,
         )
     else:
-        await callback.message.edit_text("✅ Barcha kanallar o‘chirildi!")
+        await render_cache.edit_text(callback.message, "✅ Barcha kanallar o‘chirildi!")
 
 
 @router.message(AdminFilter(), F.text == "📊 Statistika")
 async def show_statistics(message: Message):
     try:
-        # Asosiy statistikalar
-        total_users = await db.count_users()
-        today_users = await db.count_users_by_date(datetime.now().date())
+        # Asosiy statistikalar va so'nggi 7 kun (bitta so'rov)
+        daily_stats = await db.get_daily_stats(datetime.now().date(), days=7)
+        total_users = daily_stats["total_users"]
+        today_users = daily_stats["daily"][0][1] if daily_stats["daily"] else 0
 
         # So'nggi 7 kunlik statistika
-        weekly_stats = []
-        for i in range(7):
-            date = datetime.now().date() - pd.Timedelta(days=i)
-            count = await db.count_users_by_date(date)
-            if count > 0:
-                weekly_stats.append(f"📅 {date.strftime('%d.%m.%Y')}: +{count}")
+        weekly_stats = [
+            f"📅 {date.strftime('%d.%m.%Y')}: +{count}"
+            for date, count in daily_stats["daily"]
+            if count > 0
+        ]
 
         stats = [
             "📊 Bot statistikasi\n",
             f"👥 Jami foydalanuvchilar: {total_users:,} ta",
-            f"📅 Bugun qo'shilganlar: {today_users} ta\n",
+            f"📅 Bugun qo'shilganlar: {today_users} ta",
+            f"💎 Premium foydalanuvchilar: {premium_service.active_count():,} ta\n",
             "📈 So'nggi 7 kunlik statistika:",
             *weekly_stats,
         ]
@@ -152,97 +160,86 @@ async def show_statistics(message: Message):
         await message.answer("❌ Statistikani olishda xatolik yuz berdi")
 
 
-@router.message(AdminFilter(), F.text == "📥 Users Excel")
-async def get_users_excel(message: Message):
-    await message.answer("📊 Excel fayl tayyorlanmoqda...")
+# Delta eksport chegarasi shu nom bilan saqlanadi
+DELTA_EXPORT_NAME = "users_delta"
 
-    try:
-        users = await db.get_all_users()
-        if not users:
-            await message.answer("❌ Foydalanuvchilar topilmadi")
-            return
-
-        # Ma'lumotlarni list of dict ko'rinishiga o'tkazamiz
-        users_data = []
-        for user in users:
-            try:
-                users_data.append(
-                    {
-                        "ID": user["id"] if "id" in user else "",
-                        "Telegram ID": user["user_id"] if "user_id" in user else "",
-                        "Username": user["username"] if "username" in user else "",
-                        "To'liq ismi": user["full_name"] if "full_name" in user else "",
-                        "Telefon raqami": (
-                            user["phone_number"] if "phone_number" in user else ""
-                        ),
-                        "Ro'yxatdan o'tgan vaqti": (
-                            user["created_at"] if "created_at" in user else ""
-                        ),
-                        "Oxirgi faolligi": (
-                            user["last_active_at"] if "last_active_at" in user else ""
-                        ),
-                        "Holati": (
-                            "Faol" if user.get("is_active", False) else "Faol emas"
-                        ),
-                        "Premium": "Ha" if user.get("is_premium", False) else "Yo'q",
-                    }
-                )
-            except Exception as e:
-                print(f"Error processing user data: {e}")
-                continue
-
-        df = pd.DataFrame(users_data)
-
-        # Excel fayl nomi
-        filename = f"users_{datetime.now().strftime('%Y-%m-%d_%H-%M')}.xlsx"
-        filepath = f"data/files/{filename}"
-
-        # Excel faylni yaratish
-        with pd.ExcelWriter(filepath, engine="openpyxl") as writer:
-            df.to_excel(writer, sheet_name="Foydalanuvchilar", index=False)
-
-            workbook = writer.book
-            worksheet = writer.sheets["Foydalanuvchilar"]
-
-            # Ustun kengliklarini moslash
-            for idx, col in enumerate(df.columns):
-                max_length = (
-                    max(df[col].astype(str).apply(len).max(), len(str(col))) + 2
-                )
-                worksheet.column_dimensions[
-                    worksheet.cell(1, idx + 1).column_letter
-                ].width = max_length
-
-            # Sarlavhalarni formatlash
-            for cell in worksheet[1]:
-                cell.font = Font(bold=True)
-                cell.fill = PatternFill(
-                    start_color="CCE5FF", end_color="CCE5FF", fill_type="solid"
-                )
-
-        # Faylni yuborish
-        if os.path.exists(filepath):
-            excel_file = FSInputFile(filepath)
+
+async def send_users_export(message: Message, fmt: str, delta: bool = False):
+    """Eksportni alohida jarayonda tayyorlab, fayl(lar)ni yuborish"""
+    since = await db.get_export_watermark(DELTA_EXPORT_NAME) if delta else None
+    result = await export_users(fmt, delta=delta, since=since)
+    if not result.total:
+        await message.answer(
+            "✅ Oxirgi eksportdan beri o'zgarish yo'q"
+            if delta
+            else "❌ Foydalanuvchilar topilmadi"
+        )
+    else:
+        for index, (filename, content) in enumerate(result.files, start=1):
+            part_info = (
+                f"\n📂 Qism: {index}/{len(result.files)}"
+                if len(result.files) > 1
+                else ""
+            )
             await message.answer_document(
-                document=excel_file,
+                document=BufferedInputFile(content, filename=filename),
                 caption=(
                     f"📊 Bot foydalanuvchilari ro'yxati:\n"
                     f"📅 Sana: {datetime.now().strftime('%d.%m.%Y %H:%M')}\n"
-                    f"👥 Jami: {len(users):,} ta foydalanuvchi"
+                    f"👥 Jami: {result.total:,} ta foydalanuvchi{part_info}"
                 ),
             )
-            try:
-                os.remove(filepath)
-            except FileNotFoundError:
-                pass
-        else:
-            raise FileNotFoundError(f"Excel file not found at {filepath}")
 
+    # Chegara faqat fayllar yuborilgandan keyin suriladi
+    if delta and result.watermark:
+        await db.set_export_watermark(DELTA_EXPORT_NAME, result.watermark)
+
+
+@router.message(AdminFilter(), F.text == "📥 Users Excel")
+async def get_users_excel(message: Message):
+    await message.answer("📊 Excel fayl tayyorlanmoqda...")
+
+    try:
+        # Fayl alohida jarayonda, server-side cursor orqali xotirada yaratiladi
+        await send_users_export(message, "xlsx")
     except Exception as e:
         print(f"Error creating Excel file: {e}")
         await message.answer("❌ Excel fayl yaratishda xatolik yuz berdi")
 
 
+@router.message(AdminFilter(), F.text == "📦 Users CSV")
+async def get_users_csv(message: Message):
+    await message.answer("📦 CSV (gzip) fayl tayyorlanmoqda...")
+
+    try:
+        await send_users_export(message, "csv")
+    except Exception as e:
+        logger.exception(f"CSV eksportda xato: {e}")
+        await message.answer("❌ CSV fayl yaratishda xatolik yuz berdi")
+
+
+@router.message(AdminFilter(), F.text == "🗂 Users Parquet")
+async def get_users_parquet(message: Message):
+    await message.answer("🗂 Parquet fayl tayyorlanmoqda...")
+
+    try:
+        await send_users_export(message, "parquet")
+    except Exception as e:
+        logger.exception(f"Parquet eksportda xato: {e}")
+        await message.answer("❌ Parquet fayl yaratishda xatolik yuz berdi")
+
+
+@router.message(AdminFilter(), F.text == "🔁 Yangilanganlar")
+async def get_users_delta(message: Message):
+    await message.answer("🔁 Oxirgi eksportdan beri o'zgarganlar tayyorlanmoqda...")
+
+    try:
+        await send_users_export(message, "csv", delta=True)
+    except Exception as e:
+        logger.exception(f"Delta eksportda xato: {e}")
+        await message.answer("❌ Delta eksportda xatolik yuz berdi")
+
+
 # 📌 📋 Kanallar ro‘yxati
 @router.message(AdminFilter(), F.text == "📋 Kanallar ro'yxati")
 async def get_channels(message: Message):
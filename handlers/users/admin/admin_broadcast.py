@@ -73,7 +73,7 @@ async def process_broadcast(message: Message, state: FSMContext):
             builder.add(
                 InlineKeyboardButton(
                     text=f"❌ {channel['name']}",
-                    callback_data=f"delete_channel:{channel['id']}",
+                    callback_data=DeleteChannel(id=channel["id"]).pack(),
                 )
             )
 
@@ -83,6 +83,7 @@ async def process_broadcast(message: Message, state: FSMContext):
 
 from aiogram.types import InlineKeyboardMarkup, InlineKeyboardButton
 from utils.database.db import DataBase
+from keyboards.inline.callback_data import DeleteChannel
 
 db = DataBase()
 
@@ -97,7 +98,7 @@ async def get_delete_channel_keyboard():
     inline_buttons = [
         InlineKeyboardButton(
             text=f"❌ {channel['name']}",
-            callback_data=f"delete_channel:{channel['id']}",
+            callback_data=DeleteChannel(id=channel["id"]).pack(),
         )
         for channel in channels
     ]
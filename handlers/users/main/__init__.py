@@ -1,6 +1,16 @@
 # handlers/users/main/__init__.py
 from .start import router as start_router
+from .membership import router as membership_router
+from .callbacks import router as callbacks_router
+from .inline import router as inline_router
+from .group import router as group_router
+from .digest import router as digest_router
 
-# from .callbacks import router as callbacks_router  # Hozircha commentga olib turamiz
-
-__all__ = ["start_router"]
+__all__ = [
+    "start_router",
+    "membership_router",
+    "callbacks_router",
+    "inline_router",
+    "group_router",
+    "digest_router",
+]
@@ -0,0 +1,111 @@
+# handlers.users.main.callbacks
+import logging
+from dataclasses import dataclass
+from typing import Any, Callable, Dict, Iterable, Optional, Tuple, Type
+from aiogram import Router
+from aiogram.dispatcher.event.bases import SkipHandler
+from aiogram.dispatcher.event.handler import CallableObject
+from aiogram.filters.callback_data import CallbackData
+from aiogram.types import CallbackQuery
+from data.config import load_config
+
+logger = logging.getLogger(__name__)
+
+router = Router()
+
+# aiogram CallbackData'ning standart ajratuvchisi
+SEPARATOR = ":"
+# Eski tugmalar qiymatni prefiksga "_" bilan qo'shgan (select_USD, toggle_EUR)
+LEGACY_SEPARATOR = "_"
+
+
+@dataclass(frozen=True)
+class CallbackRoute:
+    callback_data: Type[CallbackData]
+    handler: CallableObject
+    admin_only: bool = False
+
+
+class CallbackTable:
+    """callback_data prefiksi -> handler jadvali.
+
+    Magic filter'lar zanjiri o'rniga bitta lug'at qidiruvi: prefiks
+    ajratiladi, mos handler topiladi va payload faqat bir marta ``unpack``
+    qilinadi. Handler'ga tayyor ``callback_data`` obyekti uzatiladi, qolgan
+    argumentlar (state, bot ...) aiogram'dagidek imzo bo'yicha beriladi.
+    """
+
+    def __init__(self, admin_ids: Optional[Iterable[int]] = None):
+        self._routes: Dict[str, CallbackRoute] = {}
+        if admin_ids is None:
+            admin_ids = load_config().bot.admin_ids
+        self.admin_ids = frozenset(admin_ids)
+
+    def register(
+        self,
+        callback_data: Type[CallbackData],
+        admin_only: bool = False,
+        aliases: Iterable[str] = (),
+    ) -> Callable:
+        """Handler'ni prefiks (va eski callback nomlari) bo'yicha ulash.
+
+        Alias maydonsiz nom (``calculate``), eski prefiks (``delete_channel:5``)
+        yoki "_" bilan tugagan eski nom (``select_`` -> ``select_USD``) bo'lishi
+        mumkin; eski qiymat joriy prefiks bilan ``unpack`` qilinadi.
+        """
+
+        def decorator(func: Callable) -> Callable:
+            route = CallbackRoute(callback_data, CallableObject(func), admin_only)
+            for key in (callback_data.__prefix__, *aliases):
+                if key in self._routes:
+                    raise ValueError(f"Callback prefiksi takrorlangan: {key}")
+                self._routes[key] = route
+            return func
+
+        return decorator
+
+    def _resolve(self, raw: str) -> Tuple[Optional[CallbackRoute], Optional[str]]:
+        """(route, unpack qilinadigan satr); maydonsiz alias uchun satr None"""
+        prefix, sep, value = raw.partition(SEPARATOR)
+        route = self._routes.get(prefix)
+        if route is None:
+            prefix, sep, value = raw.partition(LEGACY_SEPARATOR)
+            route = self._routes.get(prefix + LEGACY_SEPARATOR) if sep else None
+        if route is None or not sep:
+            return route, None
+        return route, f"{route.callback_data.__prefix__}{SEPARATOR}{value}"
+
+    async def dispatch(self, callback: CallbackQuery, **data: Any) -> Any:
+        raw = callback.data or ""
+        route, packed = self._resolve(raw)
+        if route is None:
+            # Jadvalda yo'q - boshqa routerlardagi handler'larga o'tadi
+            raise SkipHandler()
+        if route.admin_only and callback.from_user.id not in self.admin_ids:
+            raise SkipHandler()
+
+        try:
+            payload = (
+                route.callback_data.unpack(packed)
+                if packed is not None
+                else route.callback_data()
+            )
+        except (TypeError, ValueError) as e:
+            logger.warning(f"Noto'g'ri callback_data {raw!r}: {e}")
+            await callback.answer("❌ Eskirgan tugma", show_alert=True)
+            return
+
+        return await route.handler.call(callback, callback_data=payload, **data)
+
+    def is_admin_only(self, data: Optional[str]) -> bool:
+        """Callback admin handler'iga boradimi (executor navbatini tanlash uchun)"""
+        route, _ = self._resolve(data or "")
+        return route is not None and route.admin_only
+
+    def __len__(self) -> int:
+        return len(self._routes)
+
+
+# Global instance
+callbacks = CallbackTable()
+router.callback_query.register(callbacks.dispatch)
@@ -1,4 +1,4 @@
-from aiogram import Router, F
+from aiogram import F, Router
 from aiogram.types import CallbackQuery, Message
 from aiogram.fsm.context import FSMContext
 from aiogram.fsm.state import State, StatesGroup
@@ -9,10 +9,22 @@ from keyboards.inline.currency_kb import (
     create_currency_keyboard,
     create_convert_keyboard,
     create_result_keyboard,
+    currency_page,
     get_currency_emoji,
     SUPPORTED_CURRENCIES,
 )
+from keyboards.inline.callback_data import (
+    Calculate,
+    PickerPage,
+    ResetConversion,
+    SelectCurrency,
+    ToggleCurrency,
+)
+from handlers.users.main.callbacks import callbacks
+from filters.quick_convert import QuickConvertFilter
 from utils.currency_api import currency_api
+from utils.quick_convert import QuickQuery, format_amount, render_quick_conversion
+from utils.misc.render_cache import render_cache
 import logging
 
 logger = logging.getLogger(__name__)
@@ -36,11 +48,7 @@ def validate_currency(currency: str) -> bool:
 async def format_converted_amount(amount: float) -> str:
     """Konvertatsiya natijasini formatlash"""
     try:
-        if amount is None:
-            return "0"
-        if abs(amount) < 0.0001:
-            return "{:.8f}".format(amount).rstrip("0").rstrip(".")
-        return "{:,.4f}".format(amount).rstrip("0").rstrip(".")
+        return format_amount(amount)
     except Exception as e:
         logger.error(f"Formatlashda xatolik: {e}")
         return str(amount)
@@ -96,10 +104,12 @@ async def process_conversion(
         return f"❌ {to_currency}: Texnik xatolik yuz berdi", "error", datetime.now()
 
 
-@router.callback_query(F.data.startswith("select_"))
-async def select_base_currency(callback: CallbackQuery, state: FSMContext):
+@callbacks.register(SelectCurrency, aliases=("select_",))
+async def select_base_currency(
+    callback: CallbackQuery, callback_data: SelectCurrency, state: FSMContext
+):
     try:
-        currency = callback.data.split("_")[1]
+        currency = callback_data.code
 
         if not validate_currency(currency):
             raise ValueError(f"Noto'g'ri valyuta kodi: {currency}")
@@ -107,7 +117,8 @@ async def select_base_currency(callback: CallbackQuery, state: FSMContext):
         emoji = get_currency_emoji(currency)
         await state.update_data(from_currency=currency, selected_currencies=[])
 
-        await callback.message.edit_text(
+        await render_cache.edit_text(
+            callback.message,
             f"{emoji} {currency} tanlandi.\n"
             f"Qaysi valyutalarga konvertatsiya qilmoqchisiz?\n"
             f"Bir nechta valyutani tanlashingiz mumkin ✅",
@@ -116,17 +127,20 @@ async def select_base_currency(callback: CallbackQuery, state: FSMContext):
         await state.set_state(ConvertStates.waiting_currencies)
     except Exception as e:
         logger.error(f"Valyuta tanlashda xato: {e}")
-        await callback.message.edit_text(
+        await render_cache.edit_text(
+            callback.message,
             "❌ Xatolik yuz berdi. Qaytadan urinib ko'ring:",
             reply_markup=create_currency_keyboard(),
         )
         await state.clear()
 
 
-@router.callback_query(F.data.startswith("toggle_"))
-async def toggle_currency(callback: CallbackQuery, state: FSMContext):
+@callbacks.register(ToggleCurrency, aliases=("toggle_",))
+async def toggle_currency(
+    callback: CallbackQuery, callback_data: ToggleCurrency, state: FSMContext
+):
     try:
-        currency = callback.data.split("_")[1]
+        currency = callback_data.code
         if not validate_currency(currency):
             raise ValueError(f"Noto'g'ri valyuta kodi: {currency}")
 
@@ -155,8 +169,12 @@ async def toggle_currency(callback: CallbackQuery, state: FSMContext):
             f"Tanlangan valyutalar: {len(selected)} ta\n"
             f"Qaysi valyutalarga konvertatsiya qilmoqchisiz?"
         )
-        await callback.message.edit_text(
-            text, reply_markup=create_convert_keyboard(from_currency, selected)
+        await render_cache.edit_text(
+            callback.message,
+            text,
+            reply_markup=create_convert_keyboard(
+                from_currency, selected, page=currency_page(from_currency, currency)
+            ),
         )
     except Exception as e:
         logger.error(f"Valyutani tanlash/bekor qilishda xato: {e}")
@@ -164,7 +182,31 @@ async def toggle_currency(callback: CallbackQuery, state: FSMContext):
         await state.clear()
 
 
-@router.callback_query(F.data == "calculate")
+@callbacks.register(PickerPage)
+async def change_picker_page(
+    callback: CallbackQuery, callback_data: PickerPage, state: FSMContext
+):
+    """Valyutalar ro'yxatining boshqa sahifasini ko'rsatish"""
+    try:
+        if not callback_data.base:
+            markup = create_currency_keyboard(callback_data.page)
+        else:
+            data = await state.get_data()
+            if data.get("from_currency") != callback_data.base:
+                raise ValueError("Asosiy valyuta topilmadi")
+            markup = create_convert_keyboard(
+                callback_data.base,
+                data.get("selected_currencies", []),
+                page=callback_data.page,
+            )
+        await render_cache.edit_reply_markup(callback.message, markup)
+        await callback.answer()
+    except Exception as e:
+        logger.error(f"Sahifani almashtirishda xato: {e}")
+        await callback.answer("❌ Xatolik yuz berdi", show_alert=True)
+
+
+@callbacks.register(Calculate, aliases=("calculate",))
 async def request_amount(callback: CallbackQuery, state: FSMContext):
     try:
         data = await state.get_data()
@@ -184,7 +226,7 @@ async def request_amount(callback: CallbackQuery, state: FSMContext):
             f"Tanlangan valyutalar: {len(selected)} ta\n\n"
             f"✍️ Summani kiriting:"
         )
-        await callback.message.edit_text(text)
+        await render_cache.edit_text(callback.message, text)
         await state.set_state(ConvertStates.waiting_amount)
     except Exception as e:
         logger.error(f"Hisoblash so'rovida xato: {e}")
@@ -255,14 +297,37 @@ async def process_amount(message: Message, state: FSMContext):
         await state.clear()
 
 
-@router.callback_query(F.data == "reset")
+# Eski xabarlardagi "reset" va "back_to_main" tugmalari ham shu yerga keladi
+@callbacks.register(ResetConversion, aliases=("reset", "back_to_main"))
 async def reset_conversion(callback: CallbackQuery, state: FSMContext):
     try:
         await state.clear()
-        await callback.message.edit_text(
-            "💱 Valyutani tanlang:", reply_markup=create_currency_keyboard()
+        await render_cache.edit_text(
+            callback.message,
+            "💱 Quyidagi valyutalardan birini tanlang:\n\n"
+            "ℹ️ Tanlangan valyutadan boshqa valyutalarga konvertatsiya qilish mumkin.\n"
+            "✅ Bir vaqtning o'zida bir nechta valyutaga konvertatsiya qilish imkoniyati mavjud.",
+            reply_markup=create_currency_keyboard(),
         )
     except Exception as e:
         logger.error(f"Qayta boshlashda xato: {e}")
         await callback.answer("❌ Xatolik yuz berdi", show_alert=True)
         await state.clear()
+
+
+# FSM holatidagi summa kiritish (process_amount) bundan oldin tekshiriladi
+@router.message(F.chat.type == "private", F.text, QuickConvertFilter())
+async def quick_conversion(message: Message, query: QuickQuery):
+    """ "100 usd", "250 eur to uzs gbp" - bitta xabarda konvertatsiya"""
+    try:
+        snapshot = await currency_api.get_snapshot()
+        await message.answer(
+            render_quick_conversion(query, snapshot),
+            reply_markup=create_result_keyboard(),
+        )
+    except Exception as e:
+        logger.error(f"Tezkor konvertatsiyada xatolik: {e}")
+        await message.answer(
+            "❌ Konvertatsiya qilishda xatolik yuz berdi.\n"
+            "Iltimos, qaytadan urinib ko'ring."
+        )
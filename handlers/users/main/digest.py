@@ -0,0 +1,132 @@
+# handlers.users.main.digest
+import re
+from typing import Optional
+from aiogram import Router
+from aiogram.filters import Command, CommandObject
+from aiogram.types import Message
+from utils.database.db import DataBase
+from utils.digest import (
+    DEFAULT_DIGEST_CURRENCIES,
+    DEFAULT_DIGEST_MINUTE,
+    DEFAULT_UTC_OFFSET,
+    DIGEST_CURRENCIES,
+    canonical_currencies,
+    normalize_locale,
+)
+
+router = Router()
+db = DataBase()
+
+_TIME_RE = re.compile(r"^([01]?\d|2[0-3])[:.]([0-5]\d)$")
+_OFFSET_RE = re.compile(r"^(?:utc|gmt)?([+-])(\d{1,2})(?::?([0-5]\d))?$", re.IGNORECASE)
+
+USAGE_TEXT = (
+    "Sozlash:\n"
+    "• /digest 08:15 — yuborish vaqti\n"
+    "• /digest USD EUR — valyutalar\n"
+    "• /digest UTC+3 — vaqt zonasi (standart UTC+5, Toshkent)\n"
+    "• /digest off — o'chirish, /digest on — yoqish\n\n"
+    "Bir nechtasini birga yozish mumkin: /digest 08:15 USD RUB"
+)
+
+
+def _format_offset(offset: int) -> str:
+    sign = "+" if offset >= 0 else "-"
+    return f"UTC{sign}{abs(offset) // 60:02d}:{abs(offset) % 60:02d}"
+
+
+def _parse_offset(token: str) -> Optional[int]:
+    match = _OFFSET_RE.match(token)
+    if not match:
+        return None
+    sign, hours, minutes = match.groups()
+    offset = int(hours) * 60 + int(minutes or 0)
+    offset = -offset if sign == "-" else offset
+    return offset if -720 <= offset <= 840 else None
+
+
+def _settings_text(
+    enabled: bool, local_minute: int, utc_offset: int, currencies
+) -> str:
+    return (
+        f"📬 Kunlik kurslar xabari: {'yoqilgan ✅' if enabled else 'o‘chirilgan ❌'}\n"
+        f"🕐 Vaqt: {local_minute // 60:02d}:{local_minute % 60:02d} "
+        f"({_format_offset(utc_offset)})\n"
+        f"💱 Valyutalar: {', '.join(currencies)}\n\n" + USAGE_TEXT
+    )
+
+
+@router.message(Command("digest"))
+async def digest_command(message: Message, command: CommandObject):
+    user_id = message.from_user.id
+    try:
+        row = await db.get_digest_preferences(user_id)
+    except Exception:
+        await message.answer(
+            "❌ Sozlamalarni olishda xatolik. Keyinroq urinib ko'ring."
+        )
+        return
+
+    if row is not None:
+        enabled, local_minute, utc_offset = (
+            row["enabled"],
+            row["local_minute"],
+            row["utc_offset"],
+        )
+        currencies = canonical_currencies(row["currencies"])
+    else:
+        enabled, local_minute, utc_offset = (
+            True,
+            DEFAULT_DIGEST_MINUTE,
+            DEFAULT_UTC_OFFSET,
+        )
+        currencies = DEFAULT_DIGEST_CURRENCIES
+
+    tokens = (command.args or "").split()
+    if not tokens:
+        await message.answer(
+            _settings_text(enabled, local_minute, utc_offset, currencies)
+        )
+        return
+
+    selected = []
+    for token in tokens:
+        time_match = _TIME_RE.match(token)
+        offset = _parse_offset(token)
+        if token.lower() in ("off", "stop", "ochir", "o'chir"):
+            enabled = False
+        elif token.lower() in ("on", "start", "yoq"):
+            enabled = True
+        elif time_match:
+            local_minute = int(time_match.group(1)) * 60 + int(time_match.group(2))
+            enabled = True
+        elif offset is not None:
+            utc_offset = offset
+        elif token.upper() in DIGEST_CURRENCIES:
+            selected.append(token.upper())
+            enabled = True
+        else:
+            await message.answer(f"❌ Tushunarsiz qiymat: {token}\n\n" + USAGE_TEXT)
+            return
+    if selected:
+        currencies = canonical_currencies(selected)
+
+    try:
+        await db.save_digest_preferences(
+            user_id,
+            enabled=enabled,
+            local_minute=local_minute,
+            utc_offset=utc_offset,
+            currencies=list(currencies),
+            locale=normalize_locale(message.from_user.language_code),
+        )
+    except Exception:
+        await message.answer(
+            "❌ Sozlamalarni saqlashda xatolik. Keyinroq urinib ko'ring."
+        )
+        return
+
+    await message.answer(
+        "✅ Saqlandi!\n\n"
+        + _settings_text(enabled, local_minute, utc_offset, currencies)
+    )
@@ -0,0 +1,71 @@
+# handlers.users.main.group
+import logging
+import time
+from collections import OrderedDict
+from aiogram import F, Router
+from aiogram.types import Message
+
+from filters.quick_convert import GroupPriceFilter
+from utils.currency_api import currency_api
+from utils.quick_convert import QuickQuery, render_quick_conversion
+
+logger = logging.getLogger(__name__)
+
+router = Router()
+# Router faqat guruh xabarlarini ko'radi (chat turi - oddiy atribut solishtiruvi)
+router.message.filter(F.chat.type.in_({"group", "supergroup"}))
+
+# Bitta guruhga shu oraliqdan tez-tez javob berilmaydi
+GROUP_REPLY_INTERVAL = 10.0
+MAX_TRACKED_CHATS = 10_000
+
+
+class ChatThrottle:
+    """chat_id -> oxirgi javob vaqti (eng eskisi boshida)"""
+
+    def __init__(
+        self, interval: float = GROUP_REPLY_INTERVAL, max_chats: int = MAX_TRACKED_CHATS
+    ):
+        self.interval = interval
+        self.max_chats = max_chats
+        self._last: OrderedDict = OrderedDict()
+        self.throttled = 0
+
+    def allow(self, chat_id: int) -> bool:
+        now = time.monotonic()
+        last = self._last.get(chat_id)
+        if last is not None and now - last < self.interval:
+            self.throttled += 1
+            return False
+        self._last[chat_id] = now
+        self._last.move_to_end(chat_id)
+        # Boshidan: eskirgan yozuvlar, chegaradan oshsa esa eng eskilari
+        while self._last:
+            oldest = next(iter(self._last.values()))
+            if len(self._last) <= self.max_chats and now - oldest < self.interval:
+                break
+            self._last.popitem(last=False)
+        return True
+
+
+throttle = ChatThrottle()
+
+
+@router.message(GroupPriceFilter())
+async def group_price_listener(message: Message, query: QuickQuery):
+    """Guruhda "500$ necha so'm?" - qisqa javob (tugmalarsiz)"""
+    if not throttle.allow(message.chat.id):
+        return
+
+    try:
+        snapshot = await currency_api.get_snapshot()
+    except Exception as e:
+        logger.error(f"Guruh uchun kurslar olinmadi: {e}")
+        return
+
+    await message.reply(render_quick_conversion(query, snapshot))
+
+
+@router.message(~F.text.startswith("/"))
+async def ignore_group_message(message: Message):
+    """Qolgan guruh xabarlari shu yerda tugaydi (state va boshqa routerlarsiz)"""
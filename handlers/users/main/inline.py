@@ -0,0 +1,129 @@
+# handlers.users.main.inline
+import logging
+from collections import OrderedDict
+from datetime import datetime
+from typing import List, Tuple
+from aiogram import Router
+from aiogram.types import (
+    InlineQuery,
+    InlineQueryResultArticle,
+    InputTextMessageContent,
+)
+
+from keyboards.inline.currency_kb import get_currency_emoji
+from utils.currency_api import RateSnapshot, currency_api
+from utils.quick_convert import (
+    QuickQuery,
+    format_amount,
+    parse_quick_query,
+    render_quick_conversion,
+)
+
+logger = logging.getLogger(__name__)
+
+router = Router()
+
+MAX_CACHED_ANSWERS = 5_000
+# Noto'g'ri so'rovlar uchun Telegram keshi (foydalanuvchi hali yozayotgan bo'ladi)
+HINT_CACHE_TIME = 5
+
+
+class InlineAnswerCache:
+    """(so'rov, kurslar versiyasi) -> tayyor natijalar, LRU bilan cheklangan.
+
+    Kalit tahlil qilingan so'rov: "100 usd", "100$" va "$100" bitta yozuv.
+    Kurslar yangilanganda versiya o'zgaradi va eski yozuvlar o'z-o'zidan
+    ishlatilmay qoladi (LRU ularni siqib chiqaradi).
+    """
+
+    def __init__(self, max_entries: int = MAX_CACHED_ANSWERS):
+        self.max_entries = max_entries
+        self._items: OrderedDict = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, query: QuickQuery, snapshot: RateSnapshot) -> List:
+        key = (query, snapshot.version)
+        results = self._items.get(key)
+        if results is not None:
+            self._items.move_to_end(key)
+            self.hits += 1
+            return results
+
+        self.misses += 1
+        results = self._items[key] = build_results(query, snapshot)
+        while len(self._items) > self.max_entries:
+            self._items.popitem(last=False)
+        return results
+
+
+def build_results(query: QuickQuery, snapshot: RateSnapshot) -> List:
+    """Barcha maqsad valyutalar uchun bitta umumiy va alohida natijalar"""
+    prefix = f"{snapshot.version}:{query.from_currency}:{query.amount:g}"
+    results = [
+        InlineQueryResultArticle(
+            id=f"{prefix}:all",
+            title=f"{query.amount:,.2f} {query.from_currency} → "
+            + ", ".join(query.targets),
+            description="Barcha valyutalar bo'yicha",
+            input_message_content=InputTextMessageContent(
+                message_text=render_quick_conversion(query, snapshot)
+            ),
+        )
+    ]
+    for to_currency in query.targets:
+        rate = snapshot.rate(query.from_currency, to_currency)
+        single = QuickQuery(query.amount, query.from_currency, (to_currency,))
+        results.append(
+            InlineQueryResultArticle(
+                id=f"{prefix}:{to_currency}",
+                title=f"{get_currency_emoji(to_currency)} "
+                f"{format_amount(query.amount * rate)} {to_currency}",
+                description=f"1 {query.from_currency} = {rate:.4f} {to_currency}",
+                input_message_content=InputTextMessageContent(
+                    message_text=render_quick_conversion(single, snapshot)
+                ),
+            )
+        )
+    return results
+
+
+_HINT = [
+    InlineQueryResultArticle(
+        id="hint",
+        title="💱 Summa va valyutani yozing",
+        description="Masalan: 100 usd, 250 eur to uzs, 1.5k rub",
+        input_message_content=InputTextMessageContent(
+            message_text="💱 Masalan: 100 usd, 250 eur to uzs, 1.5k rub"
+        ),
+    )
+]
+
+answer_cache = InlineAnswerCache()
+
+
+def _cache_time(snapshot: RateSnapshot) -> int:
+    """Telegram keshi navbatdagi kurs yangilanishigacha amal qiladi"""
+    age = (datetime.now() - snapshot.updated_at).total_seconds()
+    return max(int(currency_api.update_interval - age), 1)
+
+
+@router.inline_query()
+async def inline_conversion(inline_query: InlineQuery):
+    query = parse_quick_query(inline_query.query)
+    if query is None:
+        await inline_query.answer(_HINT, cache_time=HINT_CACHE_TIME)
+        return
+
+    try:
+        snapshot = await currency_api.get_snapshot()
+    except Exception as e:
+        logger.error(f"Inline so'rov uchun kurslar olinmadi: {e}")
+        await inline_query.answer([], cache_time=HINT_CACHE_TIME)
+        return
+
+    await inline_query.answer(
+        answer_cache.get(query, snapshot),
+        cache_time=_cache_time(snapshot),
+        is_personal=False,
+    )
@@ -0,0 +1,73 @@
+# handlers.users.main.membership
+import logging
+from aiogram import Router
+from aiogram.types import ChatMemberUpdated
+
+from utils.database.db import DataBase
+from utils.misc.subscription import (
+    MEMBER_STATUSES,
+    channel_cache,
+    membership_cache,
+    membership_index,
+)
+
+logger = logging.getLogger(__name__)
+
+router = Router()
+db = DataBase()
+
+# Bot shu statusda bo'lsagina kanal a'zolari haqida chat_member hodisalari keladi
+BOT_TRACKING_STATUSES = frozenset({"administrator", "creator"})
+
+
+@router.chat_member()
+async def on_channel_member(update: ChatMemberUpdated):
+    """Majburiy kanalga qo'shilish/chiqishni a'zolik indeksiga yozish"""
+    snapshot = await channel_cache.get(db.get_all_subscriptions)
+    kanal = snapshot.find(update.chat.id, update.chat.username)
+    if kanal is None or kanal.slot is None:
+        return
+
+    user_id = update.new_chat_member.user.id
+    a_zo = update.new_chat_member.status in MEMBER_STATUSES
+
+    membership_index.update(user_id, kanal.slot, a_zo)
+    if not a_zo:
+        # Kanaldan chiqqan foydalanuvchi keyingi xabarida qayta tekshiriladi
+        membership_cache.drop_verified(user_id)
+
+    try:
+        await db.set_channel_membership(user_id, kanal.slot, a_zo)
+    except Exception as e:
+        logger.error(f"A'zolik hodisasini saqlashda xato {user_id}: {e}")
+
+
+@router.my_chat_member()
+async def on_bot_member(update: ChatMemberUpdated):
+    """Bot kanalda admin bo'lmay qolsa, shu kanal bo'yicha indeks tozalanadi"""
+    snapshot = await channel_cache.get(db.get_all_subscriptions)
+    kanal = snapshot.find(update.chat.id, update.chat.username)
+    if kanal is None or kanal.slot is None:
+        return
+
+    if update.new_chat_member.status in BOT_TRACKING_STATUSES:
+        logger.info(f"{kanal.name}: bot admin, a'zolik hodisalari kuzatiladi")
+        return
+
+    # Hodisalar endi kelmaydi - bu kanal get_chat_member orqali tekshiriladi
+    membership_index.clear_slot(kanal.slot)
+    try:
+        count = await db.clear_membership_slot(kanal.slot)
+        logger.warning(
+            f"{kanal.name}: bot admin emas, {count} ta a'zolik yozuvi tozalandi"
+        )
+    except Exception as e:
+        logger.error(f"{kanal.name} slotini tozalashda xato: {e}")
+
+
+async def sync_membership_job():
+    """Scheduler ishi: boshqa jarayonlar yozgan a'zolik o'zgarishlarini olish"""
+    rows = await db.get_channel_memberships(since=membership_index.sync_since())
+    for user_id in membership_index.apply(rows):
+        # Boshqa jarayonda kanaldan chiqqani ma'lum bo'ldi
+        membership_cache.drop_verified(user_id)
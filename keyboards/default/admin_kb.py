@@ -13,6 +13,11 @@ data = DataBase()
 admin_keyboard = ReplyKeyboardMarkup(
     keyboard=[
         [KeyboardButton(text="📊 Statistika"), KeyboardButton(text="📥 Users Excel")],
+        [
+            KeyboardButton(text="📦 Users CSV"),
+            KeyboardButton(text="🗂 Users Parquet"),
+            KeyboardButton(text="🔁 Yangilanganlar"),
+        ],
         [
             KeyboardButton(text="➕ Kanal qo'shish"),
             KeyboardButton(text="➖ Kanal o'chirish"),
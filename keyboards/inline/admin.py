@@ -1,6 +1,6 @@
 # keyboards/inline/admin.py
 
-from datetime import datetime, timedelta
+from datetime import datetime
 from aiogram import Router, F
 from aiogram.fsm.context import FSMContext
 from aiogram.filters import Command
@@ -55,9 +55,9 @@ async def show_admin_panel(event: Union[Message, CallbackQuery], state: FSMConte
     db = DataBase()
 
     try:
-        total_users = await db.count_users()
-        today = datetime.now().date()
-        today_users = await db.count_users_by_date(today)
+        daily_stats = await db.get_daily_stats(datetime.now().date(), days=1)
+        total_users = daily_stats["total_users"]
+        today_users = daily_stats["daily"][0][1] if daily_stats["daily"] else 0
 
         text = [
             f"👋 Admin panel\n",
@@ -87,16 +87,15 @@ async def show_statistics(callback: CallbackQuery):
     db = DataBase()
 
     try:
-        total_users = await db.count_users()
-        today = datetime.now().date()
+        daily_stats = await db.get_daily_stats(datetime.now().date(), days=7)
+        total_users = daily_stats["total_users"]
 
         # Last 7 days statistics
-        weekly_stats = []
-        for i in range(7):
-            date = today - timedelta(days=i)
-            count = await db.count_users_by_date(date)
-            if count > 0:
-                weekly_stats.append(f"📅 {date.strftime('%d.%m.%Y')}: +{count}")
+        weekly_stats = [
+            f"📅 {date.strftime('%d.%m.%Y')}: +{count}"
+            for date, count in daily_stats["daily"]
+            if count > 0
+        ]
 
         text = [
             "📊 Bot statistikasi\n",
@@ -0,0 +1,31 @@
+# keyboards/inline/callback_data.py
+from aiogram.filters.callback_data import CallbackData
+
+# Prefikslar qisqa: callback_data 64 bayt bilan cheklangan va har bir
+# tugma bosilganda shu satr jo'natiladi. Prefikslar takrorlanmasligi kerak.
+
+
+class SelectCurrency(CallbackData, prefix="s"):
+    code: str
+
+
+class ToggleCurrency(CallbackData, prefix="t"):
+    code: str
+
+
+class Calculate(CallbackData, prefix="c"):
+    pass
+
+
+class ResetConversion(CallbackData, prefix="r"):
+    pass
+
+
+class DeleteChannel(CallbackData, prefix="dc"):
+    id: int
+
+
+class PickerPage(CallbackData, prefix="p"):
+    # Bo'sh satr - asosiy valyuta tanlash sahifasi
+    base: str
+    page: int
@@ -1,5 +1,6 @@
 from aiogram.types import InlineKeyboardMarkup, InlineKeyboardButton
 from utils.database.db import DataBase
+from keyboards.inline.callback_data import DeleteChannel
 
 db = DataBase()
 
@@ -21,7 +22,7 @@ async def get_delete_channel_keyboard():
     buttons = [
         InlineKeyboardButton(
             text=f"❌ {channel['name']}",
-            callback_data=f"delete_channel:{channel['id']}",
+            callback_data=DeleteChannel(id=channel["id"]).pack(),
         )
         for channel in channels
     ]
@@ -1,5 +1,14 @@
+from collections import OrderedDict
+from aiogram.types import InlineKeyboardButton, InlineKeyboardMarkup
 from aiogram.utils.keyboard import InlineKeyboardBuilder
-from typing import List, Dict
+from typing import Callable, Dict, FrozenSet, Hashable, List
+from keyboards.inline.callback_data import (
+    Calculate,
+    PickerPage,
+    ResetConversion,
+    SelectCurrency,
+    ToggleCurrency,
+)
 
 # Qo'llab-quvvatlanadigan valyutalar ro'yxati
 SUPPORTED_CURRENCIES: List[str] = ["UZS", "RUB", "EUR", "GBP", "USD"]
@@ -13,53 +22,178 @@ CURRENCY_EMOJIS: Dict[str, str] = {
     "UZS": "🇺🇿",
 }
 
+# Bitta sahifadagi valyutalar soni (ro'yxat kattalashganda sahifalanadi)
+PAGE_SIZE = 8
+# (asosiy valyuta, tanlanganlar, sahifa) kombinatsiyalari uchun kesh chegarasi
+MAX_CACHED_MARKUPS = 512
+
 
 def get_currency_emoji(currency: str) -> str:
 
     return CURRENCY_EMOJIS.get(currency.upper(), "")
 
 
-def create_currency_keyboard():
+class MarkupCache:
+    """Tayyor klaviaturalar, LRU bilan cheklangan.
+
+    Markup obyektlari o'zgartirilmaydi, shuning uchun bitta nusxa barcha
+    foydalanuvchilarga qayta beriladi.
+    """
+
+    def __init__(self, maxsize: int = MAX_CACHED_MARKUPS):
+        self.maxsize = maxsize
+        self._items: OrderedDict = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, key: Hashable, build: Callable[[], InlineKeyboardMarkup]):
+        markup = self._items.get(key)
+        if markup is not None:
+            self._items.move_to_end(key)
+            self.hits += 1
+            return markup
+        self.misses += 1
+        markup = self._items[key] = build()
+        while len(self._items) > self.maxsize:
+            self._items.popitem(last=False)
+        return markup
+
+    def clear(self):
+        self._items.clear()
+
+    def __len__(self) -> int:
+        return len(self._items)
+
+
+_markups = MarkupCache()
+
+
+def _available(from_currency: str) -> List[str]:
+    return [c for c in SUPPORTED_CURRENCIES if c != from_currency]
+
+
+def _page_count(items: List[str]) -> int:
+    return max((len(items) + PAGE_SIZE - 1) // PAGE_SIZE, 1)
+
+
+def _clamp_page(items: List[str], page: int) -> int:
+    return min(max(page, 0), _page_count(items) - 1)
+
+
+def currency_page(from_currency: str, currency: str) -> int:
+    """Valyuta konvertatsiya klaviaturasining qaysi sahifasida turadi"""
+    available = _available(from_currency)
+    return available.index(currency) // PAGE_SIZE if currency in available else 0
+
 
+def _add_nav_row(kb: InlineKeyboardBuilder, base: str, page: int, pages: int):
+    """Bir nechta sahifa bo'lsa "oldingi/keyingi" tugmalari"""
+    if pages <= 1:
+        return
+    nav = []
+    if page > 0:
+        nav.append(
+            InlineKeyboardButton(
+                text="⬅️", callback_data=PickerPage(base=base, page=page - 1).pack()
+            )
+        )
+    nav.append(
+        InlineKeyboardButton(
+            text=f"{page + 1}/{pages}",
+            callback_data=PickerPage(base=base, page=page).pack(),
+        )
+    )
+    if page < pages - 1:
+        nav.append(
+            InlineKeyboardButton(
+                text="➡️", callback_data=PickerPage(base=base, page=page + 1).pack()
+            )
+        )
+    kb.row(*nav)
+
+
+def _build_currency_keyboard(page: int) -> InlineKeyboardMarkup:
     kb = InlineKeyboardBuilder()
+    start = page * PAGE_SIZE
 
-    for curr in SUPPORTED_CURRENCIES:
+    for curr in SUPPORTED_CURRENCIES[start : start + PAGE_SIZE]:
         emoji = get_currency_emoji(curr)
-        kb.button(text=f"{emoji} {curr}".strip(), callback_data=f"select_{curr}")
+        kb.button(
+            text=f"{emoji} {curr}".strip(), callback_data=SelectCurrency(code=curr)
+        )
 
     kb.adjust(1)  # Har bir qatorda 1 ta tugma
+    _add_nav_row(kb, "", page, _page_count(SUPPORTED_CURRENCIES))
     return kb.as_markup()
 
 
-def create_convert_keyboard(from_currency: str, selected_currencies: List[str] = None):
-
-    if selected_currencies is None:
-        selected_currencies = []
-
+def _build_convert_keyboard(
+    from_currency: str, selected: FrozenSet[str], page: int
+) -> InlineKeyboardMarkup:
     kb = InlineKeyboardBuilder()
-    available_currencies = [c for c in SUPPORTED_CURRENCIES if c != from_currency]
+    available_currencies = _available(from_currency)
+    start = page * PAGE_SIZE
 
     # Valyutalarni chiqarish
-    for curr in available_currencies:
+    for curr in available_currencies[start : start + PAGE_SIZE]:
         emoji = get_currency_emoji(curr)
-        is_selected = curr in selected_currencies
-        mark = "✅" if is_selected else ""
+        mark = "✅" if curr in selected else ""
+
+        kb.button(
+            text=f"{emoji} {curr} {mark}".strip(),
+            callback_data=ToggleCurrency(code=curr),
+        )
+    kb.adjust(1)
+
+    _add_nav_row(kb, from_currency, page, _page_count(available_currencies))
+    kb.row(
+        InlineKeyboardButton(
+            text="🔄 Qaytadan tanlash", callback_data=ResetConversion().pack()
+        ),
+        InlineKeyboardButton(text="🧮 Hisoblash", callback_data=Calculate().pack()),
+    )
+    return kb.as_markup()
 
-        kb.button(text=f"{emoji} {curr} {mark}".strip(), callback_data=f"toggle_{curr}")
 
-    kb.button(text="🔄 Qaytadan tanlash", callback_data="reset")
-    kb.button(text="🧮 Hisoblash", callback_data="calculate")
+def create_currency_keyboard(page: int = 0) -> InlineKeyboardMarkup:
+    page = _clamp_page(SUPPORTED_CURRENCIES, page)
+    return _markups.get(("pick", page), lambda: _build_currency_keyboard(page))
 
-    buttons_count = len(available_currencies)
-    layout = [1] * buttons_count + [2]
-    kb.adjust(*layout)
-    return kb.as_markup()
 
+def create_convert_keyboard(
+    from_currency: str, selected_currencies: List[str] = None, page: int = 0
+) -> InlineKeyboardMarkup:
+    # Tanlash tartibi klaviaturaga ta'sir qilmaydi
+    selected = frozenset(selected_currencies or ())
+    page = _clamp_page(_available(from_currency), page)
+    return _markups.get(
+        ("convert", from_currency, selected, page),
+        lambda: _build_convert_keyboard(from_currency, selected, page),
+    )
 
-def create_result_keyboard():
 
+def _build_result_keyboard() -> InlineKeyboardMarkup:
     kb = InlineKeyboardBuilder()
 
-    kb.button(text="🔄 Yangi konvertatsiya", callback_data="reset")
+    kb.button(text="🔄 Yangi konvertatsiya", callback_data=ResetConversion())
 
     return kb.as_markup()
+
+
+_RESULT_KEYBOARD = _build_result_keyboard()
+
+
+def create_result_keyboard() -> InlineKeyboardMarkup:
+    return _RESULT_KEYBOARD
+
+
+def warm_up():
+    """Eng ko'p ishlatiladigan klaviaturalarni oldindan tayyorlab qo'yish"""
+    for page in range(_page_count(SUPPORTED_CURRENCIES)):
+        create_currency_keyboard(page)
+    for curr in SUPPORTED_CURRENCIES:
+        for page in range(_page_count(_available(curr))):
+            create_convert_keyboard(curr, page=page)
+
+
+warm_up()
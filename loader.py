@@ -1,11 +1,16 @@
 from aiogram import Bot, Dispatcher
+from aiogram.client.default import DefaultBotProperties
 from aiogram.enums import ParseMode
-from aiogram.fsm.storage.memory import MemoryStorage
 
-from data import config
+from data.config import load_config
+from utils.misc.storage import create_storage
+
+config = load_config()
 
 # Initialize bot with HTML parse mode
-bot = Bot(token=config.BOT_TOKEN, parse_mode=ParseMode.HTML)
+bot = Bot(
+    token=config.bot.token, default=DefaultBotProperties(parse_mode=ParseMode.HTML)
+)
 
-storage = MemoryStorage()
+storage = create_storage(config)
 dp = Dispatcher(storage=storage)
@@ -1,112 +1,234 @@
+import asyncio
+import logging
+import time
 from aiogram import BaseMiddleware
-from aiogram.types import Message, CallbackQuery
-from aiogram.exceptions import TelegramBadRequest
-from data.config import load_config
-from sqlalchemy.orm import sessionmaker
-from sqlalchemy.ext.asyncio import AsyncSession, create_async_engine
-from utils.database.models import Subscription
-from sqlalchemy.future import select
-from typing import Any, Dict, Callable
+from aiogram.types import Message, CallbackQuery, Update
+from typing import Any, Dict, Callable, Optional
 from keyboards.inline.user import get_channel_keyboard
+from utils.misc.render_cache import render_cache
+from utils.misc.overload import overload
+from utils.database.db import DataBase
+from data.config import load_config
+from utils.misc.subscription import (
+    MEMBER_STATUSES,
+    MEMBERSHIP_CHECK_CONCURRENCY,
+    MEMBERSHIP_CHECK_TIMEOUT,
+    Channel,
+    channel_cache,
+    membership_cache,
+    membership_index,
+)
+
+logger = logging.getLogger(__name__)
+
+# Jarayondagi barcha tekshiruvlar uchun umumiy: ko'p foydalanuvchi bir vaqtda
+# kelganda ham Telegram'ga parallel so'rovlar soni cheklangan bo'ladi
+_check_semaphore = asyncio.Semaphore(MEMBERSHIP_CHECK_CONCURRENCY)
+
+# Obuna tekshiruvisiz o'tadigan buyruqlar va callback prefikslari
+BYPASS_COMMANDS = frozenset({"/start", "/help"})
+BYPASS_CALLBACK_PREFIXES = ("check_subscription",)
 
 
 class CheckSubscriptionMiddleware(BaseMiddleware):
-    def __init__(self):
-        config = load_config()
-        self.engine = create_async_engine(config.db.sqlalchemy_database_url)
-        self.SessionLocal = sessionmaker(
-            bind=self.engine, class_=AsyncSession, expire_on_commit=False
-        )
+    """Majburiy kanallarga obuna tekshiruvi.
 
-    async def check_all_subscriptions(self, user_id: int, bot) -> list:
-
-        obuna_bolmagan_kanallar = []
-        async with self.SessionLocal() as session:
-            async with session.begin():
-                query = await session.execute(select(Subscription))
-                kanallar = query.scalars().all()
-
-                for kanal in kanallar:
-                    kanal_username = kanal.link.replace("https://t.me/", "@")
-                    kanal_id = kanal.channel_id  # Kanal ID bazadan olinadi
-
-                    try:
-                        # Asosiy tekshiruv: kanal_ID yoki username orqali
-                        if kanal_id:
-                            user = await bot.get_chat_member(
-                                chat_id=int(kanal_id), user_id=user_id
-                            )
-                        else:
-                            user = await bot.get_chat_member(
-                                chat_id=kanal_username, user_id=user_id
-                            )
-
-                        # Agar foydalanuvchi kanal a'zosi bo‘lmasa
-                        if user.status not in ["member", "administrator", "creator"]:
-                            obuna_bolmagan_kanallar.append(
-                                {"name": kanal.name, "link": kanal.link}
-                            )
-
-                    except Exception as e:
-                        """
-                        Bu yerga bot yoki Telegram tarafidan xatolik kelib tushsa,
-                        foydalanuvchini obuna bo'lmaganlar ro'yxatiga kiritmasdan
-                        o‘tkazib yuboramiz
-                        """
-
-                        """Muammo haqida log yozib qo'yishimiz mumkin"""
-
-                        print(
-                            f"{kanal.name} kanalini tekshirishda xatolik yuz berdi: {e}"
-                        )
-
-                        """Faqat obuna_bolmagan_kanallar ga qo‘shmaymiz, shunda foydalanuvchi
-                        # "o‘tkazib yuboriladi"""
-                        pass
+    ``dp.update.outer_middleware`` sifatida bir marta ulanadi: har bir update
+    uchun bitta tekshiruv, ozod yo'llar (adminlar, guruhlar, /start, /help,
+    obunani tekshirish tugmasi) uchun esa faqat bir nechta solishtiruv.
+    """
+
+    def __init__(self):
+        self.db = DataBase()
+        self.admin_ids = frozenset(load_config().bot.admin_ids)
+        # Tekshiruv o'lchovlari (faqat tekshirilgan update'lar)
+        self.checked = 0
+        self.blocked = 0
+        self.total_seconds = 0.0
+        self.max_seconds = 0.0
+
+    async def _check_member(self, bot, kanal: Channel, user_id: int) -> Optional[bool]:
+        """Bitta kanal bo'yicha a'zolik; xatolik yoki timeout bo'lsa None"""
+
+        async def get_member():
+            async with _check_semaphore:
+                # Asosiy tekshiruv: kanal_ID yoki username orqali
+                return await bot.get_chat_member(chat_id=kanal.chat_id, user_id=user_id)
+
+        try:
+            # Semafor navbatida kutish ham timeout ichida: eng uzoq kutish bitta
+            # kanal tekshiruvidan oshmaydi
+            user = await asyncio.wait_for(get_member(), MEMBERSHIP_CHECK_TIMEOUT)
+        except Exception as e:
+            """
+            Bu yerga bot yoki Telegram tarafidan xatolik kelib tushsa,
+            foydalanuvchini obuna bo'lmaganlar ro'yxatiga kiritmasdan
+            o‘tkazib yuboramiz
+            """
+
+            """Muammo haqida log yozib qo'yishimiz mumkin"""
+
+            print(f"{kanal.name} kanalini tekshirishda xatolik yuz berdi: {e!r}")
+            return None
+
+        a_zo = user.status in MEMBER_STATUSES
+        membership_cache.set(user_id, kanal.chat_id, a_zo)
+        # Kanal hodisalar bilan kuzatilayotgan bo'lsa indeks va baza ham
+        # yangilanadi: chat_member hodisasi kelmasligi mumkin, qayta ishga
+        # tushganda (va boshqa jarayonlarda) eski bit qaytib kelmasin
+        indeksda = membership_index.lookup(user_id, kanal)
+        if indeksda is not None and indeksda != a_zo:
+            membership_index.update(user_id, kanal.slot, a_zo)
+            try:
+                await self.db.set_channel_membership(user_id, kanal.slot, a_zo)
+            except Exception as e:
+                logger.error(f"A'zolikni bazaga yozishda xato {user_id}: {e}")
+        return a_zo
+
+    async def check_all_subscriptions(
+        self, user_id: int, bot, force: bool = False
+    ) -> list:
+        """Obuna bo'linmagan kanallar ro'yxati.
+
+        ``force=True`` keshni chetlab o'tib, Telegram'dan qayta so'raydi
+        ("✅OBUNA BO'LDIM" tugmasi uchun). Yuklama yuqori paytda (force'siz)
+        faqat indeks va keshga, shu jumladan muddati o'tgan yozuvlarga
+        tayaniladi; noma'lum kanallar tekshirilmay o'tkaziladi.
+        """
+        # Adminlar tekshirilmaydi
+        if user_id in self.admin_ids:
+            return []
+
+        # Kanallar ro'yxati xotiradagi nusxadan olinadi (admin o'zgartirganda yangilanadi)
+        snapshot = await channel_cache.get(self.db.get_all_subscriptions)
+        degraded = overload.degraded and not force
+        if not force and membership_cache.is_verified(
+            user_id, snapshot.version, allow_stale=degraded
+        ):
+            return []
+
+        # Avval chat_member hodisalaridan yig'ilgan indeks, so'ng TTL kesh.
+        # force'da indeks bo'yicha "a'zo emas" kanallar ham qayta so'raladi:
+        # foydalanuvchi hozirgina obuna bo'lgan, hodisa esa kechikkan bo'lishi mumkin
+        kanallar = snapshot.channels
+        natijalar = []
+        for kanal in kanallar:
+            a_zo = membership_index.lookup(user_id, kanal)
+            if a_zo is None and not force:
+                a_zo = membership_cache.get(
+                    user_id, kanal.chat_id, allow_stale=degraded
+                )
+            elif force and not a_zo:
+                a_zo = None
+            natijalar.append(a_zo)
+
+        # Keshda yo'q kanallar bir vaqtda tekshiriladi: kechikish eng sekin
+        # kanal bilan cheklanadi, yig'indisi bilan emas
+        tekshirilmagan = [i for i, a_zo in enumerate(natijalar) if a_zo is None]
+        if tekshirilmagan and not degraded:
+            yangi = await asyncio.gather(
+                *(self._check_member(bot, kanallar[i], user_id) for i in tekshirilmagan)
+            )
+            for i, a_zo in zip(tekshirilmagan, yangi):
+                natijalar[i] = a_zo
+
+        # Tartib kanallar ro'yxati bilan bir xil (natija deterministik)
+        obuna_bolmagan_kanallar = [
+            {"name": kanal.name, "link": kanal.link}
+            for kanal, a_zo in zip(kanallar, natijalar)
+            if a_zo is False
+        ]
+        tekshiruv_xatosi = any(a_zo is None for a_zo in natijalar)
+
+        # Xatoliksiz, to'liq o'tgan foydalanuvchi keyingi safar darhol o'tkaziladi
+        if not obuna_bolmagan_kanallar and not tekshiruv_xatosi:
+            membership_cache.mark_verified(user_id, snapshot.version)
 
         return obuna_bolmagan_kanallar
 
+    def _is_exempt(
+        self,
+        user_id: int,
+        message: Optional[Message],
+        callback: Optional[CallbackQuery],
+    ) -> bool:
+        """Tekshiruvsiz o'tadigan yo'llar: adminlar, buyruqlar, callback prefikslari"""
+        if user_id in self.admin_ids:
+            return True
+        # Guruhlarda tekshiruv yo'q: u yerda bot faqat narx so'rovlariga javob beradi
+        chat = (
+            message.chat
+            if message is not None
+            else getattr(callback.message, "chat", None)
+        )
+        if chat is not None and chat.type != "private":
+            return True
+        if message is not None:
+            text = message.text
+            # "/start payload" va "/help@bot_username" ham shu buyruqlar hisoblanadi
+            return (
+                text is not None
+                and text.startswith("/")
+                and text.split(maxsplit=1)[0].split("@", 1)[0] in BYPASS_COMMANDS
+            )
+        data = callback.data
+        return data is not None and data.startswith(BYPASS_CALLBACK_PREFIXES)
+
+    def stats(self) -> dict:
+        return {
+            "checked": self.checked,
+            "blocked": self.blocked,
+            "avg_ms": self.total_seconds / self.checked * 1000 if self.checked else 0.0,
+            "max_ms": self.max_seconds * 1000,
+        }
+
     async def __call__(
-        self, handler: Callable, event: Message | CallbackQuery, data: Dict[str, Any]
+        self, handler: Callable, event: Update, data: Dict[str, Any]
     ) -> Any:
-        user_id = event.from_user.id
-        bot = data["bot"]
+        message, callback = event.message, event.callback_query
+        user = data.get("event_from_user")
 
-        # Check subscription buyrugʻi uchun tekshirish
-        if isinstance(event, CallbackQuery) and event.data == "check_subscription":
+        # Boshqa update turlari (chat_member, inline ...) va ozod yo'llar
+        # hech qanday qo'shimcha ishsiz o'tadi
+        if (message is None and callback is None) or user is None:
+            return await handler(event, data)
+        if self._is_exempt(user.id, message, callback):
             return await handler(event, data)
 
-        # /start va /help buyruqlari uchun tekshiruvdan o'tkazmasdan davom etamiz
-        if isinstance(event, Message):
-            if event.text in ["/start", "/help"]:
-                return await handler(event, data)
+        # A'zolikni tekshirish (har bir update uchun bir marta)
+        boshlandi = time.perf_counter()
+        obuna_bolmagan_kanallar = await self.check_all_subscriptions(
+            user.id, data["bot"]
+        )
+        sarflandi = time.perf_counter() - boshlandi
+        self.checked += 1
+        self.total_seconds += sarflandi
+        self.max_seconds = max(self.max_seconds, sarflandi)
 
-        # A'zolikni tekshirish
-        obuna_bolmagan_kanallar = await self.check_all_subscriptions(user_id, bot)
+        # Agar barcha kanallarga obuna bo'lgan bo'lsa (yoki xatolik bilan "o‘tkazib yuborilgan" bo‘lsa)
+        # handlerni ishga tushiramiz
+        if not obuna_bolmagan_kanallar:
+            return await handler(event, data)
 
-        # Agar obuna bo'lmagan kanallar mavjud bo'lsa
-        if obuna_bolmagan_kanallar:
-            tugmalar = await get_channel_keyboard(obuna_bolmagan_kanallar)
-            xabar_matni = f"📢 Iltimos, quyidagi {len(obuna_bolmagan_kanallar)} ta kanalga obuna bo'ling:"
+        self.blocked += 1
+        tugmalar = await get_channel_keyboard(obuna_bolmagan_kanallar)
+        xabar_matni = f"📢 Iltimos, quyidagi {len(obuna_bolmagan_kanallar)} ta kanalga obuna bo'ling:"
 
-            try:
-                if isinstance(event, CallbackQuery):
-                    await event.message.edit_text(
-                        text=xabar_matni, reply_markup=tugmalar
-                    )
-                    await event.answer(
-                        "Botdan foydalanish uchun kanallarga obuna bo'ling!",
-                        show_alert=True,
-                    )
-                elif isinstance(event, Message):
-                    await event.answer(text=xabar_matni, reply_markup=tugmalar)
-            except TelegramBadRequest as e:
-                if "message is not modified" not in str(e):
-                    raise e
-
-            # Tekshiruvdan to‘xtab, handlerni chaqirmasdan qaytamiz
-            return
+        # "message is not modified" holatini render_cache o'zi hal qiladi
+        if callback is not None:
+            await render_cache.edit_text(
+                callback.message, xabar_matni, reply_markup=tugmalar
+            )
+            await callback.answer(
+                "Botdan foydalanish uchun kanallarga obuna bo'ling!",
+                show_alert=True,
+            )
+        else:
+            await message.answer(text=xabar_matni, reply_markup=tugmalar)
 
-        # Agar barcha kanallarga obuna bo'lgan bo'lsa (yoki xatolik bilan "o‘tkazib yuborilgan" bo‘lsa)
-        # handlerni ishga tushiramiz
-        return await handler(event, data)
+        # Tekshiruvdan to‘xtab, handlerni chaqirmasdan qaytamiz
+        return
+
+
+# Dispatcher'ga bir marta ulanadigan yagona nusxa (start.py ham shuni ishlatadi)
+subscription_gate = CheckSubscriptionMiddleware()
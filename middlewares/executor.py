@@ -0,0 +1,107 @@
+from typing import Any, Awaitable, Callable, Dict
+from aiogram import BaseMiddleware
+from aiogram.types import Update
+from data.config import load_config
+from handlers.users.main.callbacks import callbacks
+from keyboards.default.admin_kb import admin_keyboard
+from utils.executor import LANE_ADMIN, LANE_CALLBACK, LANE_CONVERSION, UpdateExecutor
+
+# Admin handler'lariga boradigan update'lar: admin panel tugmalari va
+# buyruqlari, admin_* callback'lari va admin FSM holatlari (kanal qo'shish,
+# xabar yuborish). Admin'ning oddiy konvertatsiyalari umumiy navbatda qoladi
+ADMIN_TEXTS = frozenset(
+    button.text for row in admin_keyboard.keyboard for button in row
+) | {"/admin"}
+ADMIN_CALLBACK_PREFIX = "admin_"
+ADMIN_STATE_GROUPS = ("BroadcastStates:", "ChannelStates:")
+
+
+class UpdateExecutorMiddleware(BaseMiddleware):
+    """Update'larni dispatcher'dan UpdateExecutor navbatlariga o'tkazish.
+
+    ``dp.update.outer_middleware`` ro'yxatida birinchi turadi: qolgan
+    middleware'lar va handler'lar executor worker'ida bajariladi, polling
+    yoki webhook esa navbatga qo'yilgach darhol keyingi update'ga o'tadi.
+    Executor ishga tushmagan bo'lsa update joyida bajariladi.
+    """
+
+    def __init__(self):
+        config = load_config()
+        self.admin_ids = frozenset(config.bot.admin_ids)
+        self.executor = UpdateExecutor(
+            workers=config.executor.workers,
+            max_pending=config.executor.max_pending,
+            max_per_chat=config.executor.max_per_chat,
+            admin_concurrency=config.executor.admin_concurrency,
+        )
+
+    @staticmethod
+    async def _is_admin_update(event: Update, data: Dict[str, Any]) -> bool:
+        if event.callback_query is not None:
+            callback_data = event.callback_query.data or ""
+            return callback_data.startswith(
+                ADMIN_CALLBACK_PREFIX
+            ) or callbacks.is_admin_only(callback_data)
+        if event.message is None:
+            return False
+        text = event.message.text or ""
+        if text.split("@")[0] in ADMIN_TEXTS:
+            return True
+        state = data.get("state")
+        current = await state.get_state() if state is not None else None
+        return current is not None and current.startswith(ADMIN_STATE_GROUPS)
+
+    async def _lane(self, event: Update, data: Dict[str, Any]) -> int:
+        user = data.get("event_from_user")
+        if (
+            user is not None
+            and user.id in self.admin_ids
+            and await self._is_admin_update(event, data)
+        ):
+            return LANE_ADMIN
+        if event.callback_query is not None:
+            return LANE_CALLBACK
+        return LANE_CONVERSION
+
+    @staticmethod
+    def _key(event: Update, data: Dict[str, Any]):
+        """Tartib saqlanadigan kalit: chat, bo'lmasa foydalanuvchi (inline)"""
+        chat = data.get("event_chat")
+        if chat is not None:
+            return chat.id
+        user = data.get("event_from_user")
+        if user is not None:
+            return user.id
+        return ("update", event.update_id)
+
+    @staticmethod
+    async def _run(
+        handler: Callable[[Update, Dict[str, Any]], Awaitable[Any]],
+        event: Update,
+        data: Dict[str, Any],
+    ) -> Any:
+        # FSM middleware holatni navbatga qo'yilganda o'qigan: shu chatning
+        # oldingi update'i uni o'zgartirgan bo'lishi mumkin
+        state = data.get("state")
+        if state is not None:
+            data["raw_state"] = await state.get_state()
+        return await handler(event, data)
+
+    async def __call__(
+        self,
+        handler: Callable[[Update, Dict[str, Any]], Awaitable[Any]],
+        event: Update,
+        data: Dict[str, Any],
+    ) -> Any:
+        if not self.executor.running:
+            return await handler(event, data)
+
+        await self.executor.submit(
+            self._key(event, data),
+            await self._lane(event, data),
+            lambda: self._run(handler, event, data),
+        )
+
+
+# Global instance
+update_executor = UpdateExecutorMiddleware()
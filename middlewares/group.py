@@ -0,0 +1,44 @@
+# middlewares/group.py
+from typing import Any, Awaitable, Callable, Dict
+from aiogram import BaseMiddleware
+from aiogram.types import Update
+from utils.quick_convert import looks_like_price
+
+GROUP_CHAT_TYPES = frozenset({"group", "supergroup"})
+
+
+class GroupNoiseMiddleware(BaseMiddleware):
+    """Guruhdagi narxga o'xshamagan xabarlarni eng boshida tashlash.
+
+    FSM middleware'idan oldin ulanadi: bunday xabar uchun na FSM holati
+    (Redis so'rovi), na executor navbati, na cheklov hisoblanadi. Buyruqlar
+    va ``looks_like_price`` dan o'tganlar odatdagidek ``group_router`` ga
+    boradi.
+    """
+
+    def __init__(self):
+        self.dropped = 0
+
+    async def __call__(
+        self,
+        handler: Callable[[Update, Dict[str, Any]], Awaitable[Any]],
+        event: Update,
+        data: Dict[str, Any],
+    ) -> Any:
+        message = event.message
+        if (
+            message is not None
+            and message.chat.type in GROUP_CHAT_TYPES
+            and not (message.text or "").startswith("/")
+            and not looks_like_price(message.text)
+        ):
+            self.dropped += 1
+            return None
+        return await handler(event, data)
+
+    def stats(self) -> dict:
+        return {"dropped": self.dropped}
+
+
+# Global instance
+group_noise = GroupNoiseMiddleware()
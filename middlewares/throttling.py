@@ -0,0 +1,84 @@
+from typing import Any, Awaitable, Callable, Dict, Optional
+from aiogram import BaseMiddleware
+from aiogram.types import Update
+from data.config import load_config
+from handlers.users.main.callbacks import SEPARATOR
+from keyboards.inline.callback_data import PickerPage, SelectCurrency, ToggleCurrency
+from utils.misc.throttling import Limit, TokenBuckets
+
+# Handler sinflari bo'yicha cheklovlar. Valyuta tanlash tugmalari tez-tez
+# bosiladi, hisoblash/tozalash va oddiy xabarlar esa qimmatroq
+DEFAULT_LIMITS = {
+    "picker": Limit(rate=4, burst=8),
+    "callback": Limit(rate=1, burst=3),
+    "message": Limit(rate=1, burst=5),
+    "inline": Limit(rate=3, burst=10),
+}
+
+PICKER_PREFIXES = frozenset(
+    {SelectCurrency.__prefix__, ToggleCurrency.__prefix__, PickerPage.__prefix__}
+)
+
+THROTTLED_TEXT = "⏳ Juda tez! Iltimos, biroz kuting."
+
+
+class ThrottlingMiddleware(BaseMiddleware):
+    """Foydalanuvchi bo'yicha token bucket cheklovi.
+
+    Obuna tekshiruvidan oldin ulanadi: cheklangan update uchun na baza, na
+    get_chat_member chaqiriladi. Cheklov davrida foydalanuvchi bitta
+    ogohlantirish oladi (callback uchun callback.answer), qolgan update'lar
+    jimgina tashlanadi. Adminlar va guruh xabarlari cheklanmaydi.
+    """
+
+    def __init__(self, limits: Optional[Dict[str, Limit]] = None):
+        self.admin_ids = frozenset(load_config().bot.admin_ids)
+        # Berilgan cheklovlar standartlarni almashtiradi, qolganlari saqlanadi
+        self.buckets = TokenBuckets({**DEFAULT_LIMITS, **(limits or {})})
+        self.throttled = 0
+        self.warnings = 0
+
+    @staticmethod
+    def _kind(event: Update) -> Optional[str]:
+        if event.callback_query is not None:
+            prefix = (event.callback_query.data or "").partition(SEPARATOR)[0]
+            return "picker" if prefix in PICKER_PREFIXES else "callback"
+        if event.message is not None:
+            return "message" if event.message.chat.type == "private" else None
+        if event.inline_query is not None:
+            return "inline"
+        return None
+
+    async def __call__(
+        self,
+        handler: Callable[[Update, Dict[str, Any]], Awaitable[Any]],
+        event: Update,
+        data: Dict[str, Any],
+    ) -> Any:
+        user = data.get("event_from_user")
+        kind = self._kind(event)
+        if kind is None or user is None or user.id in self.admin_ids:
+            return await handler(event, data)
+
+        if self.buckets.consume(user.id, kind):
+            return await handler(event, data)
+
+        self.throttled += 1
+        if self.buckets.mark_warned(user.id, kind):
+            self.warnings += 1
+            if event.callback_query is not None:
+                await event.callback_query.answer(THROTTLED_TEXT)
+            elif event.message is not None:
+                await event.message.answer(THROTTLED_TEXT)
+
+    def stats(self) -> dict:
+        return {
+            "buckets": len(self.buckets),
+            "throttled": self.throttled,
+            "warnings": self.warnings,
+            "swept": self.buckets.swept,
+        }
+
+
+# Global instance
+throttling = ThrottlingMiddleware()
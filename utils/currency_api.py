@@ -1,19 +1,59 @@
 import aiohttp
+import time
+from dataclasses import dataclass
 from datetime import datetime
 import logging
 from typing import Dict, Optional, Tuple
 from utils.database.db import DataBase
+from utils.misc.overload import overload
+from utils.shared_rates import SharedRates
 
 logger = logging.getLogger(__name__)
 
+# Follower jarayonlar lider e'lon qilgan kurslarni shu oraliqda tekshiradi
+FOLLOW_INTERVAL = 30
+
+
+@dataclass(frozen=True)
+class RateSnapshot:
+    """Bir marta olingan kurslar to'plami (o'zgarmaydi).
+
+    ``rates`` - 1 birlik valyutaning UZS dagi qiymati (UZS ning o'zi 1.0).
+    ``version`` har bir muvaffaqiyatli yangilanishda oshadi, keshlar shu
+    bo'yicha eskiradi.
+    """
+
+    version: int
+    rates: Dict[str, float]
+    updated_at: datetime
+
+    def rate(self, from_currency: str, to_currency: str) -> float:
+        try:
+            return self.rates[from_currency] / self.rates[to_currency]
+        except KeyError:
+            raise ValueError(
+                f"Noto'g'ri valyuta kodi: {from_currency} yoki {to_currency}"
+            )
+
 
 class CurrencyApi:
-    """CBU.uz API orqali valyuta kurslarini olish"""
+    """CBU.uz API orqali valyuta kurslarini olish.
+
+    Bir nechta jarayon bo'lsa CBU'ga faqat lider murojaat qiladi va
+    natijani ``rate_snapshot`` jadvaliga e'lon qiladi; qolganlar
+    (``is_leader=False``) kurslarni shu jadvaldan oladi. ``shared`` ulangan
+    bo'lsa bir xostdagi jarayonlardan faqat segment yozuvchisi yangilaydi,
+    qolganlari kurslarni shared memory'dan o'qiydi.
+    """
 
     def __init__(self):
         self.rates: Dict[str, float] = {}
         self.last_update: Optional[datetime] = None
         self.update_interval: int = 300  # 5 daqiqa
+        self.snapshot: Optional[RateSnapshot] = None
+        self.is_leader = False
+        self._published_checked_at = 0.0
+        self.shared: Optional[SharedRates] = None
         self.db = DataBase()
         self._session: Optional[aiohttp.ClientSession] = None
         self._url = "https://cbu.uz/uz/arkhiv-kursov-valyut/json/"  # CBU.uz API manzili
@@ -100,134 +140,154 @@ class CurrencyApi:
                 if changes:
                     logger.info("🔄 Kurslar o'zgardi:\n" + "\n".join(changes))
 
-            self.rates = new_rates
-            self.last_update = datetime.now()
+            fetched_at = datetime.now()
+            current = self.snapshot.version if self.snapshot else 0
+            try:
+                # Boshqa jarayonlar uchun; versiyani faqat baza beradi
+                version = await self.db.publish_rate_snapshot(new_rates, fetched_at)
+            except Exception as e:
+                logger.error(
+                    f"Kurslarni e'lon qilib bo'lmadi (joriy versiya {current}): {e}"
+                )
+                if self.snapshot is not None:
+                    # Versiya bazadagidan oldinga ketmasin: kesh kalitlari
+                    # (inline, kunlik xabar) versiyaga bog'liq. Scheduler qayta urinadi
+                    return False
+                # Hali hech qanday kurs yo'q: faqat shu jarayon uchun, bazada
+                # hech qachon berilmaydigan 0-versiya bilan
+                version = 0
+            self._adopt(version, new_rates, fetched_at)
             return True
 
         except Exception as e:
             logger.error(f"Kurslarni yangilashda xato: {e}")
             return False
 
-    async def get_rate(
-        self, from_currency: str, to_currency: str
-    ) -> Tuple[float, datetime]:
-        """Konvertatsiya kursini hisoblash"""
-        if (
+    def _adopt(self, version: int, rates: Dict[str, float], fetched_at: datetime):
+        self.rates = rates
+        self.last_update = fetched_at
+        self.snapshot = RateSnapshot(
+            version=version, rates={**rates, "UZS": 1.0}, updated_at=fetched_at
+        )
+        if self.shared is not None and self.shared.is_writer:
+            try:
+                self.shared.publish(version, rates, fetched_at)
+            except Exception as e:
+                logger.error(f"Umumiy kurslarni yozishda xato: {e}")
+
+    def attach_shared(self, shared: SharedRates):
+        """Xostdagi umumiy segmentni ulash (o'quvchi bo'lsa darhol o'qiladi)"""
+        self.shared = shared
+        if shared.is_writer and self.snapshot is not None:
+            self._adopt(self.snapshot.version, self.rates, self.last_update)
+        self._sync_shared()
+
+    def _sync_shared(self) -> bool:
+        """O'quvchi: segmentda yangiroq versiya bo'lsa uni olish"""
+        if self.shared is None or self.shared.is_writer:
+            return False
+        current = self.snapshot.version if self.snapshot else 0
+        if self.shared.peek() <= current:
+            return False
+        row = self.shared.read(newer_than=current)
+        if row is None:
+            return False
+        self._adopt(*row)
+        return True
+
+    async def load_published(self, force: bool = False) -> bool:
+        """Lider e'lon qilgan yangi kurslarni olish (FOLLOW_INTERVAL da bir marta)"""
+        if self.shared is not None and not self.shared.is_writer:
+            # Bazani xostdagi segment yozuvchisi kuzatadi
+            if self._sync_shared():
+                return True
+            if not self.is_stale():
+                return False
+        now = time.monotonic()
+        if not force and now - self._published_checked_at < FOLLOW_INTERVAL:
+            return False
+        self._published_checked_at = now
+        if self.shared is not None and not self.shared.is_writer:
+            # Nusxa eskirgan: yozuvchi chiqib ketgan bo'lsa uning o'rnini olish
+            self.shared.reopen()
+        try:
+            row = await self.db.get_rate_snapshot(
+                newer_than=self.snapshot.version if self.snapshot else 0
+            )
+        except Exception:
+            return False
+        if row is None:
+            return False
+        version, rates, fetched_at = row
+        self._adopt(
+            version, {code: float(rate) for code, rate in rates.items()}, fetched_at
+        )
+        logger.debug(f"E'lon qilingan kurslar olindi (versiya {version})")
+        return True
+
+    async def refresh(self) -> bool:
+        """Lider - CBU'dan, follower - lider e'lon qilgan nusxadan yangilash"""
+        if self.is_leader:
+            return await self.update_rates()
+        if await self.load_published(force=self.snapshot is None):
+            return True
+        # Hali hech kim e'lon qilmagan (birinchi ishga tushish)
+        if self.snapshot is None:
+            return await self.update_rates()
+        return False
+
+    def is_stale(self) -> bool:
+        return (
             not self.rates
             or not self.last_update
             or (datetime.now() - self.last_update).seconds > self.update_interval
-        ):
-            if not await self.update_rates():
+        )
+
+    async def get_snapshot(self) -> RateSnapshot:
+        """Joriy kurslar nusxasi (eskirgan bo'lsa avval yangilanadi).
+
+        Yuklama yuqori paytda mavjud nusxa eskirgan bo'lsa ham qaytariladi,
+        yangilashni fon task'i bajaradi.
+        """
+        self._sync_shared()
+        if self.snapshot is not None and overload.degraded:
+            return self.snapshot
+        if self.is_stale():
+            # Follower lider yangilaguncha mavjud nusxa bilan ishlaydi
+            if not await self.refresh() and (self.is_leader or self.snapshot is None):
                 raise ValueError("Kurslarni yangilashda xatolik")
+        return self.snapshot
 
-        try:
-            if from_currency == "UZS":
-                rate = 1 / self.rates[to_currency]
-            elif to_currency == "UZS":
-                rate = self.rates[from_currency]
-            else:
-                rate = self.rates[from_currency] / self.rates[to_currency]
-            return rate, self.last_update
+    async def get_rate(
+        self, from_currency: str, to_currency: str
+    ) -> Tuple[float, datetime]:
+        """Konvertatsiya kursini hisoblash"""
+        snapshot = await self.get_snapshot()
 
-        except KeyError:
+        try:
+            return snapshot.rate(from_currency, to_currency), snapshot.updated_at
+        except ValueError:
             logger.error(f"Noto'g'ri valyuta kodi: {from_currency} yoki {to_currency}")
             raise ValueError("Noto'g'ri valyuta kodi")
         except Exception as e:
             logger.error(f"Kursni hisoblashda xatolik: {e}")
             raise
 
-    async def send_daily_notification(self, bot):
-        """Kunlik valyuta kurslari haqida xabar yuborish"""
-        try:
-            if not await self.update_rates():
-                logger.error("Kunlik xabar uchun kurslarni yangilab bo'lmadi")
-                return
-
-            # Joriy vaqtni Toshkent vaqtiga o'tkazish
-            tz_tashkent = pytz.timezone("Asia/Tashkent")
-            update_time = datetime.now(pytz.UTC).astimezone(tz_tashkent)
-
-            message = (
-                "💰 Bugungi valyuta kurslari (CBU.uz):\n\n"
-                f"🇺🇸 1 USD = {self.rates.get('USD', 0):,.2f} UZS\n"
-                f"🇪🇺 1 EUR = {self.rates.get('EUR', 0):,.2f} UZS\n"
-                f"🇬🇧 1 GBP = {self.rates.get('GBP', 0):,.2f} UZS\n"
-                f"🇷🇺 1 RUB = {self.rates.get('RUB', 0):,.2f} UZS\n\n"
-                f"🕐 Yangilangan vaqt: {update_time.strftime('%H:%M')}"
-            )
-
-            users = await self.db.get_all_users()
-            sent = 0
-            failed = 0
-
-            for user in users:
-                try:
-                    await bot.send_message(chat_id=user["user_id"], text=message)
-                    sent += 1
-                    await asyncio.sleep(0.05)  # Anti-flood
-                except Exception as e:
-                    failed += 1
-                    logger.error(f"Xabar yuborishda xato {user['user_id']}: {e}")
-
-            logger.info(f"Kunlik xabar: {sent} ta yuborildi, {failed} ta xato")
-
-        except Exception as e:
-            logger.error(f"Kunlik xabar yuborishda xato: {e}")
-
 
 # Global instance
 currency_api = CurrencyApi()
 
 
-async def currency_update_task():
-    """Har 5 daqiqada kurslarni yangilash"""
-    while True:
-        try:
-            if await currency_api.update_rates():
-                logger.info(
-                    f"Kurslar yangilandi: {currency_api.last_update.strftime('%H:%M:%S')}"
-                )
-            else:
-                logger.error("Kurslarni yangilashda xatolik")
-        except Exception as e:
-            logger.error(f"Update task xatolik: {e}")
-        await asyncio.sleep(300)  # 5 daqiqa
-
-
-import pytz
-from datetime import datetime, timedelta
-import asyncio
-import logging
-
-logger = logging.getLogger(__name__)
+async def follow_rates_job():
+    """Follower: lider e'lon qilgan kurslarni kuzatib borish (scheduler ishi)"""
+    await currency_api.load_published(force=True)
 
 
-def toshkent_now() -> datetime:
-    """Toshkent vaqtini olish"""
-    toshkent_zone = pytz.timezone("Asia/Tashkent")
-    return datetime.now(toshkent_zone).replace(tzinfo=None)
-
-
-async def daily_notification_task(bot):
-    """Har kuni Toshkent vaqti bilan soat 7:30 da xabar yuborish"""
-    target_hour, target_minute = 7, 30
-
-    while True:
-        now = toshkent_now()
-        next_run = now.replace(
-            hour=target_hour, minute=target_minute, second=0, microsecond=0
-        )
-
-        # Agar vaqt o'tgan bo'lsa, ertangi kunni hisoblang
-        if now >= next_run:
-            next_run += timedelta(days=1)
-
-        wait_seconds = (next_run - now).total_seconds()
-        logger.info(
-            f"Keyingi xabar yuborish vaqti: {next_run} "
-            f"(Toshkent vaqti bilan {next_run.strftime('%H:%M')})"
-            f"({wait_seconds} soniya)"
-        )
+async def update_rates_job():
+    """Lider: kurslarni CBU'dan yangilash va e'lon qilish (scheduler ishi).
 
-        await asyncio.sleep(wait_seconds)
-        await currency_api.send_daily_notification(bot)
+    Xato ko'tariladi, scheduler qisqaroq oraliqda qayta urinadi.
+    """
+    if not await currency_api.update_rates():
+        raise RuntimeError("Kurslarni yangilashda xatolik")
+    logger.info(f"Kurslar yangilandi: {currency_api.last_update.strftime('%H:%M:%S')}")
@@ -1,10 +1,12 @@
 # utils/database/db.py
 import logging
 from datetime import datetime
+from typing import Optional
 import psycopg2
 from aiogram.client import bot
-from psycopg2.extras import DictCursor
+from psycopg2.extras import DictCursor, Json, execute_values
 from data.config import load_config
+from utils.misc.subscription import channel_cache, membership_index
 
 logger = logging.getLogger(__name__)
 
@@ -34,7 +36,7 @@ class DataBase:
         """Bazadagi barcha kanallarni olish."""
         with await self.get_connection() as conn:
             with conn.cursor(cursor_factory=DictCursor) as cur:
-                query = "SELECT id, name, link, channel_id FROM subscription;"
+                query = "SELECT id, name, link, channel_id, slot FROM subscription;"
                 cur.execute(query)
                 subscriptions = cur.fetchall()
                 return subscriptions
@@ -52,23 +54,36 @@ class DataBase:
                     return f"❌ Kanal allaqachon qo'shilgan. {name} ({link})"
 
                 # Kanalni bazaga qo'shish
+                # A'zolik indeksi uchun eng kichik bo'sh slot (0..62); joy
+                # qolmasa NULL - bunday kanal faqat so'rov orqali tekshiriladi
                 insert_query = """
-                    INSERT INTO subscription (name, link, channel_id)
-                    VALUES (%s, %s, %s)
+                    INSERT INTO subscription (name, link, channel_id, slot)
+                    VALUES (%s, %s, %s, (
+                        SELECT MIN(s) FROM generate_series(0, 62) s
+                        WHERE s NOT IN (
+                            SELECT slot FROM subscription WHERE slot IS NOT NULL
+                        )
+                    ))
                     RETURNING name;
                 """
                 cur.execute(insert_query, (name, link, channel_id))
                 subscription_name = cur.fetchone()
                 conn.commit()
+                channel_cache.invalidate()
                 return f"✅ Kanal muvaffaqiyatli qo'shildi! Subscription name: {subscription_name[0]}"
 
     async def delete_subscription(self, subscription_id):
         """Bazadan kanalni o'chirish."""
         with await self.get_connection() as conn:
             with conn.cursor() as cur:
-                query = "DELETE FROM subscription WHERE id = %s;"
+                query = "DELETE FROM subscription WHERE id = %s RETURNING slot;"
                 cur.execute(query, (subscription_id,))
+                row = cur.fetchone()
                 conn.commit()
+                channel_cache.invalidate()
+                # Bazadagi bitlarni trigger tozalaydi, xotiradagisini shu yerda
+                if row and row[0] is not None:
+                    membership_index.clear_slot(row[0])
 
     async def update_subscription(
         self, subscription_id, name=None, link=None, channel_id=None
@@ -94,9 +109,14 @@ class DataBase:
 
                 params.append(subscription_id)
 
-                query = f"UPDATE subscription SET {', '.join(parts)} WHERE id = %s;"
+                query = f"UPDATE subscription SET {', '.join(parts)} WHERE id = %s RETURNING slot;"
                 cur.execute(query, params)
+                row = cur.fetchone()
                 conn.commit()
+                channel_cache.invalidate()
+                # Kanal almashtirilsa eski a'zolik bitlari yaroqsiz
+                if (link or channel_id) and row and row[0] is not None:
+                    membership_index.clear_slot(row[0])
                 return f"✅ Subscription ID {subscription_id} yangilandi!"
 
     async def count_users(self) -> int:
@@ -104,7 +124,7 @@ class DataBase:
         conn = await self.get_connection()
         try:
             cur = conn.cursor()
-            cur.execute("SELECT COUNT(*) FROM users WHERE is_active = TRUE")
+            cur.execute("SELECT COALESCE(SUM(active_users), 0) FROM daily_user_stats")
             count = cur.fetchone()[0]
             logger.debug(f"Total active users count: {count}")
             return count
@@ -120,9 +140,10 @@ class DataBase:
         try:
             cur = conn.cursor()
             cur.execute(
-                "SELECT COUNT(*) FROM users WHERE DATE(created_at) = %s", (date,)
+                "SELECT new_users FROM daily_user_stats WHERE day = %s", (date,)
             )
-            count = cur.fetchone()[0]
+            row = cur.fetchone()
+            count = row[0] if row else 0
             logger.debug(f"Users count for date {date}: {count}")
             return count
         except Exception as e:
@@ -131,6 +152,40 @@ class DataBase:
         finally:
             conn.close()
 
+    async def get_daily_stats(self, date: datetime.date, days: int = 7) -> dict:
+        """Jami faol foydalanuvchilar va so'nggi kunlardagi yangi foydalanuvchilar.
+
+        Bitta so'rov bilan ``daily_user_stats`` jadvalidan o'qiladi, ``daily``
+        ro'yxati ``date`` dan boshlab kamayish tartibida bo'ladi.
+        """
+        conn = await self.get_connection()
+        try:
+            cur = conn.cursor()
+            query = """
+                SELECT
+                    (SELECT COALESCE(SUM(active_users), 0) FROM daily_user_stats),
+                    d.day::date,
+                    COALESCE(s.new_users, 0)
+                FROM generate_series(
+                    %s::date - %s, %s::date, INTERVAL '1 day'
+                ) AS d(day)
+                LEFT JOIN daily_user_stats s ON s.day = d.day::date
+                ORDER BY d.day DESC
+            """
+            cur.execute(query, (date, days - 1, date))
+            rows = cur.fetchall()
+            stats = {
+                "total_users": rows[0][0] if rows else 0,
+                "daily": [(row[1], row[2]) for row in rows],
+            }
+            logger.debug(f"Daily stats: {stats}")
+            return stats
+        except Exception as e:
+            logger.error(f"Error fetching daily stats: {e}")
+            return {"total_users": 0, "daily": []}
+        finally:
+            conn.close()
+
     async def get_all_users(self):
         """Barcha faol foydalanuvchilarni qaytaradi"""
         conn = await self.get_connection()
@@ -192,10 +247,6 @@ class DataBase:
                         WHEN EXCLUDED.phone_number IS NOT NULL THEN EXCLUDED.phone_number
                         ELSE users.phone_number
                     END,
-                    is_premium = CASE 
-                        WHEN EXCLUDED.is_premium != users.is_premium THEN EXCLUDED.is_premium
-                        ELSE users.is_premium
-                    END,
                     last_active_at = CURRENT_TIMESTAMP
                 RETURNING id
             """
@@ -214,6 +265,34 @@ class DataBase:
         finally:
             conn.close()
 
+    async def upsert_users(self, rows: list[tuple[int, str, str]]) -> int:
+        """(user_id, username, full_name) qatorlarini bitta so'rovda qo'shish/yangilash"""
+        if not rows:
+            return 0
+
+        conn = await self.get_connection()
+        try:
+            cur = conn.cursor()
+            query = """
+                INSERT INTO users (user_id, username, full_name)
+                VALUES %s
+                ON CONFLICT (user_id)
+                DO UPDATE SET
+                    username = EXCLUDED.username,
+                    full_name = EXCLUDED.full_name,
+                    last_active_at = CURRENT_TIMESTAMP
+            """
+            execute_values(cur, query, rows, page_size=1000)
+            count = cur.rowcount
+            conn.commit()
+            return count
+        except Exception as e:
+            logger.error(f"Foydalanuvchilarni yozishda xato: {e}")
+            conn.rollback()
+            raise
+        finally:
+            conn.close()
+
     async def update_user_activity(self, user_id: int):
         """Foydalanuvchi faolligini yangilash"""
         conn = await self.get_connection()
@@ -409,19 +488,396 @@ class DataBase:
         finally:
             conn.close()
 
-    async def count_premium_users(self) -> int:
-        """Premium foydalanuvchilar sonini olish"""
+    async def get_premium_rows(self, since: Optional[datetime] = None):
+        """Premium status ma'lumotlari (keshni to'ldirish va sinxronlash uchun).
+
+        ``since`` berilmasa hozirgi premium foydalanuvchilar, berilsa shu
+        vaqtdan keyin statusi o'zgarganlar (o'chirilganlari ham).
+        """
+        conn = await self.get_connection()
+        try:
+            cur = conn.cursor(cursor_factory=DictCursor)
+            if since is None:
+                cur.execute(
+                    """
+                    SELECT user_id, is_premium, premium_expire_date, premium_updated_at
+                    FROM users
+                    WHERE is_premium = TRUE
+                """
+                )
+            else:
+                cur.execute(
+                    """
+                    SELECT user_id, is_premium, premium_expire_date, premium_updated_at
+                    FROM users
+                    WHERE premium_updated_at > %s
+                """,
+                    (since,),
+                )
+            rows = cur.fetchall()
+            logger.debug(f"Premium keshi uchun yuklangan qatorlar: {len(rows)}")
+            return rows
+        except Exception as e:
+            logger.error(f"Premium qatorlarini olishda xato: {e}")
+            raise
+        finally:
+            conn.close()
+
+    async def expire_premium_batch(self, expired: list[tuple[int, datetime]]) -> int:
+        """Muddati tugagan premiumlarni bitta tranzaksiyada o'chirish va tarixga yozish.
+
+        Faqat ``premium_expire_date`` o'zgarmagan qatorlar yangilanadi, shuning
+        uchun shu orada uzaytirilgan premium bekor qilinmaydi.
+        """
+        if not expired:
+            return 0
+
+        conn = await self.get_connection()
+        try:
+            cur = conn.cursor()
+            query = """
+                WITH expired (user_id, expire_date) AS (VALUES %s),
+                updated AS (
+                    UPDATE users u
+                    SET is_premium = FALSE,
+                        premium_updated_at = CURRENT_TIMESTAMP
+                    FROM expired e
+                    WHERE u.user_id = e.user_id
+                        AND u.is_premium = TRUE
+                        AND u.premium_expire_date = e.expire_date
+                    RETURNING u.user_id, u.premium_expire_date
+                )
+                INSERT INTO premium_history (user_id, action_type, expire_date)
+                SELECT user_id, 'expire', premium_expire_date FROM updated
+            """
+            execute_values(
+                cur,
+                query,
+                expired,
+                template="(%s::bigint, %s::timestamp)",
+                page_size=len(expired),
+            )
+            count = cur.rowcount
+            conn.commit()
+            logger.debug(f"Muddati tugagan premiumlar: {count}/{len(expired)}")
+            return count
+        except Exception as e:
+            logger.error(f"Premium muddatini yakunlashda xato: {e}")
+            conn.rollback()
+            raise
+        finally:
+            conn.close()
+
+    async def get_export_watermark(self, name: str):
+        """Delta eksport uchun oxirgi saqlangan chegara (yo'q bo'lsa None)"""
         conn = await self.get_connection()
         try:
             cur = conn.cursor()
             cur.execute(
-                "SELECT COUNT(*) FROM users WHERE is_premium = TRUE AND is_active = TRUE"
+                "SELECT watermark FROM export_watermarks WHERE name = %s", (name,)
             )
-            count = cur.fetchone()[0]
-            logger.debug(f"Premium foydalanuvchilar soni: {count}")
+            row = cur.fetchone()
+            return row[0] if row else None
+        except Exception as e:
+            logger.error(f"Eksport watermark'ini olishda xato {name}: {e}")
+            raise
+        finally:
+            conn.close()
+
+    async def set_export_watermark(self, name: str, watermark: datetime):
+        """Delta eksport muvaffaqiyatli yuborilgandan keyin chegarani saqlash"""
+        conn = await self.get_connection()
+        try:
+            cur = conn.cursor()
+            cur.execute(
+                """
+                INSERT INTO export_watermarks (name, watermark)
+                VALUES (%s, %s)
+                ON CONFLICT (name) DO UPDATE SET
+                    watermark = GREATEST(export_watermarks.watermark, EXCLUDED.watermark),
+                    updated_at = CURRENT_TIMESTAMP
+                """,
+                (name, watermark),
+            )
+            conn.commit()
+        except Exception as e:
+            logger.error(f"Eksport watermark'ini saqlashda xato {name}: {e}")
+            conn.rollback()
+            raise
+        finally:
+            conn.close()
+
+    async def get_watermark_position(self, name: str):
+        """(watermark, last_id): chegara va undan keyingi oynada bajarilgan joy"""
+        conn = await self.get_connection()
+        try:
+            cur = conn.cursor()
+            cur.execute(
+                "SELECT watermark, last_id FROM export_watermarks WHERE name = %s",
+                (name,),
+            )
+            row = cur.fetchone()
+            return (row[0], row[1]) if row else (None, None)
+        except Exception as e:
+            logger.error(f"Watermark holatini olishda xato {name}: {e}")
+            raise
+        finally:
+            conn.close()
+
+    async def set_watermark_position(
+        self, name: str, watermark: datetime, last_id: Optional[int]
+    ):
+        """Chegara va keyingi oynadagi joyni saqlash (chegara orqaga qaytmaydi)"""
+        conn = await self.get_connection()
+        try:
+            cur = conn.cursor()
+            cur.execute(
+                """
+                INSERT INTO export_watermarks (name, watermark, last_id)
+                VALUES (%s, %s, %s)
+                ON CONFLICT (name) DO UPDATE SET
+                    watermark = EXCLUDED.watermark,
+                    last_id = EXCLUDED.last_id,
+                    updated_at = CURRENT_TIMESTAMP
+                WHERE export_watermarks.watermark <= EXCLUDED.watermark
+                """,
+                (name, watermark, last_id),
+            )
+            conn.commit()
+        except Exception as e:
+            logger.error(f"Watermark holatini saqlashda xato {name}: {e}")
+            conn.rollback()
+            raise
+        finally:
+            conn.close()
+
+    async def get_channel_memberships(self, since: Optional[datetime] = None):
+        """A'zolik bitlari (user_id, member_bits, known_bits, updated_at).
+
+        ``since`` berilmasa indeksni to'ldirish uchun hammasi, berilsa shu
+        vaqtdan keyin o'zgarganlari (tozalangan qatorlar ham).
+        """
+        conn = await self.get_connection()
+        try:
+            cur = conn.cursor()
+            if since is None:
+                cur.execute(
+                    """
+                    SELECT user_id, member_bits, known_bits, updated_at
+                    FROM channel_membership
+                    WHERE known_bits <> 0
+                """
+                )
+            else:
+                cur.execute(
+                    """
+                    SELECT user_id, member_bits, known_bits, updated_at
+                    FROM channel_membership
+                    WHERE updated_at > %s
+                """,
+                    (since,),
+                )
+            rows = cur.fetchall()
+            logger.debug(f"A'zolik indeksi uchun yuklangan qatorlar: {len(rows)}")
+            return rows
+        except Exception as e:
+            logger.error(f"A'zolik indeksini olishda xato: {e}")
+            raise
+        finally:
+            conn.close()
+
+    async def set_channel_membership(self, user_id: int, slot: int, is_member: bool):
+        """Bitta kanal bo'yicha a'zolik bitini yozish"""
+        conn = await self.get_connection()
+        try:
+            cur = conn.cursor()
+            cur.execute(
+                """
+                INSERT INTO channel_membership (user_id, member_bits, known_bits)
+                VALUES (
+                    %(user_id)s,
+                    CASE WHEN %(is_member)s THEN %(bit)s::BIGINT ELSE 0 END,
+                    %(bit)s::BIGINT
+                )
+                ON CONFLICT (user_id) DO UPDATE SET
+                    member_bits = CASE WHEN %(is_member)s
+                        THEN channel_membership.member_bits | %(bit)s::BIGINT
+                        ELSE channel_membership.member_bits & ~%(bit)s::BIGINT
+                    END,
+                    known_bits = channel_membership.known_bits | %(bit)s::BIGINT,
+                    updated_at = CURRENT_TIMESTAMP
+                """,
+                {"user_id": user_id, "is_member": is_member, "bit": 1 << slot},
+            )
+            conn.commit()
+        except Exception as e:
+            logger.error(f"A'zolik bitini yozishda xato {user_id}: {e}")
+            conn.rollback()
+            raise
+        finally:
+            conn.close()
+
+    async def clear_membership_slot(self, slot: int) -> int:
+        """Kanal bo'yicha hodisalar kelmay qolganda (bot admin emas) slotni tozalash"""
+        conn = await self.get_connection()
+        try:
+            cur = conn.cursor()
+            cur.execute(
+                """
+                UPDATE channel_membership
+                SET member_bits = member_bits & ~%(bit)s::BIGINT,
+                    known_bits = known_bits & ~%(bit)s::BIGINT,
+                    updated_at = CURRENT_TIMESTAMP
+                WHERE known_bits & %(bit)s::BIGINT <> 0
+                """,
+                {"bit": 1 << slot},
+            )
+            count = cur.rowcount
+            conn.commit()
             return count
         except Exception as e:
-            logger.error(f"Premium foydalanuvchilarni sanashda xato: {e}")
-            return 0
+            logger.error(f"A'zolik slotini tozalashda xato {slot}: {e}")
+            conn.rollback()
+            raise
+        finally:
+            conn.close()
+
+    async def publish_rate_snapshot(
+        self, rates: dict[str, float], fetched_at: datetime
+    ) -> int:
+        """Lider: yangi kurslarni e'lon qilish, yangi versiyani qaytaradi"""
+        conn = await self.get_connection()
+        try:
+            cur = conn.cursor()
+            cur.execute(
+                """
+                INSERT INTO rate_snapshot (id, version, rates, fetched_at)
+                VALUES (TRUE, 1, %s, %s)
+                ON CONFLICT (id) DO UPDATE SET
+                    version = rate_snapshot.version + 1,
+                    rates = EXCLUDED.rates,
+                    fetched_at = EXCLUDED.fetched_at,
+                    published_at = CURRENT_TIMESTAMP
+                RETURNING version
+                """,
+                (Json(rates), fetched_at),
+            )
+            version = cur.fetchone()[0]
+            conn.commit()
+            return version
+        except Exception as e:
+            logger.error(f"Kurslarni e'lon qilishda xato: {e}")
+            conn.rollback()
+            raise
+        finally:
+            conn.close()
+
+    async def get_rate_snapshot(self, newer_than: int = 0):
+        """E'lon qilingan kurslar (version, rates, fetched_at); yangisi bo'lmasa None"""
+        conn = await self.get_connection()
+        try:
+            cur = conn.cursor()
+            cur.execute(
+                """
+                SELECT version, rates, fetched_at FROM rate_snapshot
+                WHERE id AND version > %s
+                """,
+                (newer_than,),
+            )
+            return cur.fetchone()
+        except Exception as e:
+            logger.error(f"E'lon qilingan kurslarni olishda xato: {e}")
+            raise
+        finally:
+            conn.close()
+
+    async def get_digest_preferences(self, user_id: int):
+        """Foydalanuvchining kunlik xabar sozlamalari; yozuv bo'lmasa None"""
+        conn = await self.get_connection()
+        try:
+            cur = conn.cursor(cursor_factory=DictCursor)
+            cur.execute(
+                """
+                SELECT enabled, local_minute, utc_offset, currencies, locale
+                FROM digest_preferences WHERE user_id = %s
+                """,
+                (user_id,),
+            )
+            return cur.fetchone()
+        except Exception as e:
+            logger.error(f"Kunlik xabar sozlamalarini olishda xato {user_id}: {e}")
+            raise
+        finally:
+            conn.close()
+
+    async def save_digest_preferences(
+        self,
+        user_id: int,
+        enabled: bool,
+        local_minute: int,
+        utc_offset: int,
+        currencies: list[str],
+        locale: str,
+    ):
+        conn = await self.get_connection()
+        try:
+            cur = conn.cursor()
+            cur.execute(
+                """
+                INSERT INTO digest_preferences (
+                    user_id, enabled, local_minute, utc_offset, currencies, locale
+                )
+                VALUES (%s, %s, %s, %s, %s, %s)
+                ON CONFLICT (user_id) DO UPDATE SET
+                    enabled = EXCLUDED.enabled,
+                    local_minute = EXCLUDED.local_minute,
+                    utc_offset = EXCLUDED.utc_offset,
+                    currencies = EXCLUDED.currencies,
+                    locale = EXCLUDED.locale,
+                    updated_at = CURRENT_TIMESTAMP
+                """,
+                (user_id, enabled, local_minute, utc_offset, currencies, locale),
+            )
+            conn.commit()
+        except Exception as e:
+            logger.error(f"Kunlik xabar sozlamalarini saqlashda xato {user_id}: {e}")
+            conn.rollback()
+            raise
+        finally:
+            conn.close()
+
+    async def get_digest_recipients(
+        self, delivery_minute: int, default_minute: int
+    ) -> list[tuple]:
+        """UTC bo'yicha shu daqiqada xabar oladiganlar: (user_id, currencies, locale).
+
+        user_id bo'yicha tartiblangan (yarim yuborilgan daqiqani davom ettirish
+        uchun). Sozlamasi yo'q foydalanuvchilar faqat ``default_minute`` da, currencies
+        va locale o'rnida None bilan qaytadi.
+        """
+        conn = await self.get_connection()
+        try:
+            cur = conn.cursor()
+            cur.execute(
+                """
+                SELECT p.user_id, p.currencies, p.locale
+                FROM digest_preferences p
+                JOIN users u ON u.user_id = p.user_id
+                WHERE p.enabled AND p.delivery_minute = %(minute)s AND u.is_active
+                UNION ALL
+                SELECT u.user_id, NULL, NULL
+                FROM users u
+                WHERE %(minute)s = %(default)s AND u.is_active
+                  AND NOT EXISTS (
+                      SELECT 1 FROM digest_preferences p WHERE p.user_id = u.user_id
+                  )
+                ORDER BY 1
+                """,
+                {"minute": delivery_minute, "default": default_minute},
+            )
+            return cur.fetchall()
+        except Exception as e:
+            logger.error(f"Kunlik xabar oluvchilarini olishda xato: {e}")
+            raise
         finally:
             conn.close()
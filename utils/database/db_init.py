@@ -1,12 +1,93 @@
 # utils/database/db_init.py
+import asyncio
 import logging
+import re
 import psycopg2
-import asyncio
+from psycopg2 import errors
 from data.config import load_config
+from utils.database.migrations import MIGRATIONS, Migration
 
 logger = logging.getLogger(__name__)
 config = load_config()
 
+# Bir nechta bot jarayoni bir vaqtda migratsiya qilmasligi uchun advisory lock kaliti
+MIGRATION_LOCK_ID = 7_310_001
+# Lock bo'sh bo'lmasa shuncha soniyadan keyin qayta urinish
+MIGRATION_LOCK_POLL = 0.5
+
+_CONCURRENT_INDEX_RE = re.compile(
+    r"CREATE\s+(?:UNIQUE\s+)?INDEX\s+CONCURRENTLY\s+IF\s+NOT\s+EXISTS\s+(\w+)",
+    re.IGNORECASE,
+)
+
+
+def _current_version(cur) -> int:
+    """Bazadagi sxema versiyasini olish (jadval bo'lmasa yaratiladi)"""
+    try:
+        cur.execute("SELECT COALESCE(MAX(version), 0) FROM schema_version;")
+        return cur.fetchone()[0]
+    except errors.UndefinedTable:
+        cur.execute("""
+            CREATE TABLE IF NOT EXISTS schema_version (
+                version INTEGER PRIMARY KEY,
+                name VARCHAR(128) NOT NULL,
+                applied_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+            );
+        """)
+        return 0
+
+
+def _index_is_invalid(cur, name: str) -> bool:
+    """CREATE INDEX CONCURRENTLY yarim yo'lda uzilsa indeks INVALID bo'lib qoladi"""
+    cur.execute(
+        "SELECT NOT indisvalid FROM pg_index WHERE indexrelid = to_regclass(%s);",
+        (name,),
+    )
+    row = cur.fetchone()
+    return bool(row and row[0])
+
+
+def _apply_migration(conn, migration: Migration):
+    """Bitta migratsiyani qo'llash va versiyani yozib qo'yish"""
+    logger.info(f"Applying migration {migration.version}: {migration.name}...")
+    record_query = "INSERT INTO schema_version (version, name) VALUES (%s, %s);"
+
+    if not migration.transactional:
+        # Autocommit rejimida: har bir so'rov alohida, IF NOT EXISTS tufayli qayta
+        # ishga tushirilsa ham xavfsiz. Lekin IF NOT EXISTS avvalgi urinishdan
+        # qolgan INVALID indeksni ham "bor" deb hisoblaydi: u qayta quriladi
+        with conn.cursor() as cur:
+            indexes = []
+            for statement in migration.statements:
+                match = _CONCURRENT_INDEX_RE.search(statement)
+                if match:
+                    index = match.group(1)
+                    indexes.append(index)
+                    if _index_is_invalid(cur, index):
+                        logger.warning(f"Invalid index {index}, rebuilding...")
+                        cur.execute(f"DROP INDEX CONCURRENTLY IF EXISTS {index};")
+                cur.execute(statement)
+            invalid = [index for index in indexes if _index_is_invalid(cur, index)]
+            if invalid:
+                raise psycopg2.DatabaseError(
+                    f"Migration {migration.version}: invalid indexes {invalid}"
+                )
+            cur.execute(record_query, (migration.version, migration.name))
+        return
+
+    conn.autocommit = False
+    try:
+        with conn.cursor() as cur:
+            for statement in migration.statements:
+                cur.execute(statement)
+            cur.execute(record_query, (migration.version, migration.name))
+        conn.commit()
+    except Exception:
+        conn.rollback()
+        raise
+    finally:
+        conn.autocommit = True
+
 
 async def init_db():
     logger.info("Starting database initialization...")
@@ -20,83 +101,50 @@ async def init_db():
             "host": config.db.host,
             "port": config.db.port,
         }
-        logger.info(f"Trying to connect to database with params: {conn_params}")
+        logger.info(
+            f"Trying to connect to database {conn_params['dbname']} "
+            f"at {conn_params['host']}:{conn_params['port']}"
+        )
 
         conn = psycopg2.connect(**conn_params)
+        conn.autocommit = True
         cur = conn.cursor()
 
-        logger.info("Checking if 'users' table exists...")
-        cur.execute("""
-            SELECT EXISTS (
-                SELECT 1 
-                FROM information_schema.tables 
-                WHERE table_name = 'users'
-            );
-        """)
-        users_table_exists = cur.fetchone()[0]
-
-        if not users_table_exists:
-            # Jadval mavjud bo'lmasa — yaratamiz
-            logger.info("Creating 'users' table...")
-            create_users_table_query = """
-                CREATE TABLE users (
-                    id SERIAL PRIMARY KEY,
-                    user_id BIGINT UNIQUE,
-                    username VARCHAR(32),
-                    full_name VARCHAR(128),
-                    phone_number VARCHAR(20),
-                    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-                    last_active_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-                    is_active BOOLEAN DEFAULT TRUE,
-                    is_premium BOOLEAN DEFAULT FALSE
-                );
-            """
-            cur.execute(create_users_table_query)
-            conn.commit()
-            logger.info("'users' table created successfully!")
-        else:
-            logger.info("'users' table already exists. Skipping creation.")
-
-
-        logger.info("Checking if 'subscription' table exists...")
-        cur.execute("""
-            SELECT EXISTS (
-                SELECT 1 
-                FROM information_schema.tables 
-                WHERE table_name = 'subscription'
-            );
-        """)
-        subscription_table_exists = cur.fetchone()[0]
-
-        if not subscription_table_exists:
-            # Jadval mavjud bo'lmasa — yaratamiz
-            logger.info("Creating 'subscription' table...")
-            create_subscription_table_query = """
-                CREATE TABLE subscription (
-                    id SERIAL PRIMARY KEY,
-                    name VARCHAR(255) NOT NULL,
-                    link VARCHAR(255) NOT NULL,
-                    channel_id BIGINT UNIQUE
-                );
-            """
-            cur.execute(create_subscription_table_query)
-            conn.commit()
-            logger.info("'subscription' table created successfully!")
-        else:
-            logger.info("'subscription' table already exists. Skipping creation.")
-
-        #
-        # Tekshirish (ixtiyoriy)
-        #
-        cur.execute(
-            "SELECT EXISTS (SELECT 1 FROM information_schema.tables WHERE table_name = 'users')"
-        )
-        table_exists = cur.fetchone()[0]
-        if table_exists:
-            logger.info("Verified: 'users' table exists in database.")
-        else:
-            logger.error("Table creation failed: 'users' table not found in database.")
+        latest = MIGRATIONS[-1].version
+        version = _current_version(cur)
+        if version >= latest:
+            logger.info(f"Database schema is up to date (version {version}).")
+            cur.close()
+            return True
+
+        # Boshqa jarayon ham migratsiya qilayotgan bo'lishi mumkin: lock olib,
+        # versiyani qayta tekshiramiz. pg_advisory_lock da kutilmaydi: kutayotgan
+        # so'rovning snapshot'i CREATE INDEX CONCURRENTLY ni kutdiradi, u esa
+        # lock egasida - deadlock. Shuning uchun lock so'rovlar orasida kutiladi
+        waiting = False
+        while True:
+            cur.execute("SELECT pg_try_advisory_lock(%s);", (MIGRATION_LOCK_ID,))
+            if cur.fetchone()[0]:
+                break
+            if _current_version(cur) >= latest:
+                logger.info("Database schema migrated by another process.")
+                cur.close()
+                return True
+            if not waiting:
+                logger.info("Waiting for another process to finish migrations...")
+                waiting = True
+            await asyncio.sleep(MIGRATION_LOCK_POLL)
+        try:
+            version = _current_version(cur)
+            for migration in MIGRATIONS:
+                if migration.version <= version:
+                    continue
+                _apply_migration(conn, migration)
+                version = migration.version
+        finally:
+            cur.execute("SELECT pg_advisory_unlock(%s);", (MIGRATION_LOCK_ID,))
 
+        logger.info(f"Database schema migrated to version {version}.")
         cur.close()
         return True
 
@@ -106,4 +154,4 @@ async def init_db():
     finally:
         if conn:
             conn.close()
-            logger.info("Database connection closed")
\ No newline at end of file
+            logger.info("Database connection closed")
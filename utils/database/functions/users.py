@@ -1,8 +1,8 @@
 # utils/database/functions/users.py
 import psycopg2
 from datetime import datetime
-import pandas as pd
 from data.config import load_config
+from utils.exports import export_users
 
 config = load_config()
 
@@ -104,38 +104,13 @@ class DatabaseManager:
 
     @staticmethod
     async def export_users_to_excel():
-        conn = await DatabaseManager.get_connection()
-        try:
-            # Ma'lumotlarni pandas DataFrame ga o'qish
-            query = """
-                SELECT 
-                    id, user_id, username, full_name, phone_number, 
-                    created_at, last_active_at, is_active, is_premium
-                FROM users
-                ORDER BY created_at DESC;
-            """
-            df = pd.read_sql_query(query, conn)
-
-            # Excel file yaratish
-            filename = f"users_export_{datetime.now().strftime('%Y%m%d_%H%M%S')}.xlsx"
-            writer = pd.ExcelWriter(f"data/files/{filename}", engine="xlsxwriter")
-
-            # DataFrameni Excel ga yozish
-            df.to_excel(writer, sheet_name="Users", index=False)
+        """Faol foydalanuvchilarni xlsx fayl(lar)ga eksport qilish.
 
-            # Excel file formatlash
-            workbook = writer.book
-            worksheet = writer.sheets["Users"]
-
-            # Ustun kengliklari
-            for i, col in enumerate(df.columns):
-                column_len = max(df[col].astype(str).apply(len).max(), len(col)) + 2
-                worksheet.set_column(i, i, column_len)
-
-            writer.close()
-            return filename
+        Natija: [(fayl nomi, bytes), ...]; 1 mln qatordan oshsa bir nechta fayl.
+        """
+        try:
+            result = await export_users("xlsx")
+            return result.files
         except Exception as e:
             print(f"Error exporting to Excel: {e}")
             return None
-        finally:
-            conn.close()
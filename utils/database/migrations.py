@@ -0,0 +1,294 @@
+# utils/database/migrations.py
+from dataclasses import dataclass
+
+
+@dataclass(frozen=True)
+class Migration:
+    version: int
+    name: str
+    statements: tuple[str, ...]
+    # CREATE INDEX CONCURRENTLY tranzaksiya ichida ishlamaydi, shuning uchun
+    # bunday migratsiyalar autocommit rejimida, har bir so'rov alohida bajariladi
+    transactional: bool = True
+
+
+CREATE_USERS_TABLE = """
+    CREATE TABLE IF NOT EXISTS users (
+        id SERIAL PRIMARY KEY,
+        user_id BIGINT UNIQUE,
+        username VARCHAR(32),
+        full_name VARCHAR(128),
+        phone_number VARCHAR(20),
+        created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+        last_active_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+        is_active BOOLEAN DEFAULT TRUE,
+        is_premium BOOLEAN DEFAULT FALSE
+    );
+"""
+
+CREATE_SUBSCRIPTION_TABLE = """
+    CREATE TABLE IF NOT EXISTS subscription (
+        id SERIAL PRIMARY KEY,
+        name VARCHAR(255) NOT NULL,
+        link VARCHAR(255) NOT NULL,
+        channel_id BIGINT UNIQUE
+    );
+"""
+
+# users jadvaliga yozilganda kunlik statistikani trigger orqali yangilab boradi.
+# LOCK qayta hisoblash paytida qo'shilgan foydalanuvchilar tushib qolmasligi uchun kerak.
+CREATE_DAILY_USER_STATS = """
+    LOCK TABLE users IN SHARE ROW EXCLUSIVE MODE;
+
+    CREATE TABLE IF NOT EXISTS daily_user_stats (
+        day DATE PRIMARY KEY,
+        new_users INTEGER NOT NULL DEFAULT 0,
+        active_users INTEGER NOT NULL DEFAULT 0
+    );
+
+    CREATE OR REPLACE FUNCTION users_daily_stats_insert_delete() RETURNS TRIGGER AS $$
+    BEGIN
+        IF TG_OP = 'INSERT' THEN
+            INSERT INTO daily_user_stats (day, new_users, active_users)
+            VALUES (
+                DATE(NEW.created_at), 1,
+                CASE WHEN COALESCE(NEW.is_active, FALSE) THEN 1 ELSE 0 END
+            )
+            ON CONFLICT (day) DO UPDATE SET
+                new_users = daily_user_stats.new_users + 1,
+                active_users = daily_user_stats.active_users + EXCLUDED.active_users;
+        ELSE
+            UPDATE daily_user_stats
+            SET new_users = new_users - 1,
+                active_users = active_users
+                    - CASE WHEN COALESCE(OLD.is_active, FALSE) THEN 1 ELSE 0 END
+            WHERE day = DATE(OLD.created_at);
+        END IF;
+        RETURN NULL;
+    END;
+    $$ LANGUAGE plpgsql;
+
+    CREATE OR REPLACE FUNCTION users_daily_stats_activity() RETURNS TRIGGER AS $$
+    BEGIN
+        UPDATE daily_user_stats
+        SET active_users = active_users
+            + CASE WHEN COALESCE(NEW.is_active, FALSE) THEN 1 ELSE 0 END
+            - CASE WHEN COALESCE(OLD.is_active, FALSE) THEN 1 ELSE 0 END
+        WHERE day = DATE(NEW.created_at);
+        RETURN NULL;
+    END;
+    $$ LANGUAGE plpgsql;
+
+    DROP TRIGGER IF EXISTS users_daily_stats_insert_delete ON users;
+    CREATE TRIGGER users_daily_stats_insert_delete
+    AFTER INSERT OR DELETE ON users
+    FOR EACH ROW EXECUTE FUNCTION users_daily_stats_insert_delete();
+
+    DROP TRIGGER IF EXISTS users_daily_stats_activity ON users;
+    CREATE TRIGGER users_daily_stats_activity
+    AFTER UPDATE OF is_active ON users
+    FOR EACH ROW
+    WHEN (OLD.is_active IS DISTINCT FROM NEW.is_active)
+    EXECUTE FUNCTION users_daily_stats_activity();
+
+    TRUNCATE daily_user_stats;
+    INSERT INTO daily_user_stats (day, new_users, active_users)
+    SELECT DATE(created_at), COUNT(*), COUNT(*) FILTER (WHERE is_active)
+    FROM users
+    WHERE created_at IS NOT NULL
+    GROUP BY DATE(created_at);
+"""
+
+ADD_PREMIUM_OBJECTS = """
+    ALTER TABLE users
+        ADD COLUMN IF NOT EXISTS premium_expire_date TIMESTAMP,
+        ADD COLUMN IF NOT EXISTS premium_updated_at TIMESTAMP;
+
+    CREATE TABLE IF NOT EXISTS premium_history (
+        id SERIAL PRIMARY KEY,
+        user_id BIGINT NOT NULL,
+        action_type VARCHAR(16) NOT NULL,
+        expire_date TIMESTAMP,
+        created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+    );
+"""
+
+# Delta eksport uchun: har qanday UPDATE updated_at ni yangilaydi
+ADD_USERS_UPDATED_AT = """
+    ALTER TABLE users
+        ADD COLUMN IF NOT EXISTS updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP;
+
+    CREATE OR REPLACE FUNCTION users_touch_updated_at() RETURNS TRIGGER AS $$
+    BEGIN
+        NEW.updated_at = CURRENT_TIMESTAMP;
+        RETURN NEW;
+    END;
+    $$ LANGUAGE plpgsql;
+
+    DROP TRIGGER IF EXISTS users_touch_updated_at ON users;
+    CREATE TRIGGER users_touch_updated_at
+    BEFORE UPDATE ON users
+    FOR EACH ROW EXECUTE FUNCTION users_touch_updated_at();
+
+    CREATE TABLE IF NOT EXISTS export_watermarks (
+        name VARCHAR(64) PRIMARY KEY,
+        watermark TIMESTAMP NOT NULL,
+        updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+    );
+"""
+
+# chat_member hodisalaridan yig'iladigan a'zolik indeksi. Har bir kanalga
+# 0..62 oralig'ida doimiy slot beriladi; foydalanuvchi uchun bitta qator:
+# member_bits - a'zo bo'lgan kanallar, known_bits - hodisa kelgan kanallar.
+# Kanal o'chirilsa yoki almashtirilsa uning sloti barcha qatorlarda tozalanadi.
+ADD_CHANNEL_MEMBERSHIP = """
+    ALTER TABLE subscription ADD COLUMN IF NOT EXISTS slot SMALLINT
+        CHECK (slot BETWEEN 0 AND 62);
+
+    UPDATE subscription s
+    SET slot = t.rn - 1
+    FROM (
+        SELECT id, row_number() OVER (ORDER BY id) AS rn FROM subscription
+    ) t
+    WHERE s.id = t.id AND t.rn <= 63;
+
+    CREATE UNIQUE INDEX IF NOT EXISTS idx_subscription_slot ON subscription (slot);
+
+    CREATE TABLE IF NOT EXISTS channel_membership (
+        user_id BIGINT PRIMARY KEY,
+        member_bits BIGINT NOT NULL DEFAULT 0,
+        known_bits BIGINT NOT NULL DEFAULT 0,
+        updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+    );
+
+    CREATE OR REPLACE FUNCTION subscription_clear_membership_slot() RETURNS TRIGGER AS $$
+    BEGIN
+        IF TG_OP = 'UPDATE'
+            AND OLD.channel_id IS NOT DISTINCT FROM NEW.channel_id
+            AND OLD.link IS NOT DISTINCT FROM NEW.link
+            AND OLD.slot IS NOT DISTINCT FROM NEW.slot THEN
+            RETURN NULL;
+        END IF;
+        IF OLD.slot IS NOT NULL THEN
+            UPDATE channel_membership
+            SET member_bits = member_bits & ~(1::BIGINT << OLD.slot),
+                known_bits = known_bits & ~(1::BIGINT << OLD.slot),
+                updated_at = CURRENT_TIMESTAMP
+            WHERE known_bits & (1::BIGINT << OLD.slot) <> 0;
+        END IF;
+        RETURN NULL;
+    END;
+    $$ LANGUAGE plpgsql;
+
+    DROP TRIGGER IF EXISTS subscription_clear_membership_slot ON subscription;
+    CREATE TRIGGER subscription_clear_membership_slot
+    AFTER DELETE OR UPDATE OF channel_id, link, slot ON subscription
+    FOR EACH ROW EXECUTE FUNCTION subscription_clear_membership_slot();
+"""
+
+# Lider jarayon CBU'dan olgan kurslarni shu yagona qatorga yozadi, qolgan
+# jarayonlar o'qiydi. version har bir e'londa bazaning o'zida oshadi, lider
+# almashganda ham kamaymaydi.
+CREATE_RATE_SNAPSHOT = """
+    CREATE TABLE IF NOT EXISTS rate_snapshot (
+        id BOOLEAN PRIMARY KEY DEFAULT TRUE CHECK (id),
+        version BIGINT NOT NULL,
+        rates JSONB NOT NULL,
+        fetched_at TIMESTAMP NOT NULL,
+        published_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+    );
+"""
+
+# Kunlik xabar sozlamalari. Yozuvi yo'q foydalanuvchi standart sozlamani
+# oladi (07:30 Toshkent, USD/EUR/GBP/RUB). delivery_minute - UTC bo'yicha
+# kun boshidan daqiqa: scheduler har daqiqada shu qiymat bo'yicha tanlaydi.
+CREATE_DIGEST_PREFERENCES = """
+    CREATE TABLE IF NOT EXISTS digest_preferences (
+        user_id BIGINT PRIMARY KEY,
+        enabled BOOLEAN NOT NULL DEFAULT TRUE,
+        local_minute SMALLINT NOT NULL DEFAULT 450
+            CHECK (local_minute BETWEEN 0 AND 1439),
+        utc_offset SMALLINT NOT NULL DEFAULT 300
+            CHECK (utc_offset BETWEEN -720 AND 840),
+        currencies TEXT[] NOT NULL DEFAULT '{USD,EUR,GBP,RUB}',
+        locale VARCHAR(8) NOT NULL DEFAULT 'uz',
+        delivery_minute SMALLINT GENERATED ALWAYS AS (
+            ((local_minute - utc_offset) % 1440 + 1440) % 1440
+        ) STORED,
+        updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+    );
+
+    CREATE INDEX IF NOT EXISTS idx_digest_delivery_minute
+    ON digest_preferences (delivery_minute) WHERE enabled;
+"""
+
+
+# Tartib muhim: versiyalar faqat o'sib boradi, qo'llangan migratsiya o'zgartirilmaydi
+MIGRATIONS: tuple[Migration, ...] = (
+    Migration(
+        1,
+        "create_users_and_subscription",
+        (CREATE_USERS_TABLE, CREATE_SUBSCRIPTION_TABLE),
+    ),
+    Migration(2, "daily_user_stats_rollup", (CREATE_DAILY_USER_STATS,)),
+    Migration(3, "premium_columns_and_history", (ADD_PREMIUM_OBJECTS,)),
+    Migration(
+        4,
+        "performance_indexes",
+        (
+            # get_all_users: WHERE is_active = TRUE ORDER BY created_at DESC
+            "CREATE INDEX CONCURRENTLY IF NOT EXISTS idx_users_active_created "
+            "ON users (is_active, created_at DESC);",
+            "CREATE INDEX CONCURRENTLY IF NOT EXISTS idx_users_created_at "
+            "ON users (created_at);",
+            # Premium muddati tugaydigan foydalanuvchilarni yuklash
+            "CREATE INDEX CONCURRENTLY IF NOT EXISTS idx_users_premium_expire "
+            "ON users (premium_expire_date) WHERE is_premium = TRUE;",
+            "CREATE INDEX CONCURRENTLY IF NOT EXISTS idx_premium_history_user "
+            "ON premium_history (user_id, created_at);",
+        ),
+        transactional=False,
+    ),
+    Migration(5, "users_updated_at_and_export_watermarks", (ADD_USERS_UPDATED_AT,)),
+    Migration(
+        6,
+        "users_updated_at_index",
+        (
+            "CREATE INDEX CONCURRENTLY IF NOT EXISTS idx_users_updated_at "
+            "ON users (updated_at);",
+        ),
+        transactional=False,
+    ),
+    Migration(7, "channel_membership_index", (ADD_CHANNEL_MEMBERSHIP,)),
+    Migration(8, "rate_snapshot", (CREATE_RATE_SNAPSHOT,)),
+    Migration(9, "digest_preferences", (CREATE_DIGEST_PREFERENCES,)),
+    Migration(
+        10,
+        "channel_membership_updated_at_index",
+        (
+            # Jarayonlar orasidagi a'zolik sinxronlashi: updated_at > oxirgi
+            "CREATE INDEX CONCURRENTLY IF NOT EXISTS idx_channel_membership_updated_at "
+            "ON channel_membership (updated_at);",
+        ),
+        transactional=False,
+    ),
+    Migration(
+        11,
+        "users_premium_updated_at_index",
+        (
+            # Jarayonlar orasidagi premium sinxronlashi: premium_updated_at > oxirgi
+            "CREATE INDEX CONCURRENTLY IF NOT EXISTS idx_users_premium_updated_at "
+            "ON users (premium_updated_at);",
+        ),
+        transactional=False,
+    ),
+    Migration(
+        12,
+        "export_watermarks_last_id",
+        (
+            # Chegaradan keyingi oynada qaysi id gacha bajarilgani (kunlik xabar:
+            # yarim yuborilgan daqiqa qayta ishga tushganda boshidan yuborilmaydi)
+            "ALTER TABLE export_watermarks ADD COLUMN IF NOT EXISTS last_id BIGINT;",
+        ),
+    ),
+)
@@ -33,6 +33,8 @@ class User(Base):
     last_active_at = Column(DateTime, default=datetime.now, onupdate=datetime.now)
     is_active = Column(Boolean, default=True)
     is_premium = Column(Boolean, default=False)
+    premium_expire_date = Column(DateTime, nullable=True)
+    premium_updated_at = Column(DateTime, nullable=True)
 
     def __repr__(self):
         return f"User(id={self.id}, user_id={self.user_id}, username={self.username})"
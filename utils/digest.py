@@ -0,0 +1,241 @@
+# utils/digest.py
+import asyncio
+import logging
+import time
+from datetime import datetime, timezone
+from typing import Dict, Iterable, Optional, Tuple
+import pytz
+from keyboards.inline.currency_kb import SUPPORTED_CURRENCIES, get_currency_emoji
+from utils.currency_api import RateSnapshot, currency_api
+from utils.database.db import DataBase
+
+logger = logging.getLogger(__name__)
+
+# Sozlamasi yo'q foydalanuvchilar uchun (avvalgi yagona kunlik xabar)
+DEFAULT_DIGEST_MINUTE = 7 * 60 + 30
+DEFAULT_UTC_OFFSET = 5 * 60  # Toshkent
+DEFAULT_DIGEST_CURRENCIES: Tuple[str, ...] = ("USD", "EUR", "GBP", "RUB")
+DEFAULT_LOCALE = "uz"
+DIGEST_CURRENCIES: Tuple[str, ...] = tuple(
+    sorted(
+        (code for code in SUPPORTED_CURRENCIES if code != "UZS"),
+        key=lambda code: (
+            (
+                DEFAULT_DIGEST_CURRENCIES.index(code)
+                if code in DEFAULT_DIGEST_CURRENCIES
+                else len(DEFAULT_DIGEST_CURRENCIES)
+            ),
+            code,
+        ),
+    )
+)
+# Oldingi daqiqa uzoq davom etsa (07:30 dagi katta guruh) scheduler keyingi
+# ishga tushishlarni o'tkazadi; o'tkazilgan daqiqalar shu chegaragacha keyin
+# yuboriladi
+MAX_CATCH_UP_MINUTES = 180
+# Oxirgi to'liq yuborilgan daqiqa export_watermarks jadvalida shu nom bilan
+# saqlanadi: yangi lider (failover yoki qayta ishga tushish) shu joydan davom etadi
+DIGEST_WATERMARK_NAME = "daily_digest"
+# Daqiqa ichidagi joy shuncha xabardan keyin saqlanadi: uzilishda ko'pi bilan
+# shuncha foydalanuvchi xabarni ikki marta oladi
+DIGEST_PROGRESS_EVERY = 50
+# Telegram cheklovi ~30 xabar/s; avvalgi kunlik xabar bilan bir xil
+SEND_INTERVAL = 0.05
+TASHKENT = pytz.timezone("Asia/Tashkent")
+
+DIGEST_TEXTS: Dict[str, Dict[str, str]] = {
+    "uz": {
+        "title": "💰 Bugungi valyuta kurslari (CBU.uz):",
+        "updated": "🕐 Yangilangan vaqt",
+        "settings": "⚙️ Sozlash: /digest",
+    },
+    "ru": {
+        "title": "💰 Курсы валют на сегодня (CBU.uz):",
+        "updated": "🕐 Обновлено",
+        "settings": "⚙️ Настройки: /digest",
+    },
+    "en": {
+        "title": "💰 Today's exchange rates (CBU.uz):",
+        "updated": "🕐 Updated",
+        "settings": "⚙️ Settings: /digest",
+    },
+}
+
+
+def normalize_locale(language_code: Optional[str]) -> str:
+    """Telegram language_code -> qo'llab-quvvatlanadigan til (aks holda uz)"""
+    language = (language_code or "").split("-")[0].lower()
+    return language if language in DIGEST_TEXTS else DEFAULT_LOCALE
+
+
+def canonical_currencies(codes: Iterable[str]) -> Tuple[str, ...]:
+    """Bir xil to'plamlar bitta shablonga tushishi uchun tartiblangan kodlar"""
+    selected = set(codes)
+    return tuple(code for code in DIGEST_CURRENCIES if code in selected)
+
+
+def delivery_minute(local_minute: int, utc_offset: int) -> int:
+    """Foydalanuvchi vaqtidagi daqiqa -> UTC bo'yicha kun boshidan daqiqa"""
+    return (local_minute - utc_offset) % 1440
+
+
+DEFAULT_DELIVERY_MINUTE = delivery_minute(DEFAULT_DIGEST_MINUTE, DEFAULT_UTC_OFFSET)
+
+
+class DigestService:
+    """Shaxsiy kunlik xabarlar.
+
+    Scheduler har daqiqada ``send_due`` ni chaqiradi: shu UTC daqiqasiga
+    to'g'ri kelgan foydalanuvchilar bitta so'rovda olinadi va (valyutalar,
+    til) bo'yicha guruhlanadi. Har bir guruh matni kurslar versiyasi uchun
+    bir marta tayyorlanadi, shuning uchun ish hajmi foydalanuvchilar soniga
+    emas, turli shablonlar soniga bog'liq.
+    """
+
+    def __init__(self):
+        self.db = DataBase()
+        self._rendered: Dict[Tuple[Tuple[str, ...], str], str] = {}
+        self._rendered_version = 0
+        # Oxirgi to'liq yuborilgan daqiqa (unix vaqt // 60); None - bazadan
+        # o'qiladi. _last_user - keyingi daqiqada oxirgi yuborilgan user_id
+        self._last_minute: Optional[int] = None
+        self._last_user: Optional[int] = None
+        self.sent = 0
+        self.failed = 0
+        self.renders = 0
+
+    def render(
+        self, snapshot: RateSnapshot, currencies: Tuple[str, ...], locale: str
+    ) -> str:
+        """Shablon matni (kurslar versiyasi o'zgarmaguncha keshdan)"""
+        if snapshot.version != self._rendered_version:
+            self._rendered = {}
+            self._rendered_version = snapshot.version
+        key = (currencies, locale)
+        text = self._rendered.get(key)
+        if text is not None:
+            return text
+
+        texts = DIGEST_TEXTS[locale]
+        lines = [
+            f"{get_currency_emoji(code)} 1 {code} = "
+            f"{snapshot.rates.get(code, 0):,.2f} UZS"
+            for code in currencies
+        ]
+        updated_at = snapshot.updated_at.astimezone(TASHKENT)
+        text = (
+            f"{texts['title']}\n\n"
+            + "\n".join(lines)
+            + f"\n\n{texts['updated']}: {updated_at.strftime('%H:%M')}"
+            + f"\n{texts['settings']}"
+        )
+        self._rendered[key] = text
+        self.renders += 1
+        return text
+
+    async def _send_bucket(self, bot, minute: int):
+        """``minute`` (unix vaqt // 60) daqiqasi; ``_last_user`` dan keyingilarga"""
+        delivery = minute % 1440
+        recipients = await self.db.get_digest_recipients(
+            delivery, DEFAULT_DELIVERY_MINUTE
+        )
+        if not recipients:
+            return
+
+        snapshot = await currency_api.get_snapshot()
+        templates = set()
+        sent = failed = 0
+        # user_id tartibida: to'xtagan joy bitta son bilan saqlanadi
+        for user_id, currencies, locale in recipients:
+            if self._last_user is not None and user_id <= self._last_user:
+                continue
+            key = (
+                (
+                    canonical_currencies(currencies)
+                    if currencies
+                    else DEFAULT_DIGEST_CURRENCIES
+                ),
+                locale if locale in DIGEST_TEXTS else DEFAULT_LOCALE,
+            )
+            templates.add(key)
+            try:
+                await bot.send_message(
+                    chat_id=user_id, text=self.render(snapshot, *key)
+                )
+                sent += 1
+            except Exception as e:
+                failed += 1
+                logger.error(f"Xabar yuborishda xato {user_id}: {e}")
+            self._last_user = user_id
+            if (sent + failed) % DIGEST_PROGRESS_EVERY == 0:
+                await self._save_progress(minute - 1, user_id)
+            await asyncio.sleep(SEND_INTERVAL)  # Anti-flood
+
+        self.sent += sent
+        self.failed += failed
+        logger.info(
+            f"Kunlik xabar ({delivery // 60:02d}:{delivery % 60:02d} UTC): "
+            f"{sent} ta yuborildi, {failed} ta xato, {len(templates)} ta shablon"
+        )
+
+    def set_role(self, is_leader: bool):
+        """Lider roli o'zgarganda: keyingi ``send_due`` bazadagi chegaradan boshlaydi"""
+        self._last_minute = None
+        self._last_user = None
+
+    async def _load_progress(self):
+        watermark, last_user = await self.db.get_watermark_position(
+            DIGEST_WATERMARK_NAME
+        )
+        if watermark is None:
+            self._last_minute = self._last_user = None
+            return
+        self._last_minute = int(
+            watermark.replace(tzinfo=timezone.utc).timestamp() // 60
+        )
+        self._last_user = last_user
+
+    async def _save_progress(self, last_minute: int, last_user: Optional[int]):
+        """To'liq yuborilgan daqiqa va keyingi daqiqada oxirgi yuborilgan user_id"""
+        watermark = datetime.fromtimestamp(last_minute * 60, timezone.utc)
+        try:
+            await self.db.set_watermark_position(
+                DIGEST_WATERMARK_NAME, watermark.replace(tzinfo=None), last_user
+            )
+        except Exception as e:
+            # Xotiradagi holat baribir siljiydi: faqat failover'da oxirgi
+            # saqlangan joydan keyingilarga takror yuborilishi mumkin
+            logger.error(f"Kunlik xabar chegarasini saqlashda xato: {e}")
+
+    async def send_due(self, bot):
+        """Scheduler ishi: joriy (va o'tkazib yuborilgan) daqiqalarni yuborish"""
+        now_minute = int(time.time() // 60)
+        if self._last_minute is None:
+            await self._load_progress()
+        start = now_minute
+        if (
+            self._last_minute is not None
+            and now_minute - self._last_minute <= MAX_CATCH_UP_MINUTES
+        ):
+            start = self._last_minute + 1
+        else:
+            self._last_user = None
+        for minute in range(start, now_minute + 1):
+            # Xato bo'lsa shu daqiqa keyingi urinishda (yoki yangi liderda)
+            # _last_user dan keyin davom etadi
+            await self._send_bucket(bot, minute)
+            self._last_minute = minute
+            self._last_user = None
+            await self._save_progress(minute, None)
+
+    def stats(self) -> dict:
+        return {
+            "sent": self.sent,
+            "failed": self.failed,
+            "renders": self.renders,
+            "templates": len(self._rendered),
+        }
+
+
+# Global instance
+digest_service = DigestService()
@@ -0,0 +1,234 @@
+# utils/executor.py
+import asyncio
+import logging
+import time
+from collections import deque
+from typing import Awaitable, Callable, Dict, Hashable, List, Optional
+
+logger = logging.getLogger(__name__)
+
+# Navbatlar ustuvorligi bo'yicha (kichik raqam - yuqori ustuvorlik)
+LANE_CONVERSION = 0
+LANE_CALLBACK = 1
+LANE_ADMIN = 2
+LANE_NAMES = ("conversion", "callback", "admin")
+
+# Past ustuvorlikdagi navbat boshidagi ish shuncha kutgan bo'lsa, yuqori
+# navbatlar band bo'lsa ham navbat unga beriladi (och qolmaslik uchun)
+MAX_LANE_WAIT = 5.0
+
+Job = Callable[[], Awaitable]
+
+
+class LaneStats:
+    __slots__ = (
+        "submitted",
+        "completed",
+        "failed",
+        "dropped",
+        "wait_total",
+        "wait_max",
+    )
+
+    def __init__(self):
+        self.submitted = 0
+        self.completed = 0
+        self.failed = 0
+        self.dropped = 0
+        self.wait_total = 0.0
+        self.wait_max = 0.0
+
+    def as_dict(self, depth: int, running: int) -> dict:
+        started = self.completed + self.failed
+        return {
+            "depth": depth,
+            "running": running,
+            "submitted": self.submitted,
+            "completed": self.completed,
+            "failed": self.failed,
+            "dropped": self.dropped,
+            "wait_avg": self.wait_total / started if started else 0.0,
+            "wait_max": self.wait_max,
+        }
+
+
+class UpdateExecutor:
+    """Cheklangan update bajaruvchisi.
+
+    Bitta chat (kalit) ishlari kelgan tartibida, ketma-ket bajariladi; turli
+    chatlar ``workers`` tagacha parallel ishlaydi. Bo'sh worker avval
+    yuqori ustuvor navbatdagi chatni oladi. Admin navbatining bir vaqtdagi
+    ishlari ``admin_concurrency`` bilan cheklangan. Kutilayotgan ishlar
+    ``max_pending`` ga yetganda ``submit`` joy bo'shashini kutadi.
+    """
+
+    def __init__(
+        self,
+        workers: int = 32,
+        max_pending: int = 1000,
+        max_per_chat: int = 50,
+        admin_concurrency: int = 2,
+        max_lane_wait: float = MAX_LANE_WAIT,
+    ):
+        self.workers = workers
+        self.max_pending = max_pending
+        self.max_per_chat = max_per_chat
+        self.max_lane_wait = max_lane_wait
+        self._configured_limits = (workers, workers, admin_concurrency)
+        self._lane_limits = list(self._configured_limits)
+        # kalit -> (navbat, ish, qo'yilgan vaqt) lar ketma-ketligi
+        self._chats: Dict[Hashable, deque] = {}
+        # Hozir bajarilayotgan chatlar (ularning keyingi ishi kutib turadi)
+        self._busy = set()
+        # Har bir navbat uchun: boshidagi ishi shu navbatda bo'lgan bo'sh chatlar
+        self._ready = tuple(deque() for _ in LANE_NAMES)
+        self._depth = [0] * len(LANE_NAMES)
+        self._running = [0] * len(LANE_NAMES)
+        self._pending = 0
+        self._lock = asyncio.Lock()
+        self._work = asyncio.Condition(self._lock)
+        self._space = asyncio.Condition(self._lock)
+        self._tasks: List[asyncio.Task] = []
+        self.stats_by_lane = tuple(LaneStats() for _ in LANE_NAMES)
+        self.backpressure_waits = 0
+
+    @property
+    def running(self) -> bool:
+        return bool(self._tasks)
+
+    @property
+    def pending(self) -> int:
+        return self._pending
+
+    @property
+    def active_pending(self) -> int:
+        """To'xtatilgan navbatlardagi ishlarsiz: ular navbat yuklamasini bildirmaydi"""
+        return self._pending - sum(
+            depth for depth, limit in zip(self._depth, self._lane_limits) if limit == 0
+        )
+
+    def is_full(self) -> bool:
+        return self._pending >= self.max_pending
+
+    def pause_lane(self, lane: int):
+        """Navbatdagi ishlar kutib turadi, bajarilayotganlari tugatiladi"""
+        self._lane_limits[lane] = 0
+
+    async def resume_lane(self, lane: int):
+        self._lane_limits[lane] = self._configured_limits[lane]
+        async with self._lock:
+            self._work.notify_all()
+
+    def _enqueue_ready(self, key: Hashable):
+        lane = self._chats[key][0][0]
+        self._ready[lane].append(key)
+
+    async def submit(self, key: Hashable, lane: int, job: Job) -> bool:
+        """Ishni navbatga qo'yish; chat navbati to'la bo'lsa False (tashlab yuboriladi)"""
+        async with self._lock:
+            if self._pending >= self.max_pending:
+                self.backpressure_waits += 1
+                await self._space.wait_for(lambda: self._pending < self.max_pending)
+
+            stats = self.stats_by_lane[lane]
+            queue = self._chats.get(key)
+            if queue is not None and len(queue) >= self.max_per_chat:
+                stats.dropped += 1
+                return False
+
+            if queue is None:
+                queue = self._chats[key] = deque()
+            queue.append((lane, job, time.monotonic()))
+            stats.submitted += 1
+            self._depth[lane] += 1
+            self._pending += 1
+            if len(queue) == 1 and key not in self._busy:
+                self._enqueue_ready(key)
+                self._work.notify()
+            return True
+
+    def _pick(self) -> Optional[Hashable]:
+        """Keyingi bajariladigan chat kaliti (lock ostida chaqiriladi)"""
+        now = time.monotonic()
+        candidate = None
+        for lane, ready in enumerate(self._ready):
+            if not ready or self._running[lane] >= self._lane_limits[lane]:
+                continue
+            if candidate is None:
+                candidate = lane
+            elif now - self._chats[ready[0]][0][2] >= self.max_lane_wait:
+                # Uzoq kutgan past ustuvor ish
+                candidate = lane
+                break
+        if candidate is None:
+            return None
+        return self._ready[candidate].popleft()
+
+    async def _worker(self):
+        while True:
+            async with self._lock:
+                key = await self._work.wait_for(self._pick)
+                lane, job, enqueued_at = self._chats[key].popleft()
+                self._busy.add(key)
+                self._running[lane] += 1
+                self._depth[lane] -= 1
+                self._pending -= 1
+                self._space.notify()
+
+            stats = self.stats_by_lane[lane]
+            wait = time.monotonic() - enqueued_at
+            stats.wait_total += wait
+            if wait > stats.wait_max:
+                stats.wait_max = wait
+            try:
+                await job()
+                stats.completed += 1
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                stats.failed += 1
+                logger.error(f"Update'ni bajarishda xato ({LANE_NAMES[lane]}): {e}")
+            finally:
+                async with self._lock:
+                    self._busy.discard(key)
+                    self._running[lane] -= 1
+                    if self._chats[key]:
+                        self._enqueue_ready(key)
+                    else:
+                        del self._chats[key]
+                    # Navbat limiti bo'shagan bo'lishi mumkin: bitta kutayotgan worker
+                    self._work.notify()
+
+    async def start(self):
+        if self._tasks:
+            return
+        self._tasks = [asyncio.create_task(self._worker()) for _ in range(self.workers)]
+        logger.info(f"Update executor ishga tushdi: {self.workers} worker")
+
+    async def stop(self, timeout: float = 10.0):
+        """Kutilayotgan ishlarni ``timeout`` gacha tugatib, worker'larni to'xtatish"""
+        deadline = time.monotonic() + timeout
+        while self._pending or any(self._running):
+            if time.monotonic() >= deadline:
+                logger.warning(
+                    f"Update executor: {self._pending} ta ish bajarilmay qoldi"
+                )
+                break
+            await asyncio.sleep(0.05)
+        for task in self._tasks:
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        self._tasks = []
+
+    def stats(self) -> dict:
+        return {
+            "pending": self._pending,
+            "chats": len(self._chats),
+            "backpressure_waits": self.backpressure_waits,
+            "lanes": {
+                name: self.stats_by_lane[lane].as_dict(
+                    self._depth[lane], self._running[lane]
+                )
+                for lane, name in enumerate(LANE_NAMES)
+            },
+        }
@@ -0,0 +1,342 @@
+import asyncio
+import gzip
+import io
+import itertools
+import logging
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass, field
+from datetime import datetime
+from typing import Iterable, Iterator, List, Optional, Tuple
+import psycopg2
+from psycopg2.extensions import ISOLATION_LEVEL_REPEATABLE_READ
+from openpyxl import Workbook
+from openpyxl.cell import WriteOnlyCell
+from openpyxl.styles import Font, PatternFill
+from openpyxl.utils import get_column_letter
+from data.config import load_config
+
+logger = logging.getLogger(__name__)
+
+# Excel ustunlari va bazadagi mos maydonlar (tartib so'rov bilan bir xil)
+USER_COLUMNS = (
+    ("ID", "id"),
+    ("Telegram ID", "user_id"),
+    ("Username", "username"),
+    ("To'liq ismi", "full_name"),
+    ("Telefon raqami", "phone_number"),
+    ("Ro'yxatdan o'tgan vaqti", "created_at"),
+    ("Oxirgi faolligi", "last_active_at"),
+    ("Holati", "is_active"),
+    ("Premium", "is_premium"),
+)
+
+# CSV va Parquet uchun xom maydonlar (formatlashsiz)
+RAW_FIELDS = (
+    "id",
+    "user_id",
+    "username",
+    "full_name",
+    "phone_number",
+    "created_at",
+    "last_active_at",
+    "updated_at",
+    "is_active",
+    "is_premium",
+)
+
+ACTIVE_USERS_QUERY = f"""
+    SELECT {", ".join(field for _, field in USER_COLUMNS)}
+    FROM users
+    WHERE is_active = TRUE
+    ORDER BY created_at DESC
+"""
+
+FORMATS = ("xlsx", "csv", "parquet")
+FETCH_SIZE = 5000
+# Ustun kengligi shuncha birinchi qator bo'yicha hisoblanadi
+WIDTH_SAMPLE_SIZE = 1000
+MAX_COLUMN_WIDTH = 60
+# Bitta fayldagi maksimal qatorlar (Excel chegarasi 1 048 576 qator)
+MAX_ROWS_PER_FILE = {"xlsx": 1_000_000, "csv": 1_000_000, "parquet": 5_000_000}
+# Delta eksportda hali commit bo'lmagan tranzaksiyalar tushib qolmasligi uchun
+# yuqori chegara shuncha orqada turadi
+DELTA_SAFETY_LAG = "1 minute"
+
+HEADER_FONT = Font(bold=True)
+HEADER_FILL = PatternFill(start_color="CCE5FF", end_color="CCE5FF", fill_type="solid")
+
+_executor: Optional[ProcessPoolExecutor] = None
+
+
+@dataclass
+class ExportResult:
+    files: List[Tuple[str, bytes]] = field(default_factory=list)
+    total: int = 0
+    # Delta eksport uchun keyingi safar ishlatiladigan chegara
+    watermark: Optional[datetime] = None
+
+
+def connect():
+    """Eksport uchun alohida (sinxron) ulanish"""
+    config = load_config()
+    return psycopg2.connect(
+        dbname=config.db.database,
+        user=config.db.user,
+        password=config.db.password,
+        host=config.db.host,
+        port=config.db.port,
+    )
+
+
+def iter_query(
+    conn, query: str, params=None, name: str = "users_export"
+) -> Iterator[tuple]:
+    """Server-side cursor orqali qatorlarni FETCH_SIZE tadan oqim qilib o'qish"""
+    with conn.cursor(name=name) as cur:
+        cur.itersize = FETCH_SIZE
+        cur.execute(query, params)
+        yield from cur
+
+
+def format_user_row(row: tuple) -> tuple:
+    """Bazadagi qatorni Excel uchun ko'rinishga keltirish"""
+    *fields, is_active, is_premium = row
+    return (
+        *("" if value is None else value for value in fields),
+        "Faol" if is_active else "Faol emas",
+        "Ha" if is_premium else "Yo'q",
+    )
+
+
+def write_users_xlsx(rows: Iterable[tuple]) -> Tuple[bytes, int]:
+    """Qatorlarni write-only rejimdagi openpyxl kitobiga yozish.
+
+    Ustun kengliklari faqat birinchi WIDTH_SAMPLE_SIZE qatordan hisoblanadi,
+    qolgan qatorlar xotirada to'planmasdan to'g'ridan-to'g'ri yoziladi.
+    """
+    rows = iter(rows)
+    sample = [format_user_row(row) for row in itertools.islice(rows, WIDTH_SAMPLE_SIZE)]
+
+    workbook = Workbook(write_only=True)
+    worksheet = workbook.create_sheet("Foydalanuvchilar")
+
+    for idx, (title, _) in enumerate(USER_COLUMNS):
+        sample_width = max((len(str(row[idx])) for row in sample), default=0)
+        width = min(max(sample_width, len(title)) + 2, MAX_COLUMN_WIDTH)
+        worksheet.column_dimensions[get_column_letter(idx + 1)].width = width
+
+    header = []
+    for title, _ in USER_COLUMNS:
+        cell = WriteOnlyCell(worksheet, value=title)
+        cell.font = HEADER_FONT
+        cell.fill = HEADER_FILL
+        header.append(cell)
+    worksheet.append(header)
+
+    count = 0
+    for row in sample:
+        worksheet.append(row)
+        count += 1
+    for row in rows:
+        worksheet.append(format_user_row(row))
+        count += 1
+
+    buffer = io.BytesIO()
+    workbook.save(buffer)
+    return buffer.getvalue(), count
+
+
+def write_users_parquet(
+    rows: Iterable[tuple], max_rows: int
+) -> List[Tuple[bytes, int]]:
+    """Qatorlarni FETCH_SIZE li batch'lar bilan Parquet fayl(lar)ga yozish"""
+    # pyarrow og'ir kutubxona, faqat eksport jarayonida yuklanadi
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+
+    schema = pa.schema(
+        [
+            ("id", pa.int32()),
+            ("user_id", pa.int64()),
+            ("username", pa.string()),
+            ("full_name", pa.string()),
+            ("phone_number", pa.string()),
+            ("created_at", pa.timestamp("us")),
+            ("last_active_at", pa.timestamp("us")),
+            ("updated_at", pa.timestamp("us")),
+            ("is_active", pa.bool_()),
+            ("is_premium", pa.bool_()),
+        ]
+    )
+
+    rows = iter(rows)
+    parts = []
+    while True:
+        buffer = io.BytesIO()
+        count = 0
+        with pq.ParquetWriter(buffer, schema, compression="zstd") as writer:
+            while count < max_rows:
+                chunk = list(itertools.islice(rows, min(FETCH_SIZE, max_rows - count)))
+                if not chunk:
+                    break
+                columns = list(zip(*chunk))
+                writer.write_batch(
+                    pa.record_batch(
+                        [
+                            pa.array(column, type=schema.field(idx).type)
+                            for idx, column in enumerate(columns)
+                        ],
+                        schema=schema,
+                    )
+                )
+                count += len(chunk)
+        if count == 0 and parts:
+            break
+        parts.append((buffer.getvalue(), count))
+        if count < max_rows:
+            break
+    return parts
+
+
+def _users_filter(
+    cur, delta: bool, since: Optional[datetime]
+) -> Tuple[str, tuple, Optional[datetime]]:
+    """To'liq eksport - faol foydalanuvchilar, delta - updated_at oralig'i"""
+    if not delta:
+        return "is_active = TRUE", (), None
+    cur.execute(f"SELECT LOCALTIMESTAMP - INTERVAL '{DELTA_SAFETY_LAG}'")
+    upper = cur.fetchone()[0]
+    if since is None:
+        return "updated_at <= %s", (upper,), upper
+    return "updated_at > %s AND updated_at <= %s", (since, upper), upper
+
+
+def _id_bounds(cur, where: str, params: tuple, max_rows: int) -> List[Optional[int]]:
+    """Har max_rows qatorda bitta chegaraviy id (fayllarga bo'lish uchun)"""
+    cur.execute(
+        f"""
+        SELECT id FROM (
+            SELECT id, row_number() OVER (ORDER BY id) AS rn
+            FROM users WHERE {where}
+        ) t
+        WHERE rn %% %s = 0
+        ORDER BY id
+        """,
+        (*params, max_rows),
+    )
+    return [row[0] for row in cur.fetchall()]
+
+
+def _copy_csv_gz(cur, where: str, params: tuple, lower, upper) -> Tuple[bytes, int]:
+    """Bitta id oralig'ini COPY TO STDOUT orqali gzip CSV ga yozish"""
+    conditions, args = [where], list(params)
+    if lower is not None:
+        conditions.append("id > %s")
+        args.append(lower)
+    if upper is not None:
+        conditions.append("id <= %s")
+        args.append(upper)
+    select = cur.mogrify(
+        f"SELECT {', '.join(RAW_FIELDS)} FROM users "
+        f"WHERE {' AND '.join(conditions)} ORDER BY id",
+        args,
+    ).decode()
+
+    buffer = io.BytesIO()
+    with gzip.GzipFile(fileobj=buffer, mode="wb", compresslevel=6) as gz:
+        cur.copy_expert(f"COPY ({select}) TO STDOUT WITH (FORMAT csv, HEADER)", gz)
+    return buffer.getvalue(), cur.rowcount
+
+
+def _part_name(prefix: str, extension: str, index: int, parts: int) -> str:
+    stamp = datetime.now().strftime("%Y-%m-%d_%H-%M")
+    suffix = f"_part{index}" if parts > 1 else ""
+    return f"{prefix}_{stamp}{suffix}.{extension}"
+
+
+def build_users_export(
+    fmt: str, delta: bool = False, since: Optional[datetime] = None
+) -> ExportResult:
+    """Foydalanuvchilarni tanlangan formatda eksport qilish (alohida jarayonda).
+
+    Barcha fayllar bitta REPEATABLE READ snapshot'dan o'qiladi. ``delta``
+    rejimida faqat ``since`` dan keyin o'zgargan qatorlar olinadi.
+    """
+    if fmt not in FORMATS:
+        raise ValueError(f"Noma'lum eksport formati: {fmt}")
+    if delta and fmt == "xlsx":
+        raise ValueError("Delta eksport faqat csv va parquet uchun")
+
+    max_rows = MAX_ROWS_PER_FILE[fmt]
+    prefix = "users_delta" if delta else "users"
+    result = ExportResult()
+
+    conn = connect()
+    try:
+        conn.set_session(isolation_level=ISOLATION_LEVEL_REPEATABLE_READ, readonly=True)
+        with conn.cursor() as cur:
+            where, params, result.watermark = _users_filter(cur, delta, since)
+
+            if fmt == "xlsx":
+                rows = iter_query(conn, ACTIVE_USERS_QUERY)
+                parts = []
+                while True:
+                    content, count = write_users_xlsx(itertools.islice(rows, max_rows))
+                    if count == 0 and parts:
+                        break
+                    parts.append((content, count))
+                    if count < max_rows:
+                        break
+            elif fmt == "parquet":
+                query = (
+                    f"SELECT {', '.join(RAW_FIELDS)} FROM users "
+                    f"WHERE {where} ORDER BY id"
+                )
+                parts = write_users_parquet(iter_query(conn, query, params), max_rows)
+            else:
+                bounds = _id_bounds(cur, where, params, max_rows)
+                ranges = list(zip([None, *bounds], [*bounds, None]))
+                parts = [_copy_csv_gz(cur, where, params, lo, hi) for lo, hi in ranges]
+                # Qatorlar soni max_rows ga karrali bo'lsa oxirgi qism bo'sh chiqadi
+                if len(parts) > 1 and parts[-1][1] == 0:
+                    parts.pop()
+        conn.commit()
+    finally:
+        conn.close()
+
+    extension = "csv.gz" if fmt == "csv" else fmt
+    for index, (content, count) in enumerate(parts, start=1):
+        result.files.append((_part_name(prefix, extension, index, len(parts)), content))
+        result.total += count
+    return result
+
+
+def _get_executor() -> ProcessPoolExecutor:
+    global _executor
+    if _executor is None:
+        # spawn: ishlayotgan event loop va oqimlar bilan fork qilmaslik uchun
+        _executor = ProcessPoolExecutor(
+            max_workers=1, mp_context=multiprocessing.get_context("spawn")
+        )
+    return _executor
+
+
+async def run_export(func, *args):
+    """Eksport funksiyasini alohida jarayonda bajarish (event loop bloklanmaydi)"""
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(_get_executor(), func, *args)
+
+
+async def export_users(
+    fmt: str, delta: bool = False, since: Optional[datetime] = None
+) -> ExportResult:
+    """Foydalanuvchilar eksporti: fayllar ro'yxati, jami qatorlar va watermark"""
+    return await run_export(build_users_export, fmt, delta, since)
+
+
+def shutdown_executor():
+    global _executor
+    if _executor is not None:
+        _executor.shutdown(wait=False, cancel_futures=True)
+        _executor = None
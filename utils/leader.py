@@ -0,0 +1,121 @@
+# utils/leader.py
+import asyncio
+import logging
+from typing import Callable, List, Optional
+from utils.database.db import DataBase
+
+logger = logging.getLogger(__name__)
+
+# pg_try_advisory_lock kaliti (migratsiya lock'i 7_310_001 bilan to'qnashmaydi)
+LEADER_LOCK_ID = 7_310_002
+# Lock olishga urinish va lider ulanishini tekshirish oralig'i
+ELECTION_INTERVAL = 5.0
+
+
+class LeaderElection:
+    """Postgres advisory lock orqali lider tanlash.
+
+    Lock alohida, doimiy ulanishda (sessiya darajasida) olinadi: lider
+    jarayon to'xtasa yoki ulanish uzilsa Postgres lock'ni o'zi bo'shatadi
+    va keyingi urinishda boshqa jarayon lider bo'ladi. Rol o'zgarishi
+    ``on_change`` tinglovchilariga (masalan, ``scheduler.set_role``) beriladi.
+    """
+
+    def __init__(
+        self, lock_id: int = LEADER_LOCK_ID, interval: float = ELECTION_INTERVAL
+    ):
+        self.lock_id = lock_id
+        self.interval = interval
+        self.db = DataBase()
+        self.is_leader = False
+        self.elections = 0
+        self._listeners: List[Callable[[bool], None]] = []
+        self._conn = None
+        self._task: Optional[asyncio.Task] = None
+
+    def on_change(self, listener: Callable[[bool], None]):
+        self._listeners.append(listener)
+
+    async def _try_acquire(self) -> bool:
+        try:
+            if self._conn is None or self._conn.closed:
+                self._conn = await self.db.get_connection()
+                self._conn.autocommit = True
+            with self._conn.cursor() as cur:
+                cur.execute("SELECT pg_try_advisory_lock(%s)", (self.lock_id,))
+                return cur.fetchone()[0]
+        except Exception as e:
+            logger.error(f"Lider lock'ini olishda xato: {e}")
+            self._close()
+            return False
+
+    async def _alive(self) -> bool:
+        """Lock turgan ulanish hali ishlayaptimi"""
+        try:
+            with self._conn.cursor() as cur:
+                cur.execute("SELECT 1")
+            return True
+        except Exception as e:
+            logger.error(f"Lider ulanishi uzildi: {e}")
+            return False
+
+    def _close(self):
+        if self._conn is not None:
+            try:
+                self._conn.close()
+            except Exception:
+                pass
+            self._conn = None
+
+    def _set_role(self, is_leader: bool):
+        self.is_leader = is_leader
+        for listener in self._listeners:
+            listener(is_leader)
+        logger.info(f"Jarayon roli: {'lider' if is_leader else 'follower'}")
+
+    async def elect(self):
+        """Bitta saylov qadami: lider ulanishini tekshirish yoki lock olish"""
+        if self.is_leader:
+            if not await self._alive():
+                self._close()
+                self._set_role(False)
+            return
+        if await self._try_acquire():
+            self.elections += 1
+            self._set_role(True)
+
+    async def _loop(self):
+        while True:
+            await asyncio.sleep(self.interval)
+            try:
+                await self.elect()
+            except Exception as e:
+                logger.error(f"Lider tanlashda xato: {e}")
+
+    async def start(self):
+        """Birinchi saylov darhol, keyingilari fon task'ida"""
+        if await self._try_acquire():
+            self.elections += 1
+            self._set_role(True)
+        else:
+            self._set_role(False)
+        self._task = asyncio.create_task(self._loop())
+
+    async def stop(self):
+        if self._task is not None:
+            self._task.cancel()
+            await asyncio.gather(self._task, return_exceptions=True)
+            self._task = None
+        # Ulanish yopilganda lock ham bo'shaydi
+        self._close()
+        self.is_leader = False
+
+    def stats(self) -> dict:
+        return {
+            "is_leader": self.is_leader,
+            "elections": self.elections,
+        }
+
+
+# Global instance
+leader = LeaderElection()
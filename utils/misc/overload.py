@@ -0,0 +1,178 @@
+# utils/misc/overload.py
+import asyncio
+import logging
+import time
+from typing import Dict, Optional, Tuple
+from utils.database.db import DataBase
+from utils.executor import LANE_ADMIN, UpdateExecutor
+
+logger = logging.getLogger(__name__)
+
+# Event loop kechikishi shu oraliqda o'lchanadi
+SAMPLE_INTERVAL = 0.5
+# Degraded rejimga o'tish: kechikish yoki navbat to'liqligi ketma-ket
+# ENTER_SAMPLES o'lchovda chegaradan oshsa
+ENTER_LAG = 0.2
+ENTER_DEPTH_RATIO = 0.5
+ENTER_SAMPLES = 2
+# Qaytish: ikkalasi ham past chegaradan RECOVER_SECONDS davomida past bo'lsa
+RECOVER_LAG = 0.05
+RECOVER_DEPTH_RATIO = 0.1
+RECOVER_SECONDS = 10.0
+# Degraded paytda kechiktirilgan faollik yozuvlari chegarasi
+MAX_DEFERRED_USERS = 50_000
+
+
+class OverloadController:
+    """Event loop kechikishi va update navbati bo'yicha yuklama nazorati.
+
+    Degraded rejimda: kurslar eskirgan bo'lsa ham qayta so'ralmaydi, obuna
+    tekshiruvi faqat keshga tayanadi, foydalanuvchi faolligi bazaga
+    yozilmay to'planadi va admin navbati to'xtatib turiladi. Yuklama
+    tushgach rejim o'zi tiklanadi, to'plangan yozuvlar bitta so'rovda
+    yoziladi.
+    """
+
+    def __init__(self):
+        self.degraded = False
+        self.transitions = 0
+        self.degraded_seconds = 0.0
+        self.lag = 0.0
+        self.depth_ratio = 0.0
+        self._executor: Optional[UpdateExecutor] = None
+        self._task: Optional[asyncio.Task] = None
+        self._over = 0
+        self._calm_since: Optional[float] = None
+        self._degraded_since = 0.0
+        # user_id -> (username, full_name)
+        self._deferred_users: Dict[int, Tuple[Optional[str], Optional[str]]] = {}
+        self.dropped_writes = 0
+
+    def defer_user(
+        self, user_id: int, username: Optional[str], full_name: Optional[str]
+    ):
+        """Degraded paytda add_user o'rniga: tiklanganda yoziladi"""
+        if (
+            user_id not in self._deferred_users
+            and len(self._deferred_users) >= MAX_DEFERRED_USERS
+        ):
+            self.dropped_writes += 1
+            return
+        self._deferred_users[user_id] = (username, full_name)
+
+    async def _enter(self):
+        self.degraded = True
+        self.transitions += 1
+        self._degraded_since = time.monotonic()
+        self._calm_since = None
+        if self._executor is not None:
+            self._executor.pause_lane(LANE_ADMIN)
+        logger.warning(
+            f"Yuklama yuqori: degraded rejim (kechikish {self.lag * 1000:.0f} ms, "
+            f"navbat {self.depth_ratio:.0%}, o'tishlar: {self.transitions})"
+        )
+
+    async def _exit(self):
+        self.degraded = False
+        self.transitions += 1
+        duration = time.monotonic() - self._degraded_since
+        self.degraded_seconds += duration
+        self._over = 0
+        if self._executor is not None:
+            await self._executor.resume_lane(LANE_ADMIN)
+        logger.info(
+            f"Yuklama me'yorida: oddiy rejim ({duration:.0f} s degraded, "
+            f"o'tishlar: {self.transitions})"
+        )
+        await self.flush_deferred()
+
+    async def flush_deferred(self):
+        if not self._deferred_users:
+            return
+        rows = [
+            (user_id, username, full_name)
+            for user_id, (username, full_name) in self._deferred_users.items()
+        ]
+        self._deferred_users = {}
+        try:
+            await DataBase().upsert_users(rows)
+            logger.info(f"Kechiktirilgan faollik yozildi: {len(rows)} ta")
+        except Exception as e:
+            logger.error(f"Kechiktirilgan faollikni yozishda xato: {e}")
+
+    async def observe(self, lag: float, depth_ratio: float):
+        """Bitta o'lchov natijasi bo'yicha rejimni yangilash"""
+        self.lag = lag
+        self.depth_ratio = depth_ratio
+        if not self.degraded:
+            if lag >= ENTER_LAG or depth_ratio >= ENTER_DEPTH_RATIO:
+                self._over += 1
+                if self._over >= ENTER_SAMPLES:
+                    await self._enter()
+            else:
+                self._over = 0
+            return
+
+        if lag < RECOVER_LAG and depth_ratio < RECOVER_DEPTH_RATIO:
+            now = time.monotonic()
+            if self._calm_since is None:
+                self._calm_since = now
+            elif now - self._calm_since >= RECOVER_SECONDS:
+                await self._exit()
+        else:
+            self._calm_since = None
+
+    async def _monitor(self):
+        loop = asyncio.get_running_loop()
+        while True:
+            started = loop.time()
+            await asyncio.sleep(SAMPLE_INTERVAL)
+            lag = max(0.0, loop.time() - started - SAMPLE_INTERVAL)
+            executor = self._executor
+            # To'xtatilgan admin navbati hisobga olinmaydi: aks holda u
+            # degraded rejimda to'lib, tiklanishga hech qachon yo'l bermaydi
+            depth_ratio = (
+                executor.active_pending / executor.max_pending
+                if executor is not None
+                else 0.0
+            )
+            try:
+                await self.observe(lag, depth_ratio)
+            except Exception as e:
+                logger.error(f"Yuklama nazoratida xato: {e}")
+
+    def start(self, executor: Optional[UpdateExecutor] = None):
+        self._executor = executor
+        if self._task is None:
+            self._task = asyncio.create_task(self._monitor())
+
+    async def stop(self):
+        if self._task is not None:
+            self._task.cancel()
+            await asyncio.gather(self._task, return_exceptions=True)
+            self._task = None
+        if self.degraded:
+            # Oddiy rejimga qaytish: admin navbati ham bajarib olinadi, executor
+            # navbati bo'shatilayotganda kelgan faollik esa to'g'ridan-to'g'ri
+            # yoziladi (defer_user'dagi bufer endi hech qachon yozilmaydi)
+            await self._exit()
+        else:
+            await self.flush_deferred()
+
+    def stats(self) -> dict:
+        degraded_seconds = self.degraded_seconds
+        if self.degraded:
+            degraded_seconds += time.monotonic() - self._degraded_since
+        return {
+            "degraded": self.degraded,
+            "transitions": self.transitions,
+            "degraded_seconds": degraded_seconds,
+            "lag_ms": self.lag * 1000,
+            "depth_ratio": self.depth_ratio,
+            "deferred_users": len(self._deferred_users),
+            "dropped_writes": self.dropped_writes,
+        }
+
+
+# Global instance
+overload = OverloadController()
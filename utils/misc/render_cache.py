@@ -0,0 +1,122 @@
+# utils/misc/render_cache.py
+import logging
+from collections import OrderedDict
+from typing import Optional, Tuple
+from aiogram.exceptions import TelegramBadRequest
+from aiogram.types import InlineKeyboardMarkup, Message
+
+logger = logging.getLogger(__name__)
+
+MAX_RENDERED_MESSAGES = 20_000
+
+# Telegram qaytargan message.text'dan HTML teglari olib tashlangan va
+# belgilar ochilgan - bunday matnni yuborilgan matn bilan taqqoslab bo'lmaydi
+_HTML_CHARS = ("<", "&")
+
+# (matn izi, tugmalar izi); matn noma'lum bo'lsa None
+Fingerprint = Tuple[Optional[int], int]
+
+
+def _markup_hash(reply_markup: Optional[InlineKeyboardMarkup]) -> int:
+    if reply_markup is None:
+        return 0
+    return hash(reply_markup.model_dump_json(exclude_none=True))
+
+
+class RenderCache:
+    """(chat_id, message_id) -> oxirgi ko'rsatilgan matn va tugmalar izi.
+
+    Tugmalar izi har doim jonli ``message.reply_markup`` dan olinadi; kesh
+    faqat HTML matn izini saqlaydi (Telegram qaytargan matndan HTML
+    tiklanmaydi) va u tugmalar mos kelgandagina ishonchli hisoblanadi.
+    Xabar allaqachon shu ko'rinishda bo'lsa edit so'rovi Telegram'ga
+    yuborilmaydi va "message is not modified" xatosi ham kelmaydi.
+    """
+
+    def __init__(self, max_entries: int = MAX_RENDERED_MESSAGES):
+        self.max_entries = max_entries
+        self._items: OrderedDict = OrderedDict()
+        self.skipped = 0
+        self.edited = 0
+
+    @staticmethod
+    def _key(message: Message) -> Tuple[int, int]:
+        return message.chat.id, message.message_id
+
+    def _current(self, message: Message) -> Fingerprint:
+        # Tugmalar har doim callback kelgan xabarning o'zidan: xabarni boshqa
+        # jarayon yoki render_cache'siz kod tahrirlagan bo'lishi mumkin
+        markup_hash = _markup_hash(message.reply_markup)
+        key = self._key(message)
+        value = self._items.get(key)
+        if value is not None and value[1] == markup_hash:
+            # Keshdagi matn faqat tugmalari jonli xabarga mos kelsa ishlatiladi
+            self._items.move_to_end(key)
+            return value
+        text = message.text
+        if text is not None and any(c in text for c in _HTML_CHARS):
+            text = None
+        return None if text is None else hash(text), markup_hash
+
+    def _remember(self, message: Message, value: Fingerprint):
+        key = self._key(message)
+        self._items[key] = value
+        self._items.move_to_end(key)
+        while len(self._items) > self.max_entries:
+            self._items.popitem(last=False)
+
+    async def edit_text(
+        self,
+        message: Message,
+        text: str,
+        reply_markup: Optional[InlineKeyboardMarkup] = None,
+        **kwargs,
+    ) -> bool:
+        """message.edit_text, xabar o'zgarmasa so'rovsiz. Tahrirlangan bo'lsa True"""
+        value = (hash(text), _markup_hash(reply_markup))
+        if self._current(message) == value:
+            self.skipped += 1
+            return False
+        try:
+            await message.edit_text(text, reply_markup=reply_markup, **kwargs)
+        except TelegramBadRequest as e:
+            if "message is not modified" not in str(e):
+                raise
+            logger.debug(f"Xabar o'zgarmagan: {self._key(message)}")
+            self._remember(message, value)
+            return False
+        self.edited += 1
+        self._remember(message, value)
+        return True
+
+    async def edit_reply_markup(
+        self, message: Message, reply_markup: Optional[InlineKeyboardMarkup]
+    ) -> bool:
+        """Faqat tugmalarni almashtirish, tugmalar bir xil bo'lsa so'rovsiz"""
+        text_hash, markup_hash = self._current(message)
+        new_markup_hash = _markup_hash(reply_markup)
+        if markup_hash == new_markup_hash:
+            self.skipped += 1
+            return False
+        try:
+            await message.edit_reply_markup(reply_markup=reply_markup)
+        except TelegramBadRequest as e:
+            if "message is not modified" not in str(e):
+                raise
+            logger.debug(f"Tugmalar o'zgarmagan: {self._key(message)}")
+            self._remember(message, (text_hash, new_markup_hash))
+            return False
+        self.edited += 1
+        self._remember(message, (text_hash, new_markup_hash))
+        return True
+
+    def stats(self) -> dict:
+        return {
+            "entries": len(self._items),
+            "edited": self.edited,
+            "skipped": self.skipped,
+        }
+
+
+# Global instance
+render_cache = RenderCache()
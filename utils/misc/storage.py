@@ -0,0 +1,116 @@
+# utils/misc/storage.py
+import logging
+import time
+from collections import OrderedDict
+from typing import Any, Dict, Optional
+from aiogram.fsm.state import State
+from aiogram.fsm.storage.base import BaseStorage, StateType, StorageKey
+from data.config import Config
+
+logger = logging.getLogger(__name__)
+
+# Tashlab ketilgan suhbat holati shuncha vaqtdan keyin o'chiriladi
+FSM_STATE_TTL = 3600
+MAX_FSM_ENTRIES = 100_000
+
+
+class TTLMemoryStorage(BaseStorage):
+    """Jarayon ichidagi FSM xotirasi: TTL va hajm chegarasi bilan.
+
+    aiogram'ning MemoryStorage'idan farqi: o'qish yangi yozuv yaratmaydi,
+    bo'sh holat (state.clear()) yozuvni o'chiradi, oxirgi yozuvdan ``ttl``
+    o'tgan holatlar unutiladi va ``max_entries`` dan oshganda eng eski
+    yozuvlar chiqarib yuboriladi. Yozuvlar oxirgi o'zgarish tartibida
+    turadi, shuning uchun eskirganlarini boshidan tozalash yetarli.
+    """
+
+    def __init__(self, ttl: float = FSM_STATE_TTL, max_entries: int = MAX_FSM_ENTRIES):
+        self.ttl = ttl
+        self.max_entries = max_entries
+        # StorageKey -> [state, data, expires_at]
+        self._records: OrderedDict = OrderedDict()
+        self.expired = 0
+        self.evictions = 0
+
+    def _sweep(self, now: float):
+        records = self._records
+        while records:
+            key, record = next(iter(records.items()))
+            if record[2] > now:
+                break
+            del records[key]
+            self.expired += 1
+
+    def _get(self, key: StorageKey) -> Optional[list]:
+        record = self._records.get(key)
+        if record is None:
+            return None
+        if record[2] <= time.monotonic():
+            del self._records[key]
+            self.expired += 1
+            return None
+        return record
+
+    def _put(self, key: StorageKey, state: Optional[str], data: Dict[str, Any]):
+        if state is None and not data:
+            self._records.pop(key, None)
+            return
+        now = time.monotonic()
+        self._records[key] = [state, data, now + self.ttl]
+        self._records.move_to_end(key)
+        self._sweep(now)
+        while len(self._records) > self.max_entries:
+            self._records.popitem(last=False)
+            self.evictions += 1
+
+    async def set_state(self, key: StorageKey, state: StateType = None) -> None:
+        record = self._get(key)
+        data = record[1] if record is not None else {}
+        self._put(key, state.state if isinstance(state, State) else state, data)
+
+    async def get_state(self, key: StorageKey) -> Optional[str]:
+        record = self._get(key)
+        return record[0] if record is not None else None
+
+    async def set_data(self, key: StorageKey, data: Dict[str, Any]) -> None:
+        record = self._get(key)
+        self._put(key, record[0] if record is not None else None, data.copy())
+
+    async def get_data(self, key: StorageKey) -> Dict[str, Any]:
+        record = self._get(key)
+        return record[1].copy() if record is not None else {}
+
+    async def close(self) -> None:
+        self._records.clear()
+
+    def __len__(self) -> int:
+        return len(self._records)
+
+    def stats(self) -> dict:
+        return {
+            "entries": len(self._records),
+            "expired": self.expired,
+            "evictions": self.evictions,
+        }
+
+
+def create_storage(config: Config) -> BaseStorage:
+    """USE_REDIS=true bo'lsa Redis (bir nechta jarayon uchun umumiy), aks holda
+    TTL'li xotira"""
+    if config.bot.use_redis:
+        # redis paketi faqat Redis rejimida kerak
+        from aiogram.fsm.storage.redis import DefaultKeyBuilder, RedisStorage
+
+        storage = RedisStorage.from_url(
+            config.fsm.redis_url,
+            key_builder=DefaultKeyBuilder(with_bot_id=True),
+            state_ttl=config.fsm.state_ttl,
+            data_ttl=config.fsm.state_ttl,
+        )
+        logger.info("FSM storage: Redis")
+        return storage
+
+    logger.info("FSM storage: xotira (TTL bilan)")
+    return TTLMemoryStorage(
+        ttl=config.fsm.state_ttl, max_entries=config.fsm.max_entries
+    )
@@ -0,0 +1,300 @@
+# utils/misc/subscription.py
+import asyncio
+import logging
+import time
+from collections import OrderedDict
+from dataclasses import dataclass
+from datetime import datetime, timedelta
+from typing import Awaitable, Callable, Dict, List, Optional, Tuple, Union
+
+logger = logging.getLogger(__name__)
+
+# Boshqa jarayonlardagi o'zgarishlar shu muddatdan keyin albatta ko'rinadi
+CHANNELS_TTL = 300
+
+MEMBER_STATUSES = frozenset({"member", "administrator", "creator"})
+# A'zo bo'lgan foydalanuvchi kamdan-kam chiqib ketadi, a'zo bo'lmagan esa
+# tez orada obuna bo'lishi mumkin - shuning uchun TTL'lar har xil
+MEMBER_TTL = 600
+NOT_MEMBER_TTL = 30
+# Barcha kanallardan o'tgan foydalanuvchi shu vaqt davomida qayta tekshirilmaydi
+VERIFIED_TTL = 300
+MAX_MEMBERSHIP_ENTRIES = 100_000
+MAX_VERIFIED_USERS = 50_000
+# Bir jarayondagi parallel get_chat_member so'rovlari va har biri uchun timeout
+MEMBERSHIP_CHECK_CONCURRENCY = 20
+MEMBERSHIP_CHECK_TIMEOUT = 3.0
+# Boshqa jarayonlar yozgan a'zolik o'zgarishlari shu oraliqda bazadan olinadi;
+# kech commit bo'lgan tranzaksiyalar uchun oyna biroz orqadan boshlanadi
+MEMBERSHIP_SYNC_INTERVAL = 30
+MEMBERSHIP_SYNC_OVERLAP = timedelta(seconds=10)
+
+
+@dataclass(frozen=True)
+class Channel:
+    id: int
+    name: str
+    link: str
+    channel_id: Optional[int]
+    # A'zolik indeksidagi o'rni (0..62), slot berilmagan bo'lsa None
+    slot: Optional[int] = None
+
+    @property
+    def bit(self) -> int:
+        return 0 if self.slot is None else 1 << self.slot
+
+    @property
+    def chat_id(self) -> Union[int, str]:
+        """get_chat_member uchun: kanal ID yoki link'dan olingan @username"""
+        if self.channel_id:
+            return int(self.channel_id)
+        return self.link.replace("https://t.me/", "@")
+
+
+@dataclass(frozen=True)
+class ChannelSnapshot:
+    channels: Tuple[Channel, ...]
+    version: int
+    loaded_at: float
+
+    def find(self, chat_id: int, username: Optional[str] = None) -> Optional[Channel]:
+        """chat_member hodisasidagi chat bo'yicha kanalni topish"""
+        at_username = f"@{username}".lower() if username else None
+        for channel in self.channels:
+            if channel.channel_id and int(channel.channel_id) == chat_id:
+                return channel
+            if at_username and str(channel.chat_id).lower() == at_username:
+                return channel
+        return None
+
+
+class ChannelCache:
+    """Majburiy kanallar ro'yxatining o'zgarmas nusxasi.
+
+    Admin kanal qo'shganda/o'zgartirganda/o'chirganda DataBase ``invalidate``
+    chaqiradi; bir nechta jarayon bo'lsa TTL tugagach qayta yuklanadi.
+    """
+
+    def __init__(self, ttl: float = CHANNELS_TTL):
+        self.ttl = ttl
+        self._snapshot: Optional[ChannelSnapshot] = None
+        self._version = 0
+        self._stale = True
+        self._lock = asyncio.Lock()
+
+    def invalidate(self):
+        self._stale = True
+
+    def _is_fresh(self) -> bool:
+        return (
+            self._snapshot is not None
+            and not self._stale
+            and time.monotonic() - self._snapshot.loaded_at < self.ttl
+        )
+
+    async def get(self, loader: Callable[[], Awaitable[list]]) -> ChannelSnapshot:
+        """Joriy nusxa; eskirgan bo'lsa ``loader`` orqali bir marta qayta yuklanadi"""
+        if self._is_fresh():
+            return self._snapshot
+
+        async with self._lock:
+            # Lock kutilayotganda boshqa so'rov allaqachon yuklagan bo'lishi mumkin
+            if self._is_fresh():
+                return self._snapshot
+
+            self._stale = False
+            try:
+                rows = await loader()
+            except Exception as e:
+                self._stale = True
+                if self._snapshot is None:
+                    raise
+                logger.error(f"Kanallar ro'yxatini yangilashda xato: {e}")
+                return self._snapshot
+
+            self._version += 1
+            self._snapshot = ChannelSnapshot(
+                channels=tuple(
+                    Channel(
+                        id=row["id"],
+                        name=row["name"],
+                        link=row["link"],
+                        channel_id=row["channel_id"],
+                        slot=row["slot"],
+                    )
+                    for row in rows
+                ),
+                version=self._version,
+                loaded_at=time.monotonic(),
+            )
+            logger.debug(
+                f"Kanallar ro'yxati yuklandi: {len(self._snapshot.channels)} ta "
+                f"(versiya {self._version})"
+            )
+            return self._snapshot
+
+
+class MembershipCache:
+    """(user_id, kanal) bo'yicha a'zolik natijalari, LRU bilan cheklangan.
+
+    Barcha kanallardan o'tgan foydalanuvchilar alohida "verified" ro'yxatda
+    turadi: ular uchun gate bitta lug'at qidiruvi bilan tugaydi. Bu yozuv
+    kanallar nusxasining versiyasiga bog'langan, ro'yxat o'zgarsa o'z-o'zidan
+    eskiradi.
+    """
+
+    def __init__(
+        self,
+        member_ttl: float = MEMBER_TTL,
+        not_member_ttl: float = NOT_MEMBER_TTL,
+        verified_ttl: float = VERIFIED_TTL,
+        max_entries: int = MAX_MEMBERSHIP_ENTRIES,
+        max_verified: int = MAX_VERIFIED_USERS,
+    ):
+        self.member_ttl = member_ttl
+        self.not_member_ttl = not_member_ttl
+        self.verified_ttl = verified_ttl
+        self.max_entries = max_entries
+        self.max_verified = max_verified
+        # (user_id, chat_id) -> (is_member, expires_at)
+        self._entries: OrderedDict = OrderedDict()
+        # user_id -> (kanallar versiyasi, expires_at)
+        self._verified: OrderedDict = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+        self.verified_hits = 0
+        self.evictions = 0
+
+    def get(self, user_id: int, chat_id, allow_stale: bool = False) -> Optional[bool]:
+        """``allow_stale`` - yuklama yuqori paytda muddati o'tgan natija ham olinadi"""
+        key = (user_id, chat_id)
+        entry = self._entries.get(key)
+        if entry is None or (entry[1] <= time.monotonic() and not allow_stale):
+            if entry is not None:
+                del self._entries[key]
+            self.misses += 1
+            return None
+        self._entries.move_to_end(key)
+        self.hits += 1
+        return entry[0]
+
+    def set(self, user_id: int, chat_id, is_member: bool):
+        ttl = self.member_ttl if is_member else self.not_member_ttl
+        key = (user_id, chat_id)
+        self._entries[key] = (is_member, time.monotonic() + ttl)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+            self.evictions += 1
+
+    def is_verified(
+        self, user_id: int, version: int, allow_stale: bool = False
+    ) -> bool:
+        entry = self._verified.get(user_id)
+        if entry is None:
+            return False
+        if entry[0] != version or (entry[1] <= time.monotonic() and not allow_stale):
+            del self._verified[user_id]
+            return False
+        self.verified_hits += 1
+        return True
+
+    def mark_verified(self, user_id: int, version: int):
+        self._verified[user_id] = (version, time.monotonic() + self.verified_ttl)
+        self._verified.move_to_end(user_id)
+        while len(self._verified) > self.max_verified:
+            self._verified.popitem(last=False)
+
+    def drop_verified(self, user_id: int):
+        self._verified.pop(user_id, None)
+
+    def stats(self) -> dict:
+        lookups = self.hits + self.misses
+        return {
+            "entries": len(self._entries),
+            "verified_users": len(self._verified),
+            "hits": self.hits,
+            "misses": self.misses,
+            "verified_hits": self.verified_hits,
+            "evictions": self.evictions,
+            "hit_ratio": self.hits / lookups if lookups else 0.0,
+        }
+
+
+class MembershipIndex:
+    """chat_member hodisalaridan yig'ilgan a'zolik: user_id -> (member, known).
+
+    Ikkala qiymat ham kanal slotlari bo'yicha bitset. ``known`` da bit yo'q
+    bo'lsa bu kanal bo'yicha hodisa kelmagan va gate get_chat_member'ga
+    murojaat qiladi. Bazadagi ``channel_membership`` jadvalining nusxasi:
+    boshqa jarayonlardagi o'zgarishlar ``apply`` orqali davriy olinadi.
+    """
+
+    def __init__(self):
+        self._bits: Dict[int, Tuple[int, int]] = {}
+        self.updates = 0
+        # Bazadan olingan eng so'nggi updated_at (keyingi sinxronlash shundan)
+        self.synced_at: Optional[datetime] = None
+
+    def load(self, rows):
+        self._bits = {}
+        self.synced_at = None
+        self.apply(rows)
+        logger.info(f"A'zolik indeksi yuklandi: {len(self._bits)} ta foydalanuvchi")
+
+    def apply(self, rows) -> List[int]:
+        """Bazadagi qatorlarni qo'llash; a'zolikdan chiqqan foydalanuvchilar"""
+        left = []
+        for user_id, member, known, updated_at in rows:
+            old_member, _ = self._bits.get(user_id, (0, 0))
+            if old_member & ~member:
+                left.append(user_id)
+            if known:
+                self._bits[user_id] = (member, known)
+            else:
+                self._bits.pop(user_id, None)
+            if updated_at is not None and (
+                self.synced_at is None or updated_at > self.synced_at
+            ):
+                self.synced_at = updated_at
+        return left
+
+    def sync_since(self) -> Optional[datetime]:
+        """Keyingi sinxronlash oynasi boshi (None - to'liq yuklash)"""
+        if self.synced_at is None:
+            return None
+        return self.synced_at - MEMBERSHIP_SYNC_OVERLAP
+
+    def get(self, user_id: int) -> Tuple[int, int]:
+        return self._bits.get(user_id, (0, 0))
+
+    def lookup(self, user_id: int, channel: Channel) -> Optional[bool]:
+        """Hodisa orqali ma'lum bo'lsa a'zolik, aks holda None"""
+        member, known = self._bits.get(user_id, (0, 0))
+        if not channel.bit & known:
+            return None
+        return bool(channel.bit & member)
+
+    def update(self, user_id: int, slot: int, is_member: bool):
+        bit = 1 << slot
+        member, known = self._bits.get(user_id, (0, 0))
+        member = member | bit if is_member else member & ~bit
+        self._bits[user_id] = (member, known | bit)
+        self.updates += 1
+
+    def clear_slot(self, slot: int):
+        mask = ~(1 << slot)
+        self._bits = {
+            user_id: (member & mask, known & mask)
+            for user_id, (member, known) in self._bits.items()
+            if known & mask
+        }
+
+    def __len__(self) -> int:
+        return len(self._bits)
+
+
+# Global instance
+channel_cache = ChannelCache()
+membership_cache = MembershipCache()
+membership_index = MembershipIndex()
@@ -0,0 +1,83 @@
+# utils/misc/throttling.py
+import time
+from dataclasses import dataclass
+from typing import Dict, List, Tuple
+
+# To'lgan (bo'sh turgan) bucket'lar jadvaldan shu oraliqda tozalanadi
+SWEEP_INTERVAL = 60.0
+
+
+@dataclass(frozen=True)
+class Limit:
+    # Sekundiga qo'shiladigan token va bucket sig'imi (ketma-ket ruxsat)
+    rate: float
+    burst: float
+
+    @property
+    def refill_seconds(self) -> float:
+        return self.burst / self.rate
+
+
+class TokenBuckets:
+    """Foydalanuvchi va handler sinfi bo'yicha token bucket'lar.
+
+    Har bir yozuv: tokenlar, oxirgi yangilanish vaqti va shu cheklov
+    davrida ogohlantirish yuborilganmi (keyingi ruxsatda qaytadan 0).
+    Yozuv yo'q bo'lsa bucket to'la hisoblanadi, shuning uchun to'lib ulgurgan
+    yozuvlar davriy ravishda o'chiriladi va jadval faqat faol
+    foydalanuvchilar hajmida qoladi.
+    """
+
+    def __init__(
+        self, limits: Dict[str, Limit], sweep_interval: float = SWEEP_INTERVAL
+    ):
+        self.limits = limits
+        self.sweep_interval = sweep_interval
+        # (user_id, handler sinfi) -> [tokens, updated_at, warned]
+        self._buckets: Dict[Tuple[int, str], List[float]] = {}
+        self._max_refill = max(limit.refill_seconds for limit in limits.values())
+        self._next_sweep = time.monotonic() + sweep_interval
+        self.swept = 0
+
+    def consume(self, user_id: int, kind: str) -> bool:
+        """Bitta token olish; bucket bo'sh bo'lsa False"""
+        limit = self.limits[kind]
+        now = time.monotonic()
+        if now >= self._next_sweep:
+            self._sweep(now)
+
+        key = (user_id, kind)
+        bucket = self._buckets.get(key)
+        if bucket is None:
+            self._buckets[key] = [limit.burst - 1, now, 0]
+            return True
+
+        tokens = min(limit.burst, bucket[0] + (now - bucket[1]) * limit.rate)
+        bucket[1] = now
+        if tokens < 1:
+            bucket[0] = tokens
+            return False
+        bucket[0] = tokens - 1
+        bucket[2] = 0
+        return True
+
+    def mark_warned(self, user_id: int, kind: str) -> bool:
+        """Shu cheklov davridagi birinchi chaqiruvda True"""
+        bucket = self._buckets.get((user_id, kind))
+        if bucket is None or bucket[2]:
+            return False
+        bucket[2] = 1
+        return True
+
+    def _sweep(self, now: float):
+        self._next_sweep = now + self.sweep_interval
+        before = len(self._buckets)
+        # Eng sekin to'ladigan bucket ham to'lgan bo'lishi kafolatlangan yozuvlar
+        cutoff = now - self._max_refill
+        self._buckets = {
+            key: bucket for key, bucket in self._buckets.items() if bucket[1] > cutoff
+        }
+        self.swept += before - len(self._buckets)
+
+    def __len__(self) -> int:
+        return len(self._buckets)
@@ -0,0 +1,238 @@
+import asyncio
+import heapq
+import logging
+from dataclasses import dataclass
+from datetime import datetime, timedelta
+from typing import Dict, List, Optional, Tuple
+from utils.database.db import DataBase
+
+logger = logging.getLogger(__name__)
+
+# Boshqa jarayonlar yozgan premium o'zgarishlarini olish oralig'i; oyna
+# uzoq tranzaksiyalar kechikib ko'rinishi uchun biroz orqadan boshlanadi
+PREMIUM_SYNC_INTERVAL = 30
+PREMIUM_SYNC_OVERLAP = timedelta(seconds=10)
+
+
+@dataclass(frozen=True)
+class PremiumState:
+    is_premium: bool
+    expire_date: Optional[datetime] = None
+    updated_at: Optional[datetime] = None
+
+    def is_active(self, now: datetime) -> bool:
+        return self.is_premium and (self.expire_date is None or self.expire_date > now)
+
+
+class PremiumService:
+    """Premium statuslarini xotirada saqlash va muddati tugaganda o'chirish.
+
+    Barcha premium foydalanuvchilar ishga tushishda yuklanadi, boshqa
+    jarayonlardagi o'zgarishlar ``sync`` orqali ``premium_updated_at``
+    bo'yicha olinadi. Shuning uchun keshda yo'q foydalanuvchi premium emas
+    va tekshiruv bazaga murojaat qilmaydi. Muddatlar min-heap'da turadi:
+    sweeper eng yaqin muddatgacha uxlaydi va keshdan o'chiradi, bazaga esa
+    faqat lider jarayon yozadi.
+    """
+
+    def __init__(self, flush_interval: float = 5.0, batch_size: int = 500):
+        self.db = DataBase()
+        self.flush_interval = flush_interval
+        self.batch_size = batch_size
+        self._states: Dict[int, PremiumState] = {}
+        # (expire_date, user_id); eskirgan yozuvlar pop qilinganda tashlab yuboriladi
+        self._heap: List[Tuple[datetime, int]] = []
+        self._pending: List[Tuple[int, datetime]] = []
+        self._pending_since: Optional[datetime] = None
+        self._wakeup = asyncio.Event()
+        self._task: Optional[asyncio.Task] = None
+        self.is_leader = False
+        # Keshga qo'llangan eng so'nggi premium_updated_at
+        self.synced_at: Optional[datetime] = None
+
+    async def load(self):
+        """Premium foydalanuvchilarni bazadan keshga yuklash"""
+        rows = await self.db.get_premium_rows()
+        self._states = {
+            row["user_id"]: PremiumState(
+                row["is_premium"], row["premium_expire_date"], row["premium_updated_at"]
+            )
+            for row in rows
+        }
+        self._heap = [
+            (state.expire_date, user_id)
+            for user_id, state in self._states.items()
+            if state.expire_date is not None
+        ]
+        heapq.heapify(self._heap)
+        self.synced_at = max(
+            (state.updated_at for state in self._states.values() if state.updated_at),
+            default=None,
+        )
+        self._wakeup.set()
+        logger.info(f"Premium keshi yuklandi: {len(self._states)} ta foydalanuvchi")
+
+    def is_premium(self, user_id: int) -> bool:
+        """Foydalanuvchi hozir premiummi (bazaga murojaatsiz)"""
+        state = self._states.get(user_id)
+        return state is not None and state.is_active(datetime.now())
+
+    def get_status(self, user_id: int) -> dict:
+        """DataBase.get_premium_status bilan bir xil ko'rinishdagi status"""
+        state = self._states.get(user_id)
+        if state is None:
+            return {
+                "is_premium": False,
+                "is_active": False,
+                "premium_expire_date": None,
+                "premium_updated_at": None,
+            }
+        return {
+            "is_premium": state.is_premium,
+            "is_active": state.is_active(datetime.now()),
+            "premium_expire_date": state.expire_date,
+            "premium_updated_at": state.updated_at,
+        }
+
+    def active_count(self) -> int:
+        now = datetime.now()
+        return sum(1 for state in self._states.values() if state.is_active(now))
+
+    async def set_premium(
+        self, user_id: int, is_premium: bool = True, expire_date: datetime = None
+    ) -> bool:
+        """Premium statusni bazada yangilash va keshni almashtirish"""
+        success = await self.db.update_premium_status(user_id, is_premium, expire_date)
+        if success:
+            self._apply(user_id, PremiumState(is_premium, expire_date, datetime.now()))
+        return success
+
+    def invalidate(self, user_id: int, state: Optional[PremiumState] = None):
+        """Tashqarida o'zgartirilgan statusni keshga qo'llash"""
+        if state is None:
+            self._states.pop(user_id, None)
+        else:
+            self._apply(user_id, state)
+
+    async def sync(self):
+        """Scheduler ishi: boshqa jarayonlar yozgan premium o'zgarishlarini olish"""
+        if self.synced_at is None:
+            await self.load()
+            return
+        rows = await self.db.get_premium_rows(
+            since=self.synced_at - PREMIUM_SYNC_OVERLAP
+        )
+        for row in rows:
+            user_id, updated_at = row["user_id"], row["premium_updated_at"]
+            state = PremiumState(
+                row["is_premium"], row["premium_expire_date"], updated_at
+            )
+            current = self._states.get(user_id)
+            if current == state or (
+                current is not None
+                and current.updated_at is not None
+                and updated_at is not None
+                and current.updated_at > updated_at
+            ):
+                continue
+            self._apply(user_id, state)
+            if updated_at is not None and updated_at > self.synced_at:
+                self.synced_at = updated_at
+
+    def set_role(self, is_leader: bool):
+        """Lider roli o'zgarganda (LeaderElection.on_change)"""
+        if is_leader and not self.is_leader:
+            # Follower paytida faqat keshdan o'chirilgan muddatlar bazada hali
+            # tugamagan: keyingi sync to'liq yuklab, ularni qayta topadi
+            self.synced_at = None
+        self.is_leader = is_leader
+
+    def _apply(self, user_id: int, state: PremiumState):
+        if not state.is_premium:
+            self._states.pop(user_id, None)
+            return
+
+        self._states[user_id] = state
+        if state.expire_date is not None:
+            earliest = self._heap[0][0] if self._heap else None
+            heapq.heappush(self._heap, (state.expire_date, user_id))
+            # Yangi muddat hozirgi eng yaqin muddatdan oldin bo'lsa, sweeper'ni uyg'otamiz
+            if earliest is None or state.expire_date < earliest:
+                self._wakeup.set()
+
+    def _pop_expired(self, now: datetime) -> int:
+        expired = 0
+        while self._heap and self._heap[0][0] <= now:
+            expire_date, user_id = heapq.heappop(self._heap)
+            state = self._states.get(user_id)
+            # Status o'zgargan yoki muddat uzaytirilgan bo'lsa yozuv eskirgan
+            if state is None or state.expire_date != expire_date:
+                continue
+            del self._states[user_id]
+            if self.is_leader:
+                self._pending.append((user_id, expire_date))
+            expired += 1
+        if self._pending and self._pending_since is None:
+            self._pending_since = now
+        return expired
+
+    async def flush(self):
+        """To'plangan muddati tugaganlarni bazaga yozish"""
+        if not self._pending:
+            return
+        batch, self._pending = self._pending, []
+        self._pending_since = None
+        try:
+            count = await self.db.expire_premium_batch(batch)
+            logger.info(f"Premium muddati tugadi: {count} ta foydalanuvchi")
+        except Exception as e:
+            logger.error(f"Premium muddatlarini yozishda xato: {e}")
+            # Keyingi flush'da qayta urinib ko'ramiz
+            self._pending = batch + self._pending
+            self._pending_since = datetime.now()
+
+    async def _sweeper(self):
+        while True:
+            self._wakeup.clear()
+            now = datetime.now()
+            self._pop_expired(now)
+
+            if self._pending and (
+                len(self._pending) >= self.batch_size
+                or (now - self._pending_since).total_seconds() >= self.flush_interval
+            ):
+                await self.flush()
+
+            timeout = None
+            if self._heap:
+                timeout = max((self._heap[0][0] - datetime.now()).total_seconds(), 0)
+            if self._pending:
+                timeout = (
+                    self.flush_interval
+                    if timeout is None
+                    else min(timeout, self.flush_interval)
+                )
+
+            try:
+                await asyncio.wait_for(self._wakeup.wait(), timeout)
+            except asyncio.TimeoutError:
+                pass
+
+    async def start(self):
+        """Keshni yuklab, sweeper'ni ishga tushirish"""
+        await self.load()
+        self._task = asyncio.create_task(self._sweeper())
+
+    async def stop(self):
+        if self._task:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+        await self.flush()
+
+
+# Global instance
+premium_service = PremiumService()
@@ -0,0 +1,205 @@
+# utils/quick_convert.py
+import re
+from dataclasses import dataclass
+from datetime import timedelta
+from typing import Dict, Optional, Tuple
+from keyboards.inline.currency_kb import SUPPORTED_CURRENCIES, get_currency_emoji
+from utils.currency_api import RateSnapshot
+
+# Valyuta nomlarining yozilish variantlari (kichik harflarda)
+CURRENCY_ALIASES: Dict[str, str] = {
+    **{code.lower(): code for code in SUPPORTED_CURRENCIES},
+    "$": "USD",
+    "dollar": "USD",
+    "dollor": "USD",
+    "доллар": "USD",
+    "долларов": "USD",
+    "долл": "USD",
+    "долларах": "USD",
+    "dollarga": "USD",
+    "€": "EUR",
+    "euro": "EUR",
+    "evro": "EUR",
+    "yevro": "EUR",
+    "evroga": "EUR",
+    "евро": "EUR",
+    "£": "GBP",
+    "funt": "GBP",
+    "pound": "GBP",
+    "фунт": "GBP",
+    "₽": "RUB",
+    "rubl": "RUB",
+    "rubl'": "RUB",
+    "ruble": "RUB",
+    "рубль": "RUB",
+    "рублей": "RUB",
+    "руб": "RUB",
+    "рублях": "RUB",
+    "rublga": "RUB",
+    "so'm": "UZS",
+    "som": "UZS",
+    "sum": "UZS",
+    "so'mga": "UZS",
+    "сум": "UZS",
+    "сўм": "UZS",
+}
+
+# Summa qo'shimchalari: 1.5k, 2 mln, 10 ming
+MULTIPLIERS: Dict[str, int] = {
+    "k": 1_000,
+    "к": 1_000,
+    "ming": 1_000,
+    "тыс": 1_000,
+    "m": 1_000_000,
+    "mln": 1_000_000,
+    "million": 1_000_000,
+    "млн": 1_000_000,
+}
+
+# Ma'nosi yo'q, lekin so'rovda uchrashi mumkin bo'lgan so'zlar
+CONNECTORS = frozenset(
+    {
+        "to",
+        "in",
+        "into",
+        "ga",
+        "dan",
+        "da",
+        "necha",
+        "qancha",
+        "bo'ladi",
+        "в",
+        "сколько",
+        "how",
+        "much",
+        "is",
+    }
+)
+
+MAX_QUERY_LENGTH = 64
+MAX_AMOUNT = 99999999999999
+
+_NUMBER = r"(?:\d{1,3}(?:[ \u00a0,]\d{3})+|\d+)(?:[.,]\d+)?"
+_SUFFIX = "|".join(sorted(map(re.escape, MULTIPLIERS), key=len, reverse=True))
+_TOKEN_RE = re.compile(
+    rf"(?P<num>{_NUMBER})(?:\s*(?P<suffix>{_SUFFIX})(?![^\W\d_]))?"
+    r"|(?P<word>[^\W\d_](?:[\w']*[^\W\d_])?)"
+    r"|(?P<sym>[$€£₽])"
+    # Qolgan tinish belgilari (?, =, ->) e'tiborga olinmaydi
+    r"|(?P<skip>[^\w$€£₽]+)" r"|(?P<other>.)",
+    re.IGNORECASE,
+)
+# Guruh xabarlari uchun arzon oldindan tekshiruv: raqam va valyuta belgisi
+# yoki nomi bo'lmasa xabar tahlil qilinmaydi. Nomlar faqat so'z boshida va
+# birinchi harfi mos kelgan joyda sinab ko'riladi.
+_DIGIT_RE = re.compile(r"\d")
+_ALIAS_WORDS = sorted(
+    (alias for alias in CURRENCY_ALIASES if alias[0].isalpha()), key=len, reverse=True
+)
+_CURRENCY_HINT_RE = re.compile(
+    r"[$€£₽]"
+    rf"|(?<![^\W\d_])(?=[{''.join(sorted({alias[0] for alias in _ALIAS_WORDS}))}])"
+    rf"(?:{'|'.join(map(re.escape, _ALIAS_WORDS))}|so[‘’ʻʼ`]m)",
+    re.IGNORECASE,
+)
+_APOSTROPHES = str.maketrans({"‘": "'", "’": "'", "ʻ": "'", "ʼ": "'", "`": "'"})
+
+
+@dataclass(frozen=True)
+class QuickQuery:
+    amount: float
+    from_currency: str
+    targets: Tuple[str, ...]
+
+
+def _parse_number(raw: str, suffix: Optional[str]) -> float:
+    # "1,000" va "1 000" - minglik ajratuvchi, "1,5" - kasr
+    if re.fullmatch(r"\d{1,3}(?:[ \u00a0,]\d{3})+(?:[.,]\d+)?", raw):
+        head, _, tail = raw.partition(".")
+        raw = re.sub(r"[ \u00a0,]", "", head) + ("." + tail if tail else "")
+    else:
+        raw = raw.replace(",", ".")
+    value = float(raw)
+    if suffix:
+        value *= MULTIPLIERS[suffix.lower()]
+    return value
+
+
+def parse_quick_query(text: str) -> Optional[QuickQuery]:
+    """ "100 usd", "250 eur to uzs gbp", "1.5k rub" kabi so'rovlarni tahlil qilish.
+
+    Bitta summa va kamida bitta valyuta bo'lishi kerak, notanish so'z bo'lsa
+    None qaytadi (oddiy suhbat konvertatsiya deb qabul qilinmasligi uchun).
+    Maqsad valyutalar ko'rsatilmasa, qolgan barcha valyutalarga hisoblanadi.
+    """
+    if not text or len(text) > MAX_QUERY_LENGTH:
+        return None
+
+    amount = None
+    currencies = []
+    for match in _TOKEN_RE.finditer(text.lower().translate(_APOSTROPHES)):
+        kind = match.lastgroup
+        if kind == "skip":
+            continue
+        if kind == "num" or kind == "suffix":
+            if amount is not None:
+                return None
+            amount = _parse_number(match.group("num"), match.group("suffix"))
+        elif kind == "word" or kind == "sym":
+            token = match.group(kind)
+            code = CURRENCY_ALIASES.get(token)
+            if code is not None:
+                if code not in currencies:
+                    currencies.append(code)
+            elif token not in CONNECTORS:
+                return None
+        else:
+            return None
+
+    if amount is None or not currencies or not 0 < amount <= MAX_AMOUNT:
+        return None
+
+    from_currency, *targets = currencies
+    if not targets:
+        targets = [c for c in SUPPORTED_CURRENCIES if c != from_currency]
+    return QuickQuery(amount, from_currency, tuple(targets))
+
+
+def looks_like_price(text: Optional[str]) -> bool:
+    """Tahlildan oldingi filtr: uzunlik, raqam va valyuta belgisi"""
+    return (
+        text is not None
+        and len(text) <= MAX_QUERY_LENGTH
+        and _DIGIT_RE.search(text) is not None
+        and _CURRENCY_HINT_RE.search(text) is not None
+    )
+
+
+def format_amount(amount: float) -> str:
+    """Konvertatsiya natijasini formatlash"""
+    if amount is None:
+        return "0"
+    if abs(amount) < 0.0001:
+        return "{:.8f}".format(amount).rstrip("0").rstrip(".")
+    return "{:,.4f}".format(amount).rstrip("0").rstrip(".")
+
+
+def render_quick_conversion(query: QuickQuery, snapshot: RateSnapshot) -> str:
+    """Konvertatsiya natijasi matni (process_amount bilan bir xil ko'rinishda)"""
+    results = [
+        f"{get_currency_emoji(query.from_currency)} {query.amount:,.2f} "
+        f"{query.from_currency} = "
+    ]
+    for to_currency in query.targets:
+        rate = snapshot.rate(query.from_currency, to_currency)
+        results.append(
+            f"{get_currency_emoji(to_currency)} {format_amount(query.amount * rate)} "
+            f"{to_currency}\n"
+            f"💱 Kurs: 1 {query.from_currency} = {rate:.4f} {to_currency}"
+        )
+
+    time_info = (
+        f"\n\n🕐 Yangilangan vaqt: "
+        f"{(snapshot.updated_at + timedelta(hours=5)).strftime('%H:%M:%S')}"
+    )
+    return "💱 Konvertatsiya natijasi:\n\n" + "\n\n".join(results) + time_info
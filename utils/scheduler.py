@@ -0,0 +1,311 @@
+# utils/scheduler.py
+import asyncio
+import heapq
+import logging
+import time
+from datetime import datetime
+from typing import Awaitable, Callable, Dict, FrozenSet, Iterable, List, Optional
+import pytz
+
+logger = logging.getLogger(__name__)
+
+# Xato bilan tugagan ish shuncha soniyadan boshlab ikki barobar oshib
+# boruvchi oraliqda qayta ishga tushiriladi
+RESTART_BACKOFF = 5.0
+MAX_RESTART_BACKOFF = 300.0
+# To'xtatishda ishlayotgan ishlarga beriladigan vaqt
+STOP_TIMEOUT = 10.0
+TASHKENT = pytz.timezone("Asia/Tashkent")
+
+JobFunc = Callable[[], Awaitable]
+
+
+class Interval:
+    """Har ``seconds`` soniyada (birinchisi darhol yoki rol olinganda)"""
+
+    run_at_start = True
+
+    def __init__(self, seconds: float):
+        self.seconds = seconds
+
+    def next_after(self, now: float) -> float:
+        return now + self.seconds
+
+    def __repr__(self) -> str:
+        return f"every {self.seconds:g}s"
+
+
+class Cron:
+    """Cron'ga o'xshash jadval: berilgan soat va daqiqalarda (None - har biri)"""
+
+    run_at_start = False
+
+    def __init__(
+        self,
+        hours: Optional[Iterable[int]] = None,
+        minutes: Optional[Iterable[int]] = None,
+        tz=TASHKENT,
+    ):
+        self.hours: Optional[FrozenSet[int]] = (
+            frozenset(hours) if hours is not None else None
+        )
+        self.minutes: Optional[FrozenSet[int]] = (
+            frozenset(minutes) if minutes is not None else None
+        )
+        self.tz = tz
+
+    def next_after(self, now: float) -> float:
+        # Keyingi daqiqa boshidan bir sutka oldinga qarab
+        t = (int(now) // 60 + 1) * 60
+        for _ in range(24 * 60):
+            local = datetime.fromtimestamp(t, self.tz)
+            if (self.hours is None or local.hour in self.hours) and (
+                self.minutes is None or local.minute in self.minutes
+            ):
+                return float(t)
+            t += 60
+        raise ValueError(f"Cron jadvali hech qachon ishlamaydi: {self}")
+
+    def __repr__(self) -> str:
+        hours = "*" if self.hours is None else ",".join(map(str, sorted(self.hours)))
+        minutes = (
+            "*" if self.minutes is None else ",".join(map(str, sorted(self.minutes)))
+        )
+        return f"cron {minutes} {hours}"
+
+
+class Job:
+    __slots__ = (
+        "name",
+        "func",
+        "schedule",
+        "leader",
+        "timeout",
+        "next_due",
+        "task",
+        "runs",
+        "failures",
+        "consecutive_failures",
+        "skipped",
+        "last_error",
+        "last_duration",
+        "max_duration",
+        "total_duration",
+        "last_lag",
+        "max_lag",
+    )
+
+    def __init__(
+        self,
+        name: str,
+        func: JobFunc,
+        schedule,
+        leader: Optional[bool],
+        timeout: Optional[float],
+    ):
+        self.name = name
+        self.func = func
+        self.schedule = schedule
+        # True - faqat liderda, False - faqat follower'da, None - hamma joyda
+        self.leader = leader
+        self.timeout = timeout
+        self.next_due = 0.0
+        self.task: Optional[asyncio.Task] = None
+        self.runs = 0
+        self.failures = 0
+        self.consecutive_failures = 0
+        self.skipped = 0
+        self.last_error: Optional[str] = None
+        self.last_duration = 0.0
+        self.max_duration = 0.0
+        self.total_duration = 0.0
+        self.last_lag = 0.0
+        self.max_lag = 0.0
+
+
+class Scheduler:
+    """Fon ishlari uchun yagona taymer.
+
+    Barcha ishlarning keyingi vaqti bitta heap'da turadi va bitta task eng
+    yaqinigacha uxlaydi. Har bir ishga tushish alohida task'da kuzatiladi:
+    xato bo'lsa log qilinadi va ish ``RESTART_BACKOFF`` dan boshlab oshib
+    boruvchi kutishdan keyin qayta ishga tushadi; oldingi ishga tushish
+    tugamagan bo'lsa navbatdagisi o'tkazib yuboriladi. Lider roli
+    o'zgarganda mos kelmaydigan ishlar to'xtatiladi.
+    """
+
+    def __init__(
+        self,
+        backoff: float = RESTART_BACKOFF,
+        max_backoff: float = MAX_RESTART_BACKOFF,
+    ):
+        self.backoff = backoff
+        self.max_backoff = max_backoff
+        self.is_leader = False
+        self._jobs: Dict[str, Job] = {}
+        # (vaqt, tartib raqami, ish); eskirgan yozuvlar next_due bilan aniqlanadi
+        self._heap: List[tuple] = []
+        self._counter = 0
+        self._wakeup = asyncio.Event()
+        self._task: Optional[asyncio.Task] = None
+
+    def add_job(
+        self,
+        name: str,
+        func: JobFunc,
+        schedule,
+        leader: Optional[bool] = None,
+        timeout: Optional[float] = None,
+    ):
+        if name in self._jobs:
+            raise ValueError(f"Ish allaqachon qo'shilgan: {name}")
+        job = Job(name, func, schedule, leader, timeout)
+        self._jobs[name] = job
+        if self._task is not None:
+            self._schedule_first(job, time.time())
+
+    def _push(self, job: Job, due: float):
+        job.next_due = due
+        self._counter += 1
+        heapq.heappush(self._heap, (due, self._counter, job))
+        self._wakeup.set()
+
+    def _allowed(self, job: Job) -> bool:
+        return job.leader is None or job.leader == self.is_leader
+
+    def _schedule_first(self, job: Job, now: float):
+        if job.schedule.run_at_start and self._allowed(job):
+            self._push(job, now)
+        else:
+            self._push(job, job.schedule.next_after(now))
+
+    def set_role(self, is_leader: bool):
+        """Lider roli o'zgarganda (LeaderElection.on_change)"""
+        if is_leader == self.is_leader:
+            return
+        self.is_leader = is_leader
+        now = time.time()
+        for job in self._jobs.values():
+            if not self._allowed(job):
+                if job.task is not None:
+                    job.task.cancel()
+            elif self._task is not None and job.schedule.run_at_start:
+                self._push(job, now)
+
+    def _fire(self, job: Job, due: float, now: float):
+        self._push(job, job.schedule.next_after(now))
+        if not self._allowed(job):
+            return
+        if job.task is not None:
+            job.skipped += 1
+            logger.warning(f"{job.name}: oldingi ishga tushish tugamagan, o'tkazildi")
+            return
+        lag = now - due
+        job.last_lag = lag
+        job.max_lag = max(job.max_lag, lag)
+        job.task = asyncio.create_task(self._supervise(job))
+
+    async def _supervise(self, job: Job):
+        started = time.monotonic()
+        try:
+            if job.timeout is not None:
+                await asyncio.wait_for(job.func(), job.timeout)
+            else:
+                await job.func()
+            job.consecutive_failures = 0
+        except asyncio.CancelledError:
+            logger.info(f"{job.name}: to'xtatildi")
+            raise
+        except Exception as e:
+            job.failures += 1
+            job.consecutive_failures += 1
+            job.last_error = repr(e)
+            delay = min(
+                self.backoff * 2 ** (job.consecutive_failures - 1), self.max_backoff
+            )
+            logger.error(
+                f"{job.name}: xato ({job.consecutive_failures}-marta ketma-ket), "
+                f"{delay:.0f} s dan keyin qayta: {e}"
+            )
+            retry_at = time.time() + delay
+            if retry_at < job.next_due:
+                self._push(job, retry_at)
+        finally:
+            duration = time.monotonic() - started
+            job.runs += 1
+            job.last_duration = duration
+            job.max_duration = max(job.max_duration, duration)
+            job.total_duration += duration
+            job.task = None
+
+    async def _run(self):
+        while True:
+            self._wakeup.clear()
+            now = time.time()
+            while self._heap and self._heap[0][0] <= now:
+                due, _, job = heapq.heappop(self._heap)
+                if due == job.next_due:
+                    self._fire(job, due, now)
+
+            timeout = max(self._heap[0][0] - time.time(), 0) if self._heap else None
+            try:
+                await asyncio.wait_for(self._wakeup.wait(), timeout)
+            except asyncio.TimeoutError:
+                pass
+
+    def start(self):
+        if self._task is not None:
+            return
+        now = time.time()
+        for job in self._jobs.values():
+            self._schedule_first(job, now)
+        self._task = asyncio.create_task(self._run())
+        logger.info(
+            "Scheduler ishga tushdi: "
+            + ", ".join(f"{job.name} ({job.schedule})" for job in self._jobs.values())
+        )
+
+    async def stop(self, timeout: float = STOP_TIMEOUT):
+        """Taymerni to'xtatish; ishlayotganlar ``timeout`` gacha kutiladi"""
+        if self._task is not None:
+            self._task.cancel()
+            await asyncio.gather(self._task, return_exceptions=True)
+            self._task = None
+        running = [job.task for job in self._jobs.values() if job.task is not None]
+        if not running:
+            return
+        _, pending = await asyncio.wait(running, timeout=timeout)
+        for task in pending:
+            task.cancel()
+        await asyncio.gather(*running, return_exceptions=True)
+        if pending:
+            logger.warning(f"Scheduler: {len(pending)} ta ish bekor qilindi")
+
+    def stats(self) -> dict:
+        return {
+            job.name: {
+                "schedule": repr(job.schedule),
+                "running": job.task is not None,
+                "next_due": (
+                    datetime.fromtimestamp(job.next_due).isoformat(timespec="seconds")
+                    if job.next_due
+                    else None
+                ),
+                "runs": job.runs,
+                "failures": job.failures,
+                "skipped": job.skipped,
+                "last_error": job.last_error,
+                "last_duration_ms": job.last_duration * 1000,
+                "max_duration_ms": job.max_duration * 1000,
+                "avg_duration_ms": (
+                    job.total_duration / job.runs * 1000 if job.runs else 0.0
+                ),
+                "last_lag_ms": job.last_lag * 1000,
+                "max_lag_ms": job.max_lag * 1000,
+            }
+            for job in self._jobs.values()
+        }
+
+
+# Global instance
+scheduler = Scheduler()
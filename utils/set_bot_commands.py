@@ -7,5 +7,6 @@ async def set_default_commands(bot: Bot):
         [
             BotCommand(command="start", description="Start bot"),
             BotCommand(command="help", description="Show help"),
+            BotCommand(command="digest", description="Daily rates digest settings"),
         ]
     )
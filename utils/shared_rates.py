@@ -0,0 +1,223 @@
+# utils/shared_rates.py
+import logging
+import os
+import struct
+import tempfile
+from datetime import datetime
+from multiprocessing import resource_tracker, shared_memory
+from typing import Dict, Optional, Sequence, Tuple
+from keyboards.inline.currency_kb import SUPPORTED_CURRENCIES
+
+try:
+    import fcntl
+except ImportError:  # Windows: umumiy segment ishlatilmaydi
+    fcntl = None
+
+logger = logging.getLogger(__name__)
+
+SHARED_RATES_NAME = "valyuta_rates"
+# seq, version, fetched_at (unix vaqt)
+HEADER = struct.Struct("<QQd")
+SEQ = struct.Struct("<Q")
+# Yozuvchi yarim yo'lda bo'lsa o'quvchi shuncha marta qayta o'qiydi
+READ_RETRIES = 1000
+# Yozuvchi lock fayli segment bilan bir joyda (bir xostdagi jarayonlar uchun)
+LOCK_DIR = "/dev/shm" if os.path.isdir("/dev/shm") else tempfile.gettempdir()
+
+
+def _unlink(shm: shared_memory.SharedMemory):
+    # unlink() resource_tracker'dan ham o'chiradi; o'quvchi uni avval
+    # o'chirgan bo'lishi mumkin (bitta tracker'dagi jarayonlar)
+    resource_tracker.register(shm._name, "shared_memory")
+    shm.unlink()
+
+
+class SharedRates:
+    """``multiprocessing.shared_memory`` dagi kurslar nusxasi (seqlock).
+
+    Joylashuv: ``seq``, ``version``, ``fetched_at`` va N x N kross-kurs
+    matritsasi (``matrix[i][j]`` - 1 ``currencies[i]`` necha
+    ``currencies[j]`` turadi). Yozuvchi yozishdan oldin ``seq`` ni toq,
+    tugatgach juft qiladi; o'quvchi ``seq`` juft va o'qishdan oldin/keyin
+    bir xil bo'lgan nusxanigina qabul qiladi.
+
+    Yozuvchi - lock faylida ``flock`` ni ushlab turgan yagona jarayon.
+    Segmentni faqat lock egasi o'chiradi/yaratadi; yozuvchi o'lsa lock'ni
+    yadro bo'shatadi va keyingi ``open()`` qilgan jarayon uning o'rnini oladi.
+    """
+
+    def __init__(
+        self,
+        name: str = SHARED_RATES_NAME,
+        currencies: Sequence[str] = SUPPORTED_CURRENCIES,
+    ):
+        self.name = name
+        self.currencies = tuple(currencies)
+        self._index = {code: i for i, code in enumerate(self.currencies)}
+        self._matrix = struct.Struct(f"<{len(self.currencies) ** 2}d")
+        self.size = HEADER.size + self._matrix.size
+        self.lock_path = os.path.join(LOCK_DIR, f"{name}.lock")
+        self._shm: Optional[shared_memory.SharedMemory] = None
+        self._lock_fd: Optional[int] = None
+        self.is_writer = False
+        self.writes = 0
+        self.retries = 0
+
+    def _try_lock(self) -> bool:
+        fd = os.open(self.lock_path, os.O_RDWR | os.O_CREAT, 0o600)
+        try:
+            fcntl.flock(fd, fcntl.LOCK_EX | fcntl.LOCK_NB)
+        except BlockingIOError:
+            os.close(fd)
+            return False
+        self._lock_fd = fd
+        return True
+
+    def _release_lock(self):
+        if self._lock_fd is not None:
+            # Yopilganda flock ham bo'shaydi
+            os.close(self._lock_fd)
+            self._lock_fd = None
+
+    def _create(self) -> shared_memory.SharedMemory:
+        """Lock egasi: o'lgan yozuvchidan qolgan segmentni almashtirish"""
+        try:
+            old = shared_memory.SharedMemory(self.name)
+        except FileNotFoundError:
+            pass
+        else:
+            logger.warning(f"Umumiy kurslar: eski segment ({self.name}) almashtiriladi")
+            _unlink(old)
+            old.close()
+        shm = shared_memory.SharedMemory(self.name, create=True, size=self.size)
+        HEADER.pack_into(shm.buf, 0, 0, 0, 0.0)
+        return shm
+
+    def _attach(self) -> Optional[shared_memory.SharedMemory]:
+        shm = shared_memory.SharedMemory(self.name)
+        # Python < 3.13 ulangan segmentni ham kuzatadi va jarayon tugaganda
+        # o'chirib yuboradi; segment yozuvchiga tegishli
+        resource_tracker.unregister(shm._name, "shared_memory")
+        if shm.size < self.size:
+            logger.error(
+                f"Umumiy kurslar segmenti boshqa joylashuvda: "
+                f"{shm.size} < {self.size} bayt"
+            )
+            shm.close()
+            return None
+        return shm
+
+    def open(self) -> bool:
+        """Lock olinsa yozuvchi (segment yaratiladi), aks holda o'quvchi"""
+        if fcntl is None:
+            logger.warning("Umumiy kurslar: fcntl yo'q, o'chirilgan")
+            return False
+        try:
+            if self._try_lock():
+                try:
+                    self._shm = self._create()
+                except Exception:
+                    self._release_lock()
+                    raise
+                self.is_writer = True
+            else:
+                self._shm = self._attach()
+                self.is_writer = False
+        except FileNotFoundError:
+            # Yozuvchi lock'ni olgan, segmentni hali yaratmagan
+            logger.info("Umumiy kurslar segmenti hali yaratilmagan")
+            self._shm = None
+            return False
+        except OSError as e:
+            logger.error(f"Umumiy kurslar segmentini ochib bo'lmadi: {e}")
+            self._shm = None
+            return False
+        if self._shm is None:
+            return False
+
+        role = "yozuvchi" if self.is_writer else "o'quvchi"
+        logger.info(f"Umumiy kurslar ({self.name}): {role}")
+        return True
+
+    def reopen(self) -> bool:
+        """O'quvchi uchun: yozuvchi chiqib ketgan bo'lsa uning o'rnini olish"""
+        self.close()
+        return self.open()
+
+    def close(self):
+        if self._shm is not None:
+            try:
+                if self.is_writer:
+                    _unlink(self._shm)
+                self._shm.close()
+            except Exception as e:
+                logger.error(f"Umumiy kurslar segmentini yopishda xato: {e}")
+            self._shm = None
+        # Segment o'chirilgandan keyin: keyingi yozuvchi toza joydan boshlaydi
+        self._release_lock()
+        self.is_writer = False
+
+    def publish(self, version: int, rates: Dict[str, float], fetched_at: datetime):
+        """Yangi nusxani yozish (faqat yozuvchi)"""
+        if self._shm is None or not self.is_writer:
+            return
+        rates = {**rates, "UZS": 1.0}
+        matrix = [
+            rates[src] / rates[dst] if src in rates and dst in rates else float("nan")
+            for src in self.currencies
+            for dst in self.currencies
+        ]
+        buf = self._shm.buf
+        seq = SEQ.unpack_from(buf, 0)[0]
+        SEQ.pack_into(buf, 0, seq + 1)
+        HEADER.pack_into(buf, 0, seq + 1, version, fetched_at.timestamp())
+        self._matrix.pack_into(buf, HEADER.size, *matrix)
+        SEQ.pack_into(buf, 0, seq + 2)
+        self.writes += 1
+
+    def peek(self) -> int:
+        """Segmentdagi versiya (yozilmagan yoki yozilayotgan bo'lsa 0)"""
+        if self._shm is None:
+            return 0
+        seq, version, _ = HEADER.unpack_from(self._shm.buf, 0)
+        return 0 if seq & 1 else version
+
+    def read(
+        self, newer_than: int = 0
+    ) -> Optional[Tuple[int, Dict[str, float], datetime]]:
+        """(version, rates, fetched_at); ``newer_than`` dan yangisi bo'lmasa None.
+
+        ``rates`` - ``CurrencyApi.rates`` ko'rinishida (UZS siz).
+        """
+        if self._shm is None:
+            return None
+        buf = self._shm.buf
+        uzs = self._index.get("UZS")
+        for _ in range(READ_RETRIES):
+            seq, version, timestamp = HEADER.unpack_from(buf, 0)
+            if seq == 0 or (not seq & 1 and version <= newer_than):
+                return None
+            if seq & 1:
+                self.retries += 1
+                continue
+            matrix = self._matrix.unpack_from(buf, HEADER.size)
+            if SEQ.unpack_from(buf, 0)[0] != seq:
+                self.retries += 1
+                continue
+            n = len(self.currencies)
+            rates = {
+                code: matrix[i * n + uzs]
+                for i, code in enumerate(self.currencies)
+                if code != "UZS" and matrix[i * n + uzs] == matrix[i * n + uzs]
+            }
+            return version, rates, datetime.fromtimestamp(timestamp)
+        return None
+
+    def stats(self) -> dict:
+        return {
+            "name": self.name,
+            "writer": self.is_writer,
+            "version": self.peek(),
+            "writes": self.writes,
+            "retries": self.retries,
+        }
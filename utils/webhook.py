@@ -0,0 +1,146 @@
+# utils/webhook.py
+import asyncio
+import hmac
+import logging
+import time
+from typing import Optional
+from aiohttp import web
+from aiogram import Bot, Dispatcher
+from aiogram.types import Update
+from data.config import WebhookConfig
+from utils.executor import UpdateExecutor
+
+logger = logging.getLogger(__name__)
+
+SECRET_HEADER = "X-Telegram-Bot-Api-Secret-Token"
+# Navbat to'lganligi haqidagi ogohlantirishlar orasidagi minimal vaqt
+OVERFLOW_LOG_INTERVAL = 10.0
+
+
+class WebhookServer:
+    """Telegram webhook'i uchun aiohttp server.
+
+    So'rov secret token bilan tekshiriladi, update dispatcher orqali
+    UpdateExecutor navbatiga qo'yiladi va Telegram'ga darhol 200 qaytariladi.
+    Executor to'la bo'lsa 503 qaytadi va Telegram keyinroq qayta yuboradi.
+    """
+
+    def __init__(
+        self,
+        dp: Dispatcher,
+        bot: Bot,
+        config: WebhookConfig,
+        executor: UpdateExecutor,
+    ):
+        self.dp = dp
+        self.bot = bot
+        self.config = config
+        self.executor = executor
+        self._runner: Optional[web.AppRunner] = None
+        self.received = 0
+        self.rejected = 0
+        self.unauthorized = 0
+        self._overflow_logged_at = float("-inf")
+        self._rejected_logged = 0
+
+    def create_app(self) -> web.Application:
+        app = web.Application()
+        app.router.add_post(self.config.path, self.handle)
+        return app
+
+    def _authorized(self, request: web.Request) -> bool:
+        # Secret'siz webhook ishga tushirilmaydi; bo'sh secret hech narsani
+        # tasdiqlamaydi
+        if not self.config.secret:
+            return False
+        token = request.headers.get(SECRET_HEADER, "")
+        return hmac.compare_digest(token.encode(), self.config.secret.encode())
+
+    async def handle(self, request: web.Request) -> web.Response:
+        if not self._authorized(request):
+            self.unauthorized += 1
+            return web.Response(status=401)
+
+        try:
+            update = Update.model_validate(
+                await request.json(loads=self.bot.session.json_loads),
+                context={"bot": self.bot},
+            )
+        except Exception as e:
+            logger.warning(f"Webhook: noto'g'ri update: {e}")
+            return web.Response(status=400)
+
+        if self.executor.is_full():
+            self.rejected += 1
+            now = time.monotonic()
+            if now - self._overflow_logged_at >= OVERFLOW_LOG_INTERVAL:
+                logger.warning(
+                    f"Update navbati to'la ({self.executor.max_pending}), "
+                    f"503 qaytarildi: {self.rejected - self._rejected_logged} ta"
+                )
+                self._overflow_logged_at = now
+                self._rejected_logged = self.rejected
+            return web.Response(status=503)
+
+        self.received += 1
+        # Executor middleware update'ni navbatga qo'yib darhol qaytadi
+        await self.dp.feed_update(self.bot, update)
+        return web.Response()
+
+    async def start(self, set_webhook: bool = True):
+        """HTTP serverni ishga tushirish va webhook'ni o'rnatish"""
+        self._runner = web.AppRunner(self.create_app(), access_log=None)
+        await self._runner.setup()
+        await web.TCPSite(self._runner, self.config.host, self.config.port).start()
+        logger.info(
+            f"Webhook server {self.config.host}:{self.config.port}"
+            f"{self.config.path} da ishga tushdi"
+        )
+
+        if set_webhook:
+            await self.bot.set_webhook(
+                self.config.url,
+                secret_token=self.config.secret,
+                allowed_updates=self.dp.resolve_used_update_types(),
+                max_connections=self.config.max_connections,
+            )
+            logger.info(f"Webhook o'rnatildi: {self.config.url}")
+
+    async def stop(self):
+        """Yangi so'rovlarni qabul qilishni to'xtatish"""
+        if self._runner is not None:
+            await self._runner.cleanup()
+            self._runner = None
+
+    def stats(self) -> dict:
+        return {
+            "received": self.received,
+            "rejected": self.rejected,
+            "unauthorized": self.unauthorized,
+        }
+
+
+async def run_webhook(
+    dp: Dispatcher, bot: Bot, config: WebhookConfig, executor: UpdateExecutor
+):
+    """Webhook rejimida botni to'xtatilguncha ishlatish"""
+    if not config.base_url:
+        raise ValueError("Webhook rejimi uchun WEBHOOK_URL ko'rsatilmagan")
+    if not config.secret:
+        raise ValueError("Webhook rejimi uchun WEBHOOK_SECRET ko'rsatilmagan")
+
+    server = WebhookServer(dp, bot, config, executor)
+    workflow_data = {"dispatcher": dp, "bots": [bot], **dp.workflow_data}
+    await dp.emit_startup(bot=bot, **workflow_data)
+    await server.start()
+    started = time.monotonic()
+    try:
+        await asyncio.Event().wait()
+    finally:
+        await server.stop()
+        await executor.stop()
+        await dp.emit_shutdown(bot=bot, **workflow_data)
+        logger.info(
+            f"Webhook server to'xtadi ({time.monotonic() - started:.0f} s): "
+            f"{server.stats()}"
+        )